@@ -0,0 +1,315 @@
+import os
+import heapq
+import hashlib
+import itertools
+import tempfile
+
+from operator import itemgetter
+from typing import Generator, Iterable, List, TextIO, Tuple
+
+import numpy as np
+
+from BI.FASTA.Parser import parse_blocks
+from BI.utils._bunch import Bunch
+
+__all__ = ('seq_digest', 'DigestIndex', 'find_duplicates', 'dedup_fasta')
+
+_COMPLEMENT = bytes.maketrans(b'ACGTURYKMBVDHNacgturykmbvdhn',
+                              b'TGCAAYRMKVBHDNtgcaayrmkvbhdn')
+
+def seq_digest(seq : bytes,
+    ignore_case : bool = True,
+    both_strands : bool = False
+    ) -> bytes:
+
+    """Return 16 bytes blake2b digest of sequence content
+
+    Example
+    -------
+    >>> seq_digest(b'ACGTT') == seq_digest(b'acgtt')
+    True
+    >>> seq_digest(b'ACGTT', both_strands=True) == seq_digest(b'AACGT', both_strands=True)
+    True
+
+    Parameters
+    ----------
+    seq : bytes
+        Sequence without newlines
+    ignore_case : bool, optional
+        Soft-masked (lower case) bases are same as upper case, by default True
+    both_strands : bool, optional
+        Sequence is same as its reverse complement (smaller one is hashed), by default False
+
+    Returns
+    -------
+    bytes
+        Digest of sequence
+    """
+
+    if ignore_case:
+        seq = seq.upper()
+    if both_strands:
+        seq = min(seq, seq.translate(_COMPLEMENT)[::-1])
+    return hashlib.blake2b(seq, digest_size=16).digest()
+
+class DigestIndex:
+    """Class for grouping records by sequence digest in bounded memory.
+    Entries are kept in memory up to 'max_records', then sorted and spilled to
+    temporary file (sorted run). Groups are made by merging sorted runs (heapq.merge),
+    so the number of records is limited by disk, not by memory.
+
+    Example
+    -------
+    >>> index = DigestIndex(max_records=2)
+    >>> for idx, seq in enumerate([b'ACGT', b'GGGG', b'acgt']):
+    ...     index.add(seq_digest(seq), 0, idx, f'seq{idx}')
+    >>> [titles for _, titles in index.groups() if len(titles) > 1]
+    [[(0, 0, 'seq0'), (0, 2, 'seq2')]]
+    >>> index.close()
+    """
+
+    def __init__(self,
+        max_records : int = 1_000_000,
+        tmp_dir : str = None
+        ) -> None:
+
+        """Initialize DigestIndex class
+
+        Parameters
+        ----------
+        max_records : int, optional
+            Maximum number of entries kept in memory, by default 1,000,000
+        tmp_dir : str, optional
+            Directory of spilled runs, by default None (system temporary directory)
+        """
+
+        self.max_records = max_records
+        self.tmp_dir = tmp_dir
+        self._entries: List[Tuple[str, int, int, str]] = []
+        self._runs: List[TextIO] = []
+
+        return
+
+    def add(self,
+        digest : bytes,
+        file_idx : int,
+        record_idx : int,
+        title : str
+        ) -> None:
+
+        """Add record (digest, index of file, index of record in file, title)"""
+
+        self._entries.append((digest.hex(), file_idx, record_idx, title))
+        if len(self._entries) >= self.max_records:
+            self._spill()
+        return
+
+    def _spill(self) -> None:
+        """Write sorted entries to temporary file"""
+
+        self._entries.sort()
+        handle = tempfile.TemporaryFile('w+', dir=self.tmp_dir)
+        handle.writelines(f'{digest}\t{file_idx}\t{record_idx}\t{title}\n'
+                          for digest, file_idx, record_idx, title in self._entries)
+        handle.seek(0)
+        self._runs.append(handle)
+        self._entries = []
+        return
+
+    def _iter_run(self, handle: TextIO) -> Generator[Tuple[str, int, int, str], None, None]:
+        for line in handle:
+            digest, file_idx, record_idx, title = line.rstrip('\n').split('\t', 3)
+            yield digest, int(file_idx), int(record_idx), title
+
+    def groups(self) -> Generator[Tuple[str, List[Tuple[int, int, str]]], None, None]:
+        """Generator function yielding (hex digest, [(file idx, record idx, title)])
+        in digest order, records of group are sorted by file and record index"""
+
+        self._entries.sort()
+        runs = [self._iter_run(handle) for handle in self._runs]
+        merged = heapq.merge(*runs, iter(self._entries))
+        for digest, entries in itertools.groupby(merged, key=itemgetter(0)):
+            yield digest, [entry[1:] for entry in entries]
+
+    def close(self) -> None:
+        """Remove spilled runs"""
+
+        for handle in self._runs:
+            handle.close()
+        self._runs = []
+        self._entries = []
+        return
+
+def _build_index(
+    paths : List[str],
+    ignore_case : bool,
+    both_strands : bool,
+    max_records : int,
+    tmp_dir : str
+    ) -> Tuple[DigestIndex, List[int]]:
+
+    """Hash every record of fasta files, return DigestIndex and
+    the number of records of each file"""
+
+    from BI.FASTA.FASTA import FASTA
+
+    index = DigestIndex(max_records, tmp_dir)
+    counts = []
+    for file_idx, path in enumerate(paths):
+        record_idx = -1
+        with FASTA(path)._open_binary() as handle:
+            for record_idx, (title, _, seq) in enumerate(parse_blocks(handle)):
+                index.add(seq_digest(seq, ignore_case, both_strands), file_idx,
+                          record_idx, title.decode())
+        counts.append(record_idx + 1)
+
+    return index, counts
+
+def find_duplicates(
+    paths : Iterable[str],
+    ignore_case : bool = True,
+    both_strands : bool = False,
+    max_records : int = 1_000_000,
+    tmp_dir : str = None
+    ) -> Generator[List[Tuple[str, str]], None, None]:
+
+    """Generator function yielding groups of records with identical sequence
+    across fasta files (plain or compressed)
+
+    Parameters
+    ----------
+    paths : Iterable[str]
+        Paths of fasta files
+    ignore_case : bool, optional
+        Soft-masked (lower case) bases are same as upper case, by default True
+    both_strands : bool, optional
+        Sequence is same as its reverse complement, by default False
+    max_records : int, optional
+        Maximum number of entries kept in memory, by default 1,000,000
+    tmp_dir : str, optional
+        Directory of spilled runs, by default None
+
+    Yields
+    ------
+    List[Tuple[str, str]]
+        [(path, title)] of records having the same sequence (2 or more)
+    """
+
+    paths = list(paths)
+    index, _ = _build_index(paths, ignore_case, both_strands, max_records, tmp_dir)
+    try:
+        for _, entries in index.groups():
+            if len(entries) > 1:
+                yield [(paths[file_idx], title) for file_idx, _, title in entries]
+    finally:
+        index.close()
+
+def dedup_fasta(
+    paths : Iterable[str],
+    output : str,
+    ignore_case : bool = True,
+    both_strands : bool = False,
+    max_records : int = 1_000_000,
+    tmp_dir : str = None
+    ) -> Bunch:
+
+    """Write the first record of every distinct sequence of fasta files to 'output'.
+    Records to keep are marked in bitmap of each file, and files are streamed
+    again to write kept records (FastaWriter), so sequences are never held in memory.
+    Output is indexed (.fai) after writing only when its titles are unique,
+    because records of different files often share titles.
+
+    Example
+    -------
+    >>> import os, tempfile
+    >>> from BI.FASTA.Writer import FastaWriter
+    >>> tmp_dir = tempfile.mkdtemp()
+    >>> path = os.path.join(tmp_dir, 'dup.fa')
+    >>> with FastaWriter(path, index=False) as writer:
+    ...     for title, seq in (('a', 'ACGTT'), ('b', 'GGG'), ('c', 'AACGT')):
+    ...         writer.write(title, seq)
+    >>> summary = dedup_fasta([path], os.path.join(tmp_dir, 'uniq.fa'), both_strands=True)
+    >>> summary.num_records, summary.num_unique, summary.num_removed
+    (3, 2, 1)
+    >>> print(open(os.path.join(tmp_dir, 'uniq.fa')).read(), end='')
+    >a
+    ACGTT
+    >b
+    GGG
+    >>> other = os.path.join(tmp_dir, 'other.fa')
+    >>> with FastaWriter(other, index=False) as writer:
+    ...     writer.write('a', 'TTTT')
+    >>> summary = dedup_fasta([path, other], os.path.join(tmp_dir, 'merged.fa')) # doctest: +ELLIPSIS
+    [WARNING] Duplicate key 'a' in ..., index is not written.
+    >>> summary.num_records, summary.num_unique, summary.num_removed
+    (4, 4, 0)
+    >>> os.path.exists(os.path.join(tmp_dir, 'merged.fa.fai'))
+    False
+
+    Parameters
+    ----------
+    paths : Iterable[str]
+        Paths of fasta files
+    output : str
+        Path of deduplicated fasta (FastaWriter, .gz -> BGZF)
+    ignore_case : bool, optional
+        Soft-masked (lower case) bases are same as upper case, by default True
+    both_strands : bool, optional
+        Sequence is same as its reverse complement, by default False
+    max_records : int, optional
+        Maximum number of entries kept in memory, by default 1,000,000
+    tmp_dir : str, optional
+        Directory of spilled runs, by default None
+
+    Returns
+    -------
+    Bunch
+        num_records, num_unique, num_removed
+    """
+
+    from BI.FASTA.FASTA import FASTA
+    from BI.FASTA.Writer import FastaWriter
+
+    paths = list(paths)
+    index, counts = _build_index(paths, ignore_case, both_strands, max_records, tmp_dir)
+    keep = [np.ones(count, dtype=bool) for count in counts]
+    num_unique = 0
+    try:
+        for _, entries in index.groups():
+            num_unique += 1
+            for file_idx, record_idx, _ in entries[1:]:
+                keep[file_idx][record_idx] = False
+    finally:
+        index.close()
+
+    with FastaWriter(output, index=False) as writer:
+        for file_idx, path in enumerate(paths):
+            with FASTA(path)._open_binary() as handle:
+                for record_idx, (title, desc, seq) in enumerate(parse_blocks(handle)):
+                    if keep[file_idx][record_idx]:
+                        writer.write(title.decode(), seq.decode(), desc.decode())
+
+    ## .fai could not have duplicate names, which is found while building it
+    result = FASTA(output)
+    try:
+        if result._compressed != 'gzip':
+            result.build_index()
+    except ValueError as error:
+        print(f'[WARNING] {error} in {output}, index is not written.')
+        for index_path in (result.fai_path, result.gzi_path):
+            if os.path.exists(index_path):
+                os.remove(index_path)
+
+    return Bunch(num_records=sum(counts),
+                 num_unique=num_unique,
+                 num_removed=sum(counts) - num_unique)
+
+
+def _test():
+    import doctest
+    doctest.testmod()
+    return
+
+
+if __name__ == "__main__":
+    _test()
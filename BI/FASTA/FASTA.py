@@ -1,14 +1,36 @@
 import os, sys
+import io
 import re
 import json
+import gzip
+import mmap
 
-from typing import Dict, TextIO, Tuple, Type, Generator
+from typing import BinaryIO, Dict, Iterable, List, TextIO, Tuple, Type, Generator
 
 from BI.File import File
 from BI.FASTA.Seq import Seq
+from BI.FASTA.Index import FastaIndex
+from BI.FASTA.LazySeq import MappedSeq, BytesSeq
+from BI.FASTA.Parser import parse_blocks
+from BI.FASTA.Stats import fasta_stats
+from BI.FASTA.Kmer import KmerCounts, count_fasta_kmers
+from BI.FASTA.Motif import MotifHit, MotifSearcher
+from BI.FASTA.Writer import FastaWriter
+from BI.FASTA.Validate import SanityReport, validate_seq, validate_handle
+from BI.FASTA.RecordIndex import RecordIndex
+from BI.FASTA.SeqPack import SeqPackWriter, SeqPack
+from BI.FASTA.Rename import TitleMapping, rename_headers
+from BI.FASTA.Regions import Region, read_bed, extract_regions
+from BI.FASTA.Dedup import find_duplicates, dedup_fasta
+from BI.FASTA.Track import write_tracks
+from BI.FASTA.Shard import Shard, plan_shards, write_shards, read_shard
+from BI.FASTA.Orf import OrfRecord, scan_orfs
+from BI.utils._bunch import Bunch
 from BI.FASTA.Constant import *
+from BI.utils._bgzf import is_gzip, is_bgzf, build_gzi, load_gzi, write_gzi, BgzfReader, BgzfWriter
+from BI.utils._prefetch import PrefetchReader
 
-__all__ = ('SeqRecord', 'FASTA')
+__all__ = ('SeqRecord', 'SeqWindow', 'FASTA')
 
 class SeqRecord:
     def __init__(
@@ -48,6 +70,37 @@ class SeqRecord:
         res_str += f'{self.seq}'
         return res_str
 
+class SeqWindow(SeqRecord):
+    def __init__(
+        self,
+        seq : Seq,
+        contig : str,
+        start : int,
+        end : int
+        ) -> None:
+        
+        """SeqWindow class for recording window of contig (FASTA.iter_chunks).
+        Title of window is samtools-style region ('contig:start-end', 1-based).
+
+        Parameters
+        ----------
+        seq : Seq
+            Sequence of window
+        contig : str
+            Name of contig containing window
+        start : int
+            0-based start position of window
+        end : int
+            0-based exclusive end position of window
+        """
+        
+        super().__init__(seq, f'{contig}:{start+1}-{end}', '')
+        self.contig = contig
+        self.start = start
+        self.end = end
+        
+        return
+
 class FASTA(File):
     """Class supports functions that process FASTA format file
     
@@ -65,6 +118,17 @@ class FASTA(File):
     CCCCCCCC
     <BLANKLINE>
     >>> fasta.close()
+    >>> fasta.fetch('chr1', 6, 12)
+    Seq(GTACGT)
+    >>> for record in fasta.reader(mmap=True):
+    ...     print(record.title, len(record.seq), record.seq[6:12])
+    chr1 32 GTACGT
+    >>> for record in fasta.reader(block=True):
+    ...     print(record.title, record.description, record.seq)
+    chr1 test chromosome 1 ACGTACGTACGTAAAAAAAAAAAACCCCCCCC
+    >>> bgzf = FASTA.FASTA('./data/small.fa.gz')
+    >>> bgzf.fetch('chr1', 6, 12)
+    Seq(GTACGT)
     """
     
     def __init__(self, path: str) -> None:
@@ -77,7 +141,14 @@ class FASTA(File):
         """
         
         self.path = os.path.abspath(path)
+        self.fai_path = f'{self.path}.fai'
+        self.gzi_path = f'{self.path}.gzi'
+        self._compressed = self._chk_compressed()
         self.open_obj = False
+        self.fai = None
+        self.gzi = None
+        self._fetch_obj = False
+        self.prefetch_stats = None
         
         return
     
@@ -85,12 +156,33 @@ class FASTA(File):
         if self.open_obj:
             print('close File')
             self.close()
+        if self._fetch_obj:
+            self._fetch_obj.close()
+    
+    def _chk_compressed(self) -> str or bool:
+        """Check whether self.path is compressed. Existing file is checked
+        by magic number, new file by extension (.gz, .bgz).
+
+        Returns
+        -------
+        str or bool
+            'bgzf' or 'gzip' if compressed, else False
+        """
+        
+        if os.path.isfile(self.path):
+            if not is_gzip(self.path):
+                return False
+            return 'bgzf' if is_bgzf(self.path) else 'gzip'
+        if self.path.endswith(('.gz', '.bgz')):
+            return 'gzip'
+        return False
     
     def open(self,
         mode : str = "r"
         ) -> None:
         
-        """Open fasta file (self.path) to self.open_obj
+        """Open fasta file (self.path) to self.open_obj.
+        gzip/BGZF compressed fasta is opened transparently.
 
         Parameters
         ----------
@@ -102,10 +194,20 @@ class FASTA(File):
             print('Current open_obj is already opened.')
         else:
             self.open_mode = mode
-            self.open_obj = open(self.path, mode)
+            if self._compressed:
+                self.open_obj = gzip.open(self.path, mode if 'b' in mode else f'{mode}t')
+            else:
+                self.open_obj = open(self.path, mode)
         
         return
     
+    def _open_binary(self) -> io.BufferedReader or gzip.GzipFile:
+        """Open self.path by binary read mode, decompressing if compressed"""
+        
+        if self._compressed:
+            return gzip.open(self.path, 'rb')
+        return open(self.path, 'rb')
+    
     def close(self) -> None:
         """Close self.open_obj attribute"""
         self.open_obj.close()
@@ -115,8 +217,36 @@ class FASTA(File):
     def readline(self):
         ...
         
-    def reader(self) -> Generator[SeqRecord, None, None]:
-        """Generator function parsing fasta format contents
+    def reader(self,
+        mmap : bool = False,
+        block : bool = False,
+        block_size : int = 1 << 20,
+        prefetch : bool = False,
+        queue_depth : int = 4
+        ) -> Generator[SeqRecord, None, None]:
+        
+        """Generator function parsing fasta format contents.
+        With 'prefetch', blocks are read (and decompressed) ahead by background
+        thread (PrefetchReader), and its counters are saved to self.prefetch_stats.
+
+        Parameters
+        ----------
+        mmap : bool, optional
+            Memory-map self.path and yield SeqRecord whose seq is
+            MappedSeq (lazy view over mapped file), by default False.
+            It does not need self.open_obj. Every call maps the file again
+            (with its current .fai), and the mapping is released when
+            its records are no longer referenced.
+        block : bool, optional
+            Parse self.path by large binary blocks (parse_blocks) and yield
+            SeqRecord whose seq is BytesSeq (newlines removed, decoded lazily),
+            by default False. It does not need self.open_obj.
+        block_size : int, optional
+            Bytes read at once in block or prefetch mode, by default 1 MB
+        prefetch : bool, optional
+            Read blocks by background thread (block and line mode), by default False
+        queue_depth : int, optional
+            Maximum number of prefetched blocks, by default 4
 
         Yields
         ------
@@ -124,12 +254,42 @@ class FASTA(File):
             SeqRecord instance with contig name, description, sequence
         """
         
+        if mmap:
+            yield from self._mmap_reader()
+            return
+        
+        if block:
+            with self._open_binary() as handle:
+                source = PrefetchReader(handle, block_size, queue_depth) if prefetch else handle
+                try:
+                    for title, desc, seq in parse_blocks(source, block_size):
+                        yield SeqRecord(BytesSeq(seq), title.decode(), desc.decode())
+                finally:
+                    if prefetch:
+                        source.close()
+                        self.prefetch_stats = source.stats
+            return
+        
         if not self.open_obj:
             print(f'[ERROR] {self.path} is not opened.')
             return
+        
+        if prefetch:
+            lines = PrefetchReader(self.open_obj, block_size, queue_depth)
+            try:
+                yield from self._parse_lines(lines)
+            finally:
+                lines.close()
+                self.prefetch_stats = lines.stats
+            return
+        
+        yield from self._parse_lines(self.open_obj)
     
+    def _parse_lines(self, lines: Iterable[str]) -> Generator[SeqRecord, None, None]:
+        """Parse fasta lines to SeqRecord (line mode of reader())"""
+        
         sequences = []
-        for line in self.open_obj:
+        for line in lines:
             if line.startswith('>'):
                 if len(sequences) != 0:
                     yield SeqRecord(''.join(sequences), title, desc)
@@ -142,6 +302,449 @@ class FASTA(File):
                 sequences.append(line)
         yield SeqRecord(''.join(sequences), title, desc)
     
+    def _mmap_reader(self) -> Generator[SeqRecord, None, None]:
+        """Generator function yielding SeqRecord with MappedSeq by .fai index"""
+        
+        if self._compressed:
+            raise ValueError(f'{self.path} is compressed, mmap needs uncompressed fasta')
+        
+        fai = self.load_index()
+        ## mapped per call, MappedSeq records keep the mapping alive
+        with open(self.path, 'rb') as handle:
+            buffer = mmap.mmap(handle.fileno(), 0, access=mmap.ACCESS_READ)
+        
+        for record in fai:
+            ## header line is the line just before the first base
+            header_start = buffer.rfind(b'\n', 0, record.offset - 1) + 1
+            header = buffer[header_start:record.offset].decode().strip()[1:].split(None, 1)
+            desc = header[1] if len(header) > 1 else ''
+            yield SeqRecord(MappedSeq(buffer, record), record.name, desc)
+    
+    def iter_chunks(self,
+        window : int,
+        step : int = None,
+        partial : bool = False
+        ) -> Generator[SeqWindow, None, None]:
+        
+        """Generator function yielding fixed-size windows of every contig
+        by one streaming pass over self.path. Only 'window' bases (plus one line)
+        are buffered, whole contig is never loaded in memory.
+        
+        Example
+        -------
+        >>> fasta = FASTA('./data/small.fa')
+        >>> for chunk in fasta.iter_chunks(12, 10):
+        ...     print(chunk.title, chunk.start, chunk.end, chunk.seq)
+        chr1:1-12 0 12 ACGTACGTACGT
+        chr1:11-22 10 22 GTAAAAAAAAAA
+        chr1:21-32 20 32 AAAACCCCCCCC
+        
+        Parameters
+        ----------
+        window : int
+            Length of window
+        step : int, optional
+            Distance between starts of windows, by default None (= window)
+        partial : bool, optional
+            Yield last window shorter than 'window' at the end of contig, by default False
+
+        Yields
+        ------
+        SeqWindow
+            SeqWindow instance with contig name, coordinates, sequence
+        """
+        
+        step = window if step is None else step
+        if window <= 0 or step <= 0:
+            raise ValueError('window and step must be positive')
+        
+        contig = None
+        with self._open_binary() as handle:
+            for line in handle:
+                if line.startswith(b'>'):
+                    if contig is not None and partial and next_start < buf_start + len(buf):
+                        yield SeqWindow(Seq(buf[next_start-buf_start:].decode()),
+                                        contig, next_start, buf_start + len(buf))
+                    contig = line[1:].split(None, 1)[0].decode()
+                    buf = bytearray()
+                    buf_start = next_start = 0
+                    continue
+                if contig is None:
+                    continue
+                
+                buf += line.rstrip(b'\r\n')
+                while next_start + window <= buf_start + len(buf):
+                    i = next_start - buf_start
+                    yield SeqWindow(Seq(buf[i:i+window].decode()),
+                                    contig, next_start, next_start + window)
+                    next_start += step
+                ## drop bases no more window needs
+                drop = min(next_start - buf_start, len(buf))
+                if drop > 0:
+                    del buf[:drop]
+                    buf_start += drop
+            
+            if contig is not None and partial and next_start < buf_start + len(buf):
+                yield SeqWindow(Seq(buf[next_start-buf_start:].decode()),
+                                contig, next_start, buf_start + len(buf))
+        
+        return
+    
+    def build_index(self, write: bool = True) -> FastaIndex:
+        """Build samtools-compatible .fai index by scanning self.path once.
+        For BGZF compressed fasta, .gzi block index is also built.
+
+        Parameters
+        ----------
+        write : bool, optional
+            Write index to self.fai_path, by default True
+
+        Returns
+        -------
+        FastaIndex
+            FastaIndex instance of self.path
+        """
+        
+        with self._open_binary() as handle:
+            self.fai = FastaIndex.build(handle)
+        if self._compressed == 'bgzf':
+            self.gzi = build_gzi(self.path)
+        
+        if write:
+            try:
+                self.fai.write(self.fai_path)
+                if self.gzi is not None:
+                    write_gzi(self.gzi_path, self.gzi)
+            except OSError:
+                print(f'[WARNING] Fail to write {self.fai_path}, index is kept in memory.')
+        
+        return self.fai
+    
+    def load_index(self, rebuild: bool = False) -> FastaIndex:
+        """Load .fai index (and .gzi for BGZF) of self.path. If index file
+        does not exist or is older than self.path, build and write index first.
+
+        Parameters
+        ----------
+        rebuild : bool, optional
+            Build index even if .fai file is available, by default False
+
+        Returns
+        -------
+        FastaIndex
+            FastaIndex instance of self.path
+        """
+        
+        if self.fai is not None and not rebuild:
+            return self.fai
+        
+        if not rebuild and self._is_fresh(self.fai_path) \
+            and (self._compressed != 'bgzf' or self._is_fresh(self.gzi_path)):
+            self.fai = FastaIndex.load(self.fai_path)
+            if self._compressed == 'bgzf':
+                self.gzi = load_gzi(self.gzi_path)
+        else:
+            self.build_index()
+        
+        return self.fai
+    
+    def fetch(self,
+        contig : str,
+        start : int = None,
+        end : int = None
+        ) -> Seq:
+        
+        """Fetch region of contig by seeking directly with .fai index.
+        Region is 0-based half-open [start, end) like python slicing.
+
+        Parameters
+        ----------
+        contig : str
+            Name of sequence
+        start : int, optional
+            0-based start position, by default None (start of contig)
+        end : int, optional
+            0-based exclusive end position, by default None (end of contig)
+
+        Returns
+        -------
+        Seq
+            Seq object containing sequence of region
+
+        Raises
+        ------
+        KeyError
+            Error occurs when contig is not in index
+        ValueError
+            Error occurs when region is invalid or self.path is
+            gzip (not BGZF) compressed
+        """
+        
+        record = self.load_index()[contig]
+        start = 0 if start is None else start
+        end = record.length if end is None else min(end, record.length)
+        if start < 0 or start > end:
+            raise ValueError(f'Invalid region {contig}:{start}-{end}')
+        
+        raw = self._read_range(record.byte_offset(start), record.byte_offset(end))
+        
+        return Seq(raw.replace(b'\n', b'').replace(b'\r', b'').decode())
+    
+    def extract_regions(self,
+        regions : str or Iterable[Region or Tuple],
+        output : str = None,
+        max_gap : int = 4096,
+        threads : int = 1
+        ) -> Generator[SeqRecord, None, None] or None:
+        
+        """Extract many regions (BED file or iterable) by reads sorted by file
+        offset, nearby regions are read at once and '-' strand regions are
+        reverse complemented. Records come in file order (see extract_regions()).
+        
+        Example
+        -------
+        >>> fasta = FASTA('./data/small.fa.gz')
+        >>> for record in fasta.extract_regions([('chr1', 6, 12), ('chr1', 0, 4, 'first', '-')]):
+        ...     print(record.title, record.seq)
+        first ACGT
+        chr1:7-12 GTACGT
+
+        Parameters
+        ----------
+        regions : str or Iterable[Region or Tuple]
+            Path of BED file, or regions or tuples (contig, start, end[, name[, strand]])
+        output : str, optional
+            Write records to fasta 'output' (FastaWriter) instead of
+            yielding them, by default None
+        max_gap : int, optional
+            Maximum bytes between regions read at once, by default 4096
+        threads : int, optional
+            The number of reading threads, by default 1
+
+        Returns
+        -------
+        Generator[SeqRecord, None, None] or None
+            Generator of SeqRecord (None when 'output' is given)
+        """
+        
+        if isinstance(regions, str):
+            regions = read_bed(regions)
+        records = extract_regions(self, regions, max_gap, threads)
+        if output is None:
+            return records
+        
+        with FastaWriter(output) as writer:
+            writer.write_records(records)
+        return
+
+    def shard(self,
+        n : int,
+        output : str = None,
+        descriptor : str = None,
+        block_size : int = 1 << 22
+        ) -> List[Shard]:
+
+        """Partition records into 'n' shards of roughly equal total sequence
+        length (not record count) by .fai index (see plan_shards()).
+        Each shard is a descriptor of byte ranges, and shards could be
+        written to fasta files and/or json descriptor for scatter jobs.
+
+        Example
+        -------
+        >>> FASTA('./data/small.fa').shard(2)
+        [Shard(0, 1 records, 32 bases, [(0, 60)]), Shard(1, 0 records, 0 bases, [])]
+
+        Parameters
+        ----------
+        n : int
+            The number of shards
+        output : str, optional
+            Path of shard fasta files with '{}' replaced by shard index
+            (e.g. 'part{}.fa', BGZF if it ends with '.gz'), by default None (not written)
+        descriptor : str, optional
+            Path of json file recording self.path and shards (load_shards()),
+            by default None (not written)
+        block_size : int, optional
+            Bytes copied at once when writing shard files, by default 4 MB
+
+        Returns
+        -------
+        List[Shard]
+            Shards in order of index
+        """
+
+        shards = plan_shards(list(self.load_index()), n)
+
+        if output is not None:
+            write_shards(self, shards, output, block_size)
+        if descriptor is not None:
+            with open(descriptor, 'w') as handle:
+                json.dump({'path': self.path, 'shards': [shard.to_dict() for shard in shards]}, handle)
+
+        return shards
+
+    def read_shard(self, shard: Shard) -> Generator[SeqRecord, None, None]:
+        """Generator function yielding records of shard by reading its byte
+        ranges only (plain or BGZF fasta). SeqRecord is same as reader(block=True).
+
+        Parameters
+        ----------
+        shard : Shard
+            Shard of self.path (shard() or load_shards())
+
+        Yields
+        ------
+        SeqRecord
+            SeqRecord whose seq is BytesSeq
+        """
+
+        for title, desc, seq in read_shard(self, shard):
+            yield SeqRecord(BytesSeq(seq), title.decode(), desc.decode())
+
+    def _is_fresh(self, index_path: str) -> bool:
+        """Whether index file exists and is not older than self.path"""
+        
+        return os.path.isfile(index_path) \
+            and os.path.getmtime(index_path) >= os.path.getmtime(self.path)
+    
+    def _read_range(self, begin: int, end: int) -> bytes:
+        """Read raw bytes [begin, end) of (uncompressed) self.path.
+        For BGZF, only blocks overlapping range are inflated.
+        """
+        
+        if self._compressed == 'gzip':
+            raise ValueError(f'{self.path} is gzip compressed, random access needs BGZF (bgzip)')
+        
+        if not self._fetch_obj:
+            if self._compressed == 'bgzf':
+                self.load_index()
+                self._fetch_obj = BgzfReader(self.path, self.gzi)
+            else:
+                self._fetch_obj = open(self.path, 'rb')
+        
+        if self._compressed == 'bgzf':
+            return self._fetch_obj.read_range(begin, end)
+        self._fetch_obj.seek(begin)
+        return self._fetch_obj.read(end - begin)
+    
+    def stats(self,
+        processes : int = 1,
+        chunk_size : int = 10_000_000
+        ) -> Bunch:
+        
+        """Calculate length, GC ratio, N count, soft-masked ratio and IUPAC
+        ambiguity counts of every record, and N50/L50 of all records
+        (like seqkit stats). Work is split by contig ranges over process pool.
+        
+        Example
+        -------
+        >>> fasta = FASTA('./data/small.fa')
+        >>> summary = fasta.stats()
+        >>> summary.num_seqs, summary.sum_len, summary.N50
+        (1, 32, 32)
+        >>> record = summary.records[0]
+        >>> record.title, record.gc_ratio, record.n_count
+        ('chr1', 0.4375, 0)
+
+        Parameters
+        ----------
+        processes : int, optional
+            The number of processes, by default 1
+        chunk_size : int, optional
+            The number of bases per task, by default 10,000,000
+
+        Returns
+        -------
+        Bunch
+            records (Bunch of each record), num_seqs, sum_len, min_len,
+            avg_len, max_len, N50, L50, gc_ratio, n_count
+        """
+        
+        return fasta_stats(self, processes, chunk_size)
+    
+    def tracks(self,
+        window : int = 100,
+        step : int = None,
+        gc_path : str = None,
+        n_path : str = None,
+        mask_path : str = None,
+        processes : int = 1,
+        chunk_size : int = 10_000_000
+        ) -> None:
+        
+        """Write sliding-window GC fraction (bedGraph), N runs (BED) and
+        soft-masked runs (BED) of every contig. Window values come from
+        cumulative sums (O(1) per window), chunks of contigs run in process pool.
+        
+        Example
+        -------
+        >>> import os, tempfile
+        >>> gc_path = os.path.join(tempfile.mkdtemp(), 'gc.bedGraph')
+        >>> FASTA('./data/small.fa').tracks(window=8, gc_path=gc_path)
+        >>> for line in open(gc_path):
+        ...     print(line.split())
+        ['chr1', '0', '8', '0.5000']
+        ['chr1', '8', '16', '0.2500']
+        ['chr1', '16', '24', '0.0000']
+        ['chr1', '24', '32', '1.0000']
+
+        Parameters
+        ----------
+        window : int, optional
+            Window size, by default 100
+        step : int, optional
+            Distance between window starts, by default None (= window)
+        gc_path : str, optional
+            Path of GC bedGraph, by default None (not written)
+        n_path : str, optional
+            Path of N runs BED, by default None (not written)
+        mask_path : str, optional
+            Path of soft-masked runs BED, by default None (not written)
+        processes : int, optional
+            The number of processes, by default 1
+        chunk_size : int, optional
+            The number of bases per task, by default 10,000,000
+        """
+        
+        write_tracks(self, window, step, gc_path, n_path, mask_path, processes, chunk_size)
+        return
+    
+    def count_kmers(self,
+        k : int,
+        canonical : bool = True,
+        processes : int = 1,
+        chunk_size : int = 1 << 24
+        ) -> KmerCounts:
+        
+        """Count k-mers (k <= 31) of every record with 2-bit encoded numpy arrays.
+        Ranges of records are counted over process pool and merged.
+        
+        Example
+        -------
+        >>> fasta = FASTA('./data/small.fa')
+        >>> table = fasta.count_kmers(4)
+        >>> table['AAAA'], table['TTTT'], table['ACGT']
+        (9, 9, 3)
+
+        Parameters
+        ----------
+        k : int
+            Length of k-mer (1 ~ 31)
+        canonical : bool, optional
+            Count canonical k-mers, by default True
+        processes : int, optional
+            The number of processes, by default 1
+        chunk_size : int, optional
+            The number of bases per task, by default 16,777,216
+
+        Returns
+        -------
+        KmerCounts
+            Sorted k-mer count table which could be saved and reloaded
+        """
+        
+        return count_fasta_kmers(self, k, canonical, processes, chunk_size)
+    
     def write(self,
         title : str,
         sequence : str,
@@ -167,11 +770,51 @@ class FASTA(File):
             fasta_title = f'>{title}'
             if desc:
                 fasta_title += f' {desc}'
-            self.open_obj.write(f'{fasta_title}\n')
-            self.open_obj.write(sequence)
+            sequence = str(sequence)
+            if sequence and sequence[-1] != '\n':
+                sequence += '\n'
+            self.open_obj.write(f'{fasta_title}\n{sequence}')
 
         return
     
+    def write_records(self,
+        records : Iterable[SeqRecord],
+        width : int = 60,
+        compression : str or bool = None,
+        index : bool = True,
+        buffer_size : int = 1 << 22
+        ) -> None:
+        
+        """Write records to self.path as line-wrapped fasta with large write buffers.
+        Output could be gzip/BGZF compressed on background thread, and .fai
+        (and .gzi for BGZF) index is built while writing (FastaWriter).
+
+        Parameters
+        ----------
+        records : Iterable[SeqRecord]
+            Records to write
+        width : int, optional
+            The number of bases per line (0 = no wrapping), by default 60
+        compression : str or bool, optional
+            'bgzf', 'gzip' or False, by default None (.gz/.bgz extension -> 'bgzf')
+        index : bool, optional
+            Write index of self.path, by default True
+        buffer_size : int, optional
+            Bytes of buffer written at once, by default 4 MB
+        """
+        
+        with FastaWriter(self.path, width, compression, index, buffer_size) as writer:
+            writer.write_records(records)
+        
+        ## file is replaced, reload on next access
+        self._compressed = self._chk_compressed()
+        self.fai = self.gzi = None
+        if self._fetch_obj:
+            self._fetch_obj.close()
+            self._fetch_obj = False
+        
+        return
+    
     def export_to_json(self,
         output_name : str,
         seq_dict : dict = False
@@ -179,6 +822,8 @@ class FASTA(File):
         
         """Export fasta contents to json format file.
         If 'seq_dict' param is False, then export with self.path fasta info.
+        Every sequence is held in memory, so json is only for small sets,
+        use export_to_pack() for large fasta.
 
         Parameters
         ----------
@@ -229,29 +874,91 @@ class FASTA(File):
             
         return result_dict
     
-    # def iterate(self, handle : Type["SeqRecord"]) -> Type["SeqRecord"]:
-    def iterate(self, handle: TextIO) -> Generator[Type['SeqRecord'], None, None]:
-        """Generate function yield SeqRecord object from TextIO
+    def export_to_pack(self,
+        output_name : str,
+        packed : bool = False
+        ) -> None:
+        
+        """Export fasta contents to SeqPack binary container by one streaming
+        pass (block parser), sequences are never held in memory together.
+        
+        Example
+        -------
+        >>> import os, tempfile
+        >>> output = os.path.join(tempfile.mkdtemp(), 'small.bisp')
+        >>> FASTA('./data/small.fa.gz').export_to_pack(output, packed=True)
+        >>> with FASTA('./data/small.fa').import_from_pack(output) as pack:
+        ...     pack['chr1'].description, pack.fetch('chr1', 6, 12)
+        ('test chromosome 1', Seq(GTACGT))
 
         Parameters
         ----------
-        handle : TextIO
-            TextIO of fasta file
+        output_name : str
+            Output file name
+        packed : bool, optional
+            Pack sequences by 2 bits per base, by default False
+            (non-ACGT IUPAC codes are stored as 'N')
+        """
+        
+        with SeqPackWriter(output_name, packed) as writer:
+            writer.write_records(self.reader(block=True))
+        return
+    
+    def import_from_pack(self, pack_file: str = False) -> SeqPack:
+        """Open SeqPack binary container by mmap
 
+        Parameters
+        ----------
+        pack_file : str, optional
+            Path of SeqPack file, by default False (self.path)
+
+        Returns
+        -------
+        SeqPack
+            Read-only dict {title: SeqRecord} with lazy sequences
+        """
+        
+        if not pack_file: pack_file = self.path
+        return SeqPack(pack_file)
+    
+    def iterate(self, handle: TextIO or BinaryIO) -> Generator[Type['SeqRecord'], None, None]:
+        """Generate function yield SeqRecord object from fasta handle.
+        Records are parsed by block parser (parse_blocks) and checked by validate_seq.
+
+        Parameters
+        ----------
+        handle : TextIO or BinaryIO
+            Handle of fasta file (text handle is read through its binary buffer)
 
         Yields
         ------
         SeqRecord
             SeqRecord object containing sequence, title, description
+
+        Raises
+        ------
+        ValueError
+            Error occurs when sequence has invalid character
         """
-        for title, description, seq in self.readline(handle):
-            check_out = self.sanity_check((title, description, seq), mode="r")
-            if not check_out:
-                sys.exit(f'\n==// WARNING //==\n- {title} seqeunce sanity check is failure...\n')
-            yield SeqRecord(seq=Seq(seq), title=title, description=description)
+        
+        ## keep text handle referenced, its buffer is closed with it
+        binary = getattr(handle, 'buffer', handle)
+        for title, description, seq in parse_blocks(binary):
+            title = title.decode()
+            report = validate_seq(title, seq)
+            if not report.valid:
+                raise ValueError(f'{title} sequence sanity check is failure, {report}')
+            yield SeqRecord(seq=Seq(seq.decode()), title=title, description=description.decode())
 
     def parse(self, handle: TextIO) -> Generator[Type['SeqRecord'], None, None]:
         """Start parsing fasta file
+        
+        Example
+        -------
+        >>> fasta = FASTA('./data/small.fa')
+        >>> with open(fasta.path) as handle:
+        ...     fasta.to_dict(handle)['chr1'].seq
+        Seq(ACGTACGTACGTAAAAAAAAAAAACCCCCCCC)
 
         Parameters
         ----------
@@ -267,7 +974,8 @@ class FASTA(File):
         return record
 
     def to_dict(self, handle: TextIO) -> Dict[str, Type['SeqRecord']]:
-        """Make dict with {title: SeqRecord object} <- FIXME why make it?
+        """Make dict with {title: SeqRecord object}.
+        Every record is loaded in memory, use FASTA.index() for large fasta.
 
         Parameters
         ----------
@@ -294,20 +1002,71 @@ class FASTA(File):
                 record_dict[data_id] = record
         return record_dict
 
+    def index(self,
+        db : str = None,
+        cache_size : int = 1024,
+        block_size : int = 1 << 20
+        ) -> RecordIndex:
+        
+        """Make read-only dict {title: SeqRecord} parsing record on access.
+        Only title -> (byte offset, byte length) is kept in memory (or in
+        SQLite sidecar 'db'), recently accessed records are cached (LRU).
+        
+        Example
+        -------
+        >>> fasta = FASTA('./data/small.fa.gz')
+        >>> records = fasta.index()
+        >>> records['chr1'].description
+        'test chromosome 1'
+
+        Parameters
+        ----------
+        db : str, optional
+            Path of SQLite sidecar, by default None (index in memory)
+        cache_size : int, optional
+            Maximum number of parsed records in cache, by default 1024
+        block_size : int, optional
+            Bytes read at once while building index, by default 1 MB
+
+        Returns
+        -------
+        RecordIndex
+            Mapping of title to SeqRecord
+
+        Raises
+        ------
+        ValueError
+            Error occurs when duplicate title is in fasta file
+        """
+        
+        return RecordIndex(self, db, cache_size, block_size)
+
     def sanity_check(self,
         target_seq : Tuple[str],
-        mode : str,
+        mode : str = 'r',
         verbose : bool = False
         ) -> bool:
        
         """Check whether input sequence info ('target_seq') is normal format.
+        Sequence is checked by one bytes.translate() pass (validate_seq),
+        positions of invalid characters are reported in verbose mode.
+        
+        Example
+        -------
+        >>> fasta = FASTA('./data/small.fa')
+        >>> fasta.sanity_check(('seq1', '', 'ACGTN\\nacgt'))
+        True
+        >>> fasta.sanity_check(('seq2', '', 'ACG.T'), verbose=True)
+        Start the sanity check for seq2
+        Please enter a valid seq : SanityReport(seq2, 1 invalid, [('.', 4)])
+        False
 
         Parameters
         ----------
         target_seq : Tuple[str]
             Sequence info (title, desc, seq)
         mode : str
-            Check mode
+            Check mode, by default 'r'
         verbose : bool
             Print process message
             (True = Print check message,
@@ -319,29 +1078,189 @@ class FASTA(File):
             Whether target_seq parameter is normal foramt
         """
 
-        if verbose: print(f'file format is fasta. \nStart the sanity check for {target_seq[0]}')
+        if verbose: print(f'Start the sanity check for {target_seq[0]}')
     
         if mode == "r":
-            check_base = [base in BASE_IUPAC for base in target_seq[2].strip()]
-            check_bool: bool = all(check_base)
-            true_list = list((filter(lambda x: x, check_base)))
-            if check_bool == False:
-                misbase_list = [ (target_seq[2][i],i+1) for i, b in enumerate(check_base) if b == False]
-                if verbose: print(f'Please enter a valid seq : \n(misbase,seq position. : {misbase_list} \n')
-            if check_bool == False:
-                if verbose: print("Check the seq")
+            report = validate_seq(target_seq[0], target_seq[2])
+            if not report.valid:
+                if verbose: print(f'Please enter a valid seq : {report}')
                 return False
-            else:
-                if verbose: print("Seq is normal.")
-                return True
+            return True
 
-    def find_seq(self, seq: str) -> None:
-        fasta_obj = open(self.path,"r")
-        p = re.compile(seq)
-        for fasta in self.readline(fasta_obj):
-            matched_iter = p.finditer((fasta[2]))
-            for target in matched_iter:
-                print(f'find seq in {fasta[0]} ==> start : {target.start()+1}, end : {target.end()+1}')
+    def validate(self,
+        processes : int = 1,
+        block_size : int = 1 << 20
+        ) -> List[SanityReport]:
+        
+        """Check every record of self.path (plain or compressed) by one pass
+        and report positions of every invalid character.
+        
+        Example
+        -------
+        >>> fasta = FASTA('./data/small.fa')
+        >>> fasta.validate()
+        []
+
+        Parameters
+        ----------
+        processes : int, optional
+            The number of processes validating records, by default 1
+        block_size : int, optional
+            Bytes read at once, by default 1 MB
+
+        Returns
+        -------
+        List[SanityReport]
+            Reports of records having invalid characters (empty if all valid)
+        """
+        
+        with self._open_binary() as handle:
+            return validate_handle(handle, processes, block_size)
+
+    def find_seq(self,
+        patterns : str or List[str],
+        both_strands : bool = True
+        ) -> Generator[MotifHit, None, None]:
+        
+        """Search patterns in every record by one streaming pass over self.path.
+        Thousands of patterns are searched at once (Aho-Corasick automaton),
+        IUPAC codes of patterns are expanded and both strands are scanned.
+        
+        Example
+        -------
+        >>> fasta = FASTA('./data/small.fa')
+        >>> for hit in fasta.find_seq(['CGTA', 'GGGG']):
+        ...     print(hit)
+        MotifHit(chr1, 1, 5, +, CGTA)
+        MotifHit(chr1, 3, 7, -, CGTA)
+        MotifHit(chr1, 5, 9, +, CGTA)
+        MotifHit(chr1, 7, 11, -, CGTA)
+        MotifHit(chr1, 9, 13, +, CGTA)
+        MotifHit(chr1, 24, 28, -, GGGG)
+        MotifHit(chr1, 25, 29, -, GGGG)
+        MotifHit(chr1, 26, 30, -, GGGG)
+        MotifHit(chr1, 27, 31, -, GGGG)
+        MotifHit(chr1, 28, 32, -, GGGG)
+
+        Parameters
+        ----------
+        patterns : str or List[str]
+            Pattern or patterns (could contain IUPAC codes)
+        both_strands : bool, optional
+            Search reverse complement of patterns too, by default True
+
+        Yields
+        ------
+        MotifHit
+            Hit with contig, start, end (0-based, half-open), strand, pattern
+        """
+        
+        if isinstance(patterns, str):
+            patterns = [patterns]
+        searcher = MotifSearcher(patterns, both_strands)
+        
+        with self._open_binary() as handle:
+            yield from searcher.scan_handle(handle)
+
+    def find_orfs(self,
+        min_len : int = 75,
+        table : int = 1,
+        require_start : bool = True,
+        partial : bool = False,
+        processes : int = 1,
+        batch_size : int = 1 << 24
+        ) -> Generator[OrfRecord, None, None]:
+        
+        """Find every ORF of six frames of every record. Records are streamed
+        by block parser and batches of records are searched by vectorized codon
+        lookup in process pool (see scan_orfs()).
+        
+        Example
+        -------
+        >>> for orf in FASTA('./data/small.fa').find_orfs(min_len=6, require_start=False):
+        ...     print(orf.title, orf.frame, orf.protein)
+        chr1:3-14(+) 3 VRT
+
+        Parameters
+        ----------
+        min_len : int, optional
+            Minimum length of ORF (nucleotides, stop codon excluded), by default 75
+        table : int, optional
+            NCBI genetic code id (1, 2, 3, 4, 5, 6, 11), by default 1 (Standard)
+        require_start : bool, optional
+            ORF should begin with start codon of genetic code, by default True
+        partial : bool, optional
+            Report ORF reaching the end of record without stop codon, by default False
+        processes : int, optional
+            The number of processes, by default 1
+        batch_size : int, optional
+            The number of bases per task, by default 16 M
+
+        Yields
+        ------
+        OrfRecord
+            ORF with contig, start, end (0-based, half-open, stop codon included),
+            strand, frame and protein
+        """
+        
+        return scan_orfs(self, min_len, table, require_start, partial,
+                         processes, batch_size)
+
+    def dedup(self,
+        output : str,
+        others : Iterable[str] = (),
+        ignore_case : bool = True,
+        both_strands : bool = False,
+        max_records : int = 1_000_000
+        ) -> Bunch:
+        
+        """Write the first record of every distinct sequence of self.path
+        (and 'others' fasta files) to 'output'. Sequences are compared by
+        blake2b digest grouped in bounded memory (see dedup_fasta()).
+        
+        Example
+        -------
+        >>> import os, tempfile
+        >>> output = os.path.join(tempfile.mkdtemp(), 'uniq.fa')
+        >>> summary = FASTA('./data/small.fa').dedup(output, others=['./data/small.fa.gz'])
+        >>> summary.num_records, summary.num_unique
+        (2, 1)
+
+        Parameters
+        ----------
+        output : str
+            Path of deduplicated fasta
+        others : Iterable[str], optional
+            Paths of other fasta files, by default ()
+        ignore_case : bool, optional
+            Soft-masked (lower case) bases are same as upper case, by default True
+        both_strands : bool, optional
+            Sequence is same as its reverse complement, by default False
+        max_records : int, optional
+            Maximum number of digests kept in memory before spilling to disk,
+            by default 1,000,000
+
+        Returns
+        -------
+        Bunch
+            num_records, num_unique, num_removed
+        """
+        
+        return dedup_fasta([self.path, *others], output, ignore_case,
+                           both_strands, max_records)
+
+    def find_duplicates(self,
+        others : Iterable[str] = (),
+        ignore_case : bool = True,
+        both_strands : bool = False,
+        max_records : int = 1_000_000
+        ) -> Generator[List[Tuple[str, str]], None, None]:
+        
+        """Generator function yielding [(path, title)] groups of records having
+        identical sequence in self.path (and 'others' fasta files)"""
+        
+        return find_duplicates([self.path, *others], ignore_case,
+                               both_strands, max_records)
 
     def find_title(self,title:str) -> None:
         fasta_obj = open(self.path,"r")
@@ -351,30 +1270,70 @@ class FASTA(File):
             for target in matched_iter:
                 print(f'find title : {fasta[0]}')
 
-    def rename_title(self, convert_file: str, new_file: str) -> None:
-        """Rename titles from convert_file and write file with new title
+    def rename_title(self,
+        convert_file : str,
+        new_file : str,
+        block_size : int = 1 << 22
+        ) -> None:
+        
+        """Rename titles from convert_file and write file with new title.
+        Only header lines are parsed, sequence bytes are copied untouched
+        by large blocks, and convert_file is streamed (TitleMapping), so
+        renaming is bound by I/O. Output is BGZF compressed if 'new_file'
+        ends with '.gz' or '.bgz'.
         
         convert_file:
         old_title\tnew_title\n
+        
+        Example
+        -------
+        >>> import os, tempfile
+        >>> tmp_dir = tempfile.mkdtemp()
+        >>> convert_file = os.path.join(tmp_dir, 'titles.tsv')
+        >>> _ = open(convert_file, 'w').write('chr1\\tchrom1\\n')
+        >>> FASTA('./data/small.fa').rename_title(convert_file, os.path.join(tmp_dir, 'new.fa'))
+        >>> print(open(os.path.join(tmp_dir, 'new.fa')).readline(), end='')
+        >chrom1 test chromosome 1
+
+        Parameters
+        ----------
+        convert_file : str
+            Tab separated file of old title and new title
+        new_file : str
+            Output fasta file name
+        block_size : int, optional
+            Bytes read at once, by default 4 MB
+
+        Raises
+        ------
+        KeyError
+            Error occurs when title of fasta is not in convert_file
         """
 
-        titles = dict()
-        convert_file = open(convert_file, 'r')
-        for line in convert_file:
-            cols = line.strip().split('\t')
-            titles[cols[0]] = cols[1]
-        convert_file.close()
-        
-        new_fa = FASTA(new_file)
-        new_fa.open(mode='w')
+        if new_file.endswith(('.gz', '.bgz')):
+            output = BgzfWriter(new_file)
+        else:
+            output = open(new_file, 'wb')
         
-        for seq in self.reader():
-            new_seq = seq.rename_title(titles[seq.title])
-            new_fa.write(new_seq.title, new_seq.seq, new_seq.description)
-        new_fa.close()
+        try:
+            with self._open_binary() as handle, open(convert_file, 'rb') as mapping:
+                rename_headers(handle, output, TitleMapping(mapping), block_size)
+        finally:
+            output.close()
         
         return
 
+## FASTA instances of pool worker process, keyed by path
+_WORKER_FASTA: Dict[str, FASTA] = {}
+
+def _worker_fasta(path: str) -> FASTA:
+    """Return FASTA instance of 'path' cached in current (pool worker) process,
+    so index and file handle are reused across tasks of a worker"""
+
+    if path not in _WORKER_FASTA:
+        _WORKER_FASTA[path] = FASTA(path)
+    return _WORKER_FASTA[path]
+
 def _test():
     import doctest
     doctest.testmod()
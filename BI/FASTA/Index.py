@@ -0,0 +1,216 @@
+from typing import BinaryIO, Dict, Generator, List, Type
+
+__all__ = ('FaiRecord', 'FastaIndex')
+
+class FaiRecord:
+    """Class for recording one line of samtools-compatible .fai index
+
+    .fai index is tab seperated text file, each line represents
+    geometry of one sequence in fasta file.
+
+    NAME    LENGTH  OFFSET  LINEBASES  LINEWIDTH
+    chr1    32      24      8          9
+
+    NAME      : Name of sequence (title without '>')
+    LENGTH    : Total length of sequence (bases)
+    OFFSET    : Byte offset of the first base of sequence
+    LINEBASES : The number of bases on each line
+    LINEWIDTH : The number of bytes in each line (including newline)
+
+    Example
+    -------
+    >>> record = FaiRecord('chr1', 32, 24, 8, 9)
+    >>> record.byte_offset(10)
+    35
+    >>> str(record).split()
+    ['chr1', '32', '24', '8', '9']
+    """
+
+    __slots__ = ('name', 'length', 'offset', 'linebases', 'linewidth')
+
+    def __init__(self,
+        name : str,
+        length : int,
+        offset : int,
+        linebases : int,
+        linewidth : int
+        ) -> None:
+
+        self.name = name
+        self.length = int(length)
+        self.offset = int(offset)
+        self.linebases = int(linebases)
+        self.linewidth = int(linewidth)
+
+        return
+
+    def byte_offset(self, pos: int) -> int:
+        """Return byte offset of 0-based position 'pos' in fasta file"""
+
+        if self.linebases == 0:
+            return self.offset
+        line, col = divmod(pos, self.linebases)
+        return self.offset + line * self.linewidth + col
+
+    def __str__(self) -> str:
+        return f'{self.name}\t{self.length}\t{self.offset}\t{self.linebases}\t{self.linewidth}'
+
+    def __repr__(self) -> str:
+        return f'FaiRecord({self.name}, {self.length}, {self.offset}, {self.linebases}, {self.linewidth})'
+
+
+class FastaIndex:
+    """Class for building, loading and writing .fai index of fasta file.
+    It keeps FaiRecord by the order of sequences in fasta file and
+    supports dictionary-like access by sequence name.
+
+    Example
+    -------
+    >>> fai = FastaIndex.build(open('./data/small.fa', 'rb'))
+    >>> fai['chr1']
+    FaiRecord(chr1, 32, 24, 8, 9)
+    >>> 'chr2' in fai
+    False
+    >>> from io import BytesIO
+    >>> FastaIndex.build(BytesIO(b'>x\\nACGT\\nACGTACGT\\n'))
+    Traceback (most recent call last):
+    ...
+    ValueError: Different line length in sequence 'x'
+    """
+
+    def __init__(self, records: List[FaiRecord] = None) -> None:
+        """Initialize FastaIndex class
+
+        Parameters
+        ----------
+        records : List[FaiRecord], optional
+            FaiRecord list ordered as fasta file, by default None
+
+        Raises
+        ------
+        ValueError
+            Error occurs when duplicate name is in records
+        """
+
+        self.records: Dict[str, FaiRecord] = {}
+        for record in records or []:
+            if record.name in self.records:
+                raise ValueError(f"Duplicate key '{record.name}'")
+            self.records[record.name] = record
+
+        return
+
+    @classmethod
+    def build(cls, handle: BinaryIO) -> Type['FastaIndex']:
+        """Build index by scanning fasta file once.
+        Every line of a sequence must have the same length
+        except the last line, same as samtools faidx.
+
+        Parameters
+        ----------
+        handle : BinaryIO
+            Fasta file opened by binary mode ('rb')
+
+        Returns
+        -------
+        FastaIndex
+            FastaIndex instance of fasta file
+
+        Raises
+        ------
+        ValueError
+            Error occurs when line lengths of a sequence are different
+        """
+
+        records = []
+        name = None
+        offset = 0
+        for line in handle:
+            if line.startswith(b'>'):
+                if name is not None:
+                    records.append(FaiRecord(name, length, seq_offset, linebases, linewidth))
+                name = line[1:].split(None, 1)[0].decode() if line[1:].strip() else ''
+                seq_offset = offset + len(line)
+                length = linebases = linewidth = 0
+                last_line = False
+            elif name is not None:
+                bases = len(line.rstrip(b'\r\n'))
+                if linebases == 0:
+                    linebases = bases
+                    linewidth = len(line)
+                elif bases > linebases or (last_line and bases):
+                    raise ValueError(f"Different line length in sequence '{name}'")
+                if bases < linebases or len(line) != linewidth:
+                    last_line = True
+                length += bases
+            offset += len(line)
+
+        if name is not None:
+            records.append(FaiRecord(name, length, seq_offset, linebases, linewidth))
+
+        return cls(records)
+
+    @classmethod
+    def load(cls, path: str) -> Type['FastaIndex']:
+        """Load .fai index file
+
+        Parameters
+        ----------
+        path : str
+            Path of .fai file
+
+        Returns
+        -------
+        FastaIndex
+            FastaIndex instance loaded from .fai file
+        """
+
+        records = []
+        with open(path) as fai:
+            for line in fai:
+                cols = line.rstrip('\n').split('\t')
+                if len(cols) < 5:
+                    continue
+                records.append(FaiRecord(*cols[:5]))
+
+        return cls(records)
+
+    def write(self, path: str) -> None:
+        """Write index as .fai file
+
+        Parameters
+        ----------
+        path : str
+            Path of .fai file
+        """
+
+        with open(path, 'w') as fai:
+            fai.write(''.join(f'{record}\n' for record in self))
+
+        return
+
+    def __getitem__(self, name: str) -> FaiRecord:
+        return self.records[name]
+
+    def __contains__(self, name: str) -> bool:
+        return name in self.records
+
+    def __iter__(self) -> Generator[FaiRecord, None, None]:
+        return iter(self.records.values())
+
+    def __len__(self) -> int:
+        return len(self.records)
+
+    def keys(self) -> List[str]:
+        """Return sequence names by the order of fasta file"""
+        return list(self.records.keys())
+
+
+def _test():
+    import doctest
+    doctest.testmod()
+    return
+
+
+if __name__ == "__main__":
+    _test()
@@ -0,0 +1,201 @@
+from typing import Dict
+
+import numpy as np
+
+from BI.FASTA.Constant import IUPAC_TABLE
+from BI.FASTA.Orf import GeneticCode, get_genetic_code
+
+__all__ = ('BASE_BITS', 'encode_iupac', 'decode_iupac', 'iupac_compatible',
+           'find_degenerate', 'degenerate_codon_table', 'translate_degenerate',
+           'iupac_gc_count')
+
+## one bit per base, IUPAC code is OR of its bases (R = A|G = 5, N = 15)
+## and 0 is character which is not IUPAC code
+BASE_BITS = {'A': 1, 'C': 2, 'G': 4, 'T': 8, 'U': 8}
+
+def _mask_lookup(excluded: str) -> np.ndarray:
+    lookup = np.zeros(256, dtype=np.uint8)
+    masks = {**BASE_BITS, **{code: sum({BASE_BITS[base] for base in bases})
+                             for code, bases in IUPAC_TABLE.items()}}
+    for char, mask in masks.items():
+        if char != excluded:
+            lookup[[ord(char), ord(char.lower())]] = mask
+    return lookup
+
+_MASK = {None: _mask_lookup(''), 'DNA': _mask_lookup('U'), 'RNA': _mask_lookup('T')}
+_DECODE = np.frombuffer(b'-ACMGRSVTWYHKDBN', dtype=np.uint8)
+## the number of bases of every mask and fraction of G/C among them
+_BIT_COUNT = np.array([bin(mask).count('1') for mask in range(16)])
+_GC_FRACTION = np.array([bin(mask & 6).count('1') / max(_BIT_COUNT[mask], 1) for mask in range(16)])
+
+def encode_iupac(seq: str or bytes, type: str = None) -> np.ndarray:
+    """Encode sequence to 4-bit base masks (np.uint8, one per base).
+    Character which is not IUPAC code (and 'U' of DNA, 'T' of RNA) is 0.
+
+    Example
+    -------
+    >>> encode_iupac('ACGTRNx').tolist()
+    [1, 2, 4, 8, 5, 15, 0]
+
+    Parameters
+    ----------
+    seq : str or bytes
+        DNA or RNA sequence
+    type : str, optional
+        'DNA' or 'RNA' to reject the other base (U or T), by default None (both)
+
+    Returns
+    -------
+    np.ndarray
+        Base masks
+    """
+
+    if isinstance(seq, str):
+        seq = seq.encode()
+    return _MASK[type][np.frombuffer(seq, dtype=np.uint8)]
+
+def decode_iupac(masks: np.ndarray) -> str:
+    """Decode base masks to upper case DNA IUPAC codes ('-' for 0)"""
+
+    return _DECODE[masks].tobytes().decode()
+
+def iupac_compatible(seq_a: str or np.ndarray, seq_b: str or np.ndarray) -> np.ndarray:
+    """Whether bases of two sequences of the same length could be same base
+    (masks share a bit), e.g. 'R' is compatible with 'A' and 'G'.
+
+    Example
+    -------
+    >>> iupac_compatible('ARNY', 'GGTC').tolist()
+    [False, True, True, True]
+    """
+
+    if not isinstance(seq_a, np.ndarray):
+        seq_a = encode_iupac(seq_a)
+    if not isinstance(seq_b, np.ndarray):
+        seq_b = encode_iupac(seq_b)
+    return (seq_a & seq_b) != 0
+
+def find_degenerate(seq: str or np.ndarray, pattern: str) -> np.ndarray:
+    """Find 0-based start positions where pattern is compatible with sequence,
+    both could contain IUPAC codes. It takes one vectorized AND per base of pattern.
+
+    Example
+    -------
+    >>> find_degenerate('ACGTNACRT', 'ASG').tolist()
+    [0, 5]
+    """
+
+    masks = seq if isinstance(seq, np.ndarray) else encode_iupac(seq)
+    pattern = encode_iupac(pattern)
+    n = len(masks) - len(pattern) + 1
+    if n <= 0 or len(pattern) == 0:
+        return np.zeros(0, dtype=np.int64)
+
+    hits = np.ones(n, dtype=bool)
+    for i, mask in enumerate(pattern.tolist()):
+        hits &= (masks[i:i+n] & mask) != 0
+    return np.flatnonzero(hits)
+
+## bit of base -> base code of NCBI codon order (T=0, C=1, A=2, G=3)
+_NCBI_CODE = {1: 2, 2: 1, 4: 3, 8: 0}
+_CODON_TABLES: Dict[int, np.ndarray] = {}
+
+def degenerate_codon_table(table: int or GeneticCode = 1) -> np.ndarray:
+    """Return amino acid (ASCII) of every codon of base masks, indexed by
+    mask1 << 8 | mask2 << 4 | mask3 (4096 items). Codon is resolved to
+    amino acid (or '*') when all its expansions agree, otherwise 'X'.
+    Codon containing 0 mask (not IUPAC code) is 0.
+
+    Example
+    -------
+    >>> codons = degenerate_codon_table()
+    >>> G, C, A, T, R, N = 4, 2, 1, 8, 5, 15
+    >>> chr(codons[G << 8 | C << 4 | N]), chr(codons[T << 8 | A << 4 | R]), chr(codons[A << 8 | A << 4 | N])
+    ('A', '*', 'X')
+    """
+
+    code = get_genetic_code(table)
+    if code.id in _CODON_TABLES and isinstance(table, int):
+        return _CODON_TABLES[code.id]
+
+    ## included[m, b]: base code b (NCBI order) is in mask m
+    included = np.zeros((16, 4), dtype=bool)
+    for bit, base in _NCBI_CODE.items():
+        included[np.arange(16) & bit != 0, base] = True
+
+    masks = np.arange(4096)
+    m1, m2, m3 = masks >> 8, (masks >> 4) & 15, masks & 15
+    bases = np.arange(64)
+    b1, b2, b3 = bases >> 4, (bases >> 2) & 3, bases & 3
+    ## expansion[codon mask, codon]: codon is expansion of masks
+    expansion = included[m1][:, b1] & included[m2][:, b2] & included[m3][:, b3]
+
+    letters = np.frombuffer(code.amino_acids.encode(), dtype=np.uint8)
+    kinds = np.unique(letters)
+    one_hot = letters[:, None] == kinds[None, :]
+    present = (expansion.astype(np.int64) @ one_hot) > 0
+    num_kinds = present.sum(axis=1)
+
+    result = np.full(4096, ord('X'), dtype=np.uint8)
+    result[num_kinds == 1] = kinds[present[num_kinds == 1].argmax(axis=1)]
+    result[num_kinds == 0] = 0
+
+    if isinstance(table, int):
+        _CODON_TABLES[code.id] = result
+    return result
+
+def translate_degenerate(
+    seq : str or bytes or np.ndarray,
+    table : int or GeneticCode = 1,
+    type : str = None
+    ) -> np.ndarray:
+
+    """Translate codons of frame 0 (len // 3 codons) of sequence with IUPAC
+    codes by one lookup of degenerate_codon_table().
+
+    Example
+    -------
+    >>> translate_degenerate('ATGGCNTAYNNN').tobytes()
+    b'MAYX'
+
+    Parameters
+    ----------
+    seq : str or bytes or np.ndarray
+        DNA or RNA sequence (or base masks)
+    table : int or GeneticCode, optional
+        NCBI genetic code id, by default 1 (Standard)
+    type : str, optional
+        'DNA' or 'RNA' to reject the other base (U or T), by default None (both)
+
+    Returns
+    -------
+    np.ndarray
+        Amino acids (ASCII, np.uint8), 0 for codon with non-IUPAC character
+    """
+
+    masks = seq if isinstance(seq, np.ndarray) else encode_iupac(seq, type)
+    codons = masks[:len(masks) // 3 * 3].reshape(-1, 3).astype(np.int64)
+    return degenerate_codon_table(table)[codons[:, 0] << 8 | codons[:, 1] << 4 | codons[:, 2]]
+
+def iupac_gc_count(seq: str or bytes or np.ndarray) -> float:
+    """Expected G+C count of sequence with IUPAC codes, each code counts
+    the fraction of its bases which are G or C (S = 1, N = R = 0.5, A = 0)
+
+    Example
+    -------
+    >>> iupac_gc_count('GCSNRAT')
+    4.0
+    """
+
+    masks = seq if isinstance(seq, np.ndarray) else encode_iupac(seq)
+    return float(_GC_FRACTION[masks].sum())
+
+
+def _test():
+    import doctest
+    doctest.testmod()
+    return
+
+
+if __name__ == "__main__":
+    _test()
@@ -0,0 +1,364 @@
+from multiprocessing import Pool
+from typing import Generator, List, Tuple, Type
+
+import numpy as np
+
+__all__ = ('encode_2bit', 'kmer_codes', 'KmerCounts', 'count_kmers', 'count_fasta_kmers')
+
+MAX_K = 31
+
+## A=0, C=1, G=2, T(U)=3, others=4 (k-mers containing them are skipped)
+_ENCODE_TABLE = np.full(256, 4, dtype=np.uint8)
+for _base, _code in zip(b'ACGTUacgtu', (0, 1, 2, 3, 3, 0, 1, 2, 3, 3)):
+    _ENCODE_TABLE[_base] = _code
+_DECODE = 'ACGT'
+
+def encode_2bit(seq: str or bytes) -> np.ndarray:
+    """Encode sequence to 2-bit codes (A=0, C=1, G=2, T/U=3, others=4)
+
+    Example
+    -------
+    >>> encode_2bit('ACGTNa')
+    array([0, 1, 2, 3, 4, 0], dtype=uint8)
+
+    Parameters
+    ----------
+    seq : str or bytes
+        Sequence
+
+    Returns
+    -------
+    np.ndarray
+        uint8 array of codes
+    """
+
+    if isinstance(seq, str):
+        seq = seq.encode()
+    return _ENCODE_TABLE[np.frombuffer(seq, dtype=np.uint8)]
+
+def kmer_codes(encoded: np.ndarray, k: int, canonical: bool = True) -> np.ndarray:
+    """Make 2-bit packed integer code of every k-mer without
+    ambiguous base. Codes are built by shifting views of encoded array,
+    not by slicing string per k-mer.
+
+    Parameters
+    ----------
+    encoded : np.ndarray
+        Result of encode_2bit()
+    k : int
+        Length of k-mer (1 ~ 31)
+    canonical : bool, optional
+        Use smaller code of k-mer and its reverse complement, by default True
+
+    Returns
+    -------
+    np.ndarray
+        uint64 array of k-mer codes
+    """
+
+    if not 0 < k <= MAX_K:
+        raise ValueError(f'k should be 1 ~ {MAX_K}')
+
+    n = len(encoded) - k + 1
+    if n <= 0:
+        return np.empty(0, dtype=np.uint64)
+
+    invalid = encoded == 4
+    bad = np.concatenate(([0], np.cumsum(invalid, dtype=np.int64)))
+    valid = (bad[k:] - bad[:-k]) == 0
+
+    bases = encoded.astype(np.uint64)
+    bases[invalid] = 0
+    codes = np.zeros(n, dtype=np.uint64)
+    for i in range(k):
+        codes <<= np.uint64(2)
+        codes |= bases[i:i+n]
+
+    if canonical:
+        complement = np.uint64(3) - bases
+        rev_codes = np.zeros(n, dtype=np.uint64)
+        for i in range(k):
+            rev_codes |= complement[i:i+n] << np.uint64(2 * i)
+        codes = np.minimum(codes, rev_codes)
+
+    return codes[valid]
+
+def _merge_tables(kmers: List[np.ndarray], counts: List[np.ndarray]) -> Tuple[np.ndarray, np.ndarray]:
+    """Merge sorted (kmer, count) tables by summing counts of the same k-mer"""
+
+    kmers = np.concatenate(kmers) if kmers else np.empty(0, dtype=np.uint64)
+    counts = np.concatenate(counts) if counts else np.empty(0, dtype=np.uint64)
+    if len(kmers) == 0:
+        return kmers, counts
+
+    order = np.argsort(kmers, kind='stable')
+    kmers, counts = kmers[order], counts[order]
+    starts = np.flatnonzero(np.concatenate(([True], kmers[1:] != kmers[:-1])))
+
+    return kmers[starts], np.add.reduceat(counts, starts)
+
+
+class KmerCounts:
+    """Class for compact k-mer count table. K-mers are kept as sorted
+    uint64 array of 2-bit packed codes with parallel count array,
+    lookup is binary search. Table could be saved (.npz) and reloaded.
+
+    Example
+    -------
+    >>> table = count_kmers('ACGTTACGT', 3)
+    >>> table['ACG'], table['CGT'], table['GTA']
+    (4, 4, 1)
+    >>> table.most_common(2)
+    [('ACG', 4), ('AAC', 1)]
+    """
+
+    def __init__(self,
+        k : int,
+        kmers : np.ndarray = None,
+        counts : np.ndarray = None,
+        canonical : bool = True
+        ) -> None:
+
+        """Initialize KmerCounts class
+
+        Parameters
+        ----------
+        k : int
+            Length of k-mer
+        kmers : np.ndarray, optional
+            Sorted unique uint64 k-mer codes, by default None (empty)
+        counts : np.ndarray, optional
+            uint64 counts of kmers, by default None (empty)
+        canonical : bool, optional
+            Whether k-mers are canonical, by default True
+        """
+
+        self.k = k
+        self.canonical = canonical
+        self.kmers = np.empty(0, dtype=np.uint64) if kmers is None else kmers
+        self.counts = np.empty(0, dtype=np.uint64) if counts is None else counts
+
+        return
+
+    def encode(self, kmer: str) -> int:
+        """Return code of k-mer string (canonical if self.canonical)"""
+
+        codes = kmer_codes(encode_2bit(kmer), self.k, self.canonical)
+        if len(kmer) != self.k or len(codes) != 1:
+            raise ValueError(f'Invalid {self.k}-mer: {kmer}')
+        return int(codes[0])
+
+    def decode(self, code: int) -> str:
+        """Return k-mer string of code"""
+
+        code = int(code)
+        return ''.join(_DECODE[(code >> (2 * i)) & 3] for i in range(self.k - 1, -1, -1))
+
+    def __getitem__(self, kmer: str) -> int:
+        code = np.uint64(self.encode(kmer))
+        idx = np.searchsorted(self.kmers, code)
+        if idx < len(self.kmers) and self.kmers[idx] == code:
+            return int(self.counts[idx])
+        return 0
+
+    def __len__(self) -> int:
+        return len(self.kmers)
+
+    def items(self) -> Generator[Tuple[str, int], None, None]:
+        """Generator yielding (k-mer, count) by sorted order of code"""
+
+        for code, count in zip(self.kmers, self.counts):
+            yield self.decode(code), int(count)
+
+    def most_common(self, n: int = 10) -> List[Tuple[str, int]]:
+        """Return n most common (k-mer, count)"""
+
+        order = np.argsort(-self.counts.astype(np.int64), kind='stable')[:n]
+        return [(self.decode(self.kmers[i]), int(self.counts[i])) for i in order]
+
+    def merge(self, *others: Type['KmerCounts']) -> Type['KmerCounts']:
+        """Return new KmerCounts summing counts of self and others
+
+        Raises
+        ------
+        ValueError
+            Error occurs when k or canonical option is different
+        """
+
+        for other in others:
+            if other.k != self.k or other.canonical != self.canonical:
+                raise ValueError('Only tables with the same k and canonical option could be merged')
+        kmers, counts = _merge_tables([self.kmers] + [other.kmers for other in others],
+                                      [self.counts] + [other.counts for other in others])
+        return KmerCounts(self.k, kmers, counts, self.canonical)
+
+    def save(self, path: str) -> None:
+        """Save table as numpy .npz file"""
+
+        np.savez(path, kmers=self.kmers, counts=self.counts,
+                 k=np.array(self.k), canonical=np.array(self.canonical))
+        return
+
+    @classmethod
+    def load(cls, path: str) -> Type['KmerCounts']:
+        """Load table saved by save()"""
+
+        with np.load(path) as data:
+            return cls(int(data['k']), data['kmers'], data['counts'], bool(data['canonical']))
+
+
+class _TableBuilder:
+    """Accumulate (kmer, count) tables, merging when pending tables
+    grow larger than merged one (bounded re-merge cost)."""
+
+    def __init__(self) -> None:
+        self.kmers = np.empty(0, dtype=np.uint64)
+        self.counts = np.empty(0, dtype=np.uint64)
+        self.pending = []
+        self.pending_size = 0
+        return
+
+    def add(self, kmers: np.ndarray, counts: np.ndarray) -> None:
+        self.pending.append((kmers, counts))
+        self.pending_size += len(kmers)
+        if self.pending_size >= len(self.kmers):
+            self.flush()
+        return
+
+    def flush(self) -> None:
+        self.kmers, self.counts = _merge_tables(
+            [self.kmers] + [kmers for kmers, _ in self.pending],
+            [self.counts] + [counts for _, counts in self.pending])
+        self.pending, self.pending_size = [], 0
+        return
+
+def _unique_counts(codes: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    kmers, counts = np.unique(codes, return_counts=True)
+    return kmers, counts.astype(np.uint64)
+
+def count_kmers(seq: str or bytes,
+    k : int,
+    canonical : bool = True,
+    chunk_size : int = 1 << 24
+    ) -> KmerCounts:
+
+    """Count k-mers of sequence. Long sequence is processed by chunks of
+    'chunk_size' bases (overlapped by k-1) to bound memory of code arrays.
+
+    Parameters
+    ----------
+    seq : str or bytes
+        Sequence
+    k : int
+        Length of k-mer (1 ~ 31)
+    canonical : bool, optional
+        Count canonical k-mers, by default True
+    chunk_size : int, optional
+        The number of bases per chunk, by default 16,777,216
+
+    Returns
+    -------
+    KmerCounts
+        k-mer count table
+    """
+
+    if isinstance(seq, str):
+        seq = seq.encode()
+
+    builder = _TableBuilder()
+    for start in range(0, max(len(seq) - k + 1, 0), chunk_size):
+        codes = kmer_codes(encode_2bit(seq[start:start+chunk_size+k-1]), k, canonical)
+        builder.add(*_unique_counts(codes))
+    builder.flush()
+
+    return KmerCounts(k, builder.kmers, builder.counts, canonical)
+
+def _count_region(fasta,
+    name : str,
+    start : int,
+    end : int,
+    k : int,
+    canonical : bool
+    ) -> Tuple[np.ndarray, np.ndarray]:
+
+    """Count k-mers starting at region [start, end) by .fai index"""
+
+    record = fasta.load_index()[name]
+    raw = fasta._read_range(record.byte_offset(start),
+                            record.byte_offset(min(end + k - 1, record.length)))
+    codes = kmer_codes(encode_2bit(raw.translate(None, b'\r\n')), k, canonical)
+
+    return _unique_counts(codes)
+
+def _count_kmer_range(task: Tuple[str, str, int, int, int, bool]) -> Tuple[np.ndarray, np.ndarray]:
+    """Pool worker of _count_region()"""
+
+    from BI.FASTA.FASTA import _worker_fasta
+
+    return _count_region(_worker_fasta(task[0]), *task[1:])
+
+def count_fasta_kmers(fasta,
+    k : int,
+    canonical : bool = True,
+    processes : int = 1,
+    chunk_size : int = 1 << 24
+    ) -> KmerCounts:
+
+    """Count k-mers across every record of fasta. Records are split into
+    ranges of 'chunk_size' bases by .fai index, ranges are counted in process
+    pool and tables of workers are merged. gzip (not BGZF) fasta is streamed
+    in single process.
+
+    Parameters
+    ----------
+    fasta : FASTA
+        FASTA instance
+    k : int
+        Length of k-mer (1 ~ 31)
+    canonical : bool, optional
+        Count canonical k-mers, by default True
+    processes : int, optional
+        The number of processes, by default 1
+    chunk_size : int, optional
+        The number of bases per task, by default 16,777,216
+
+    Returns
+    -------
+    KmerCounts
+        k-mer count table
+    """
+
+    if not 0 < k <= MAX_K:
+        raise ValueError(f'k should be 1 ~ {MAX_K}')
+
+    builder = _TableBuilder()
+    if fasta._compressed == 'gzip':
+        ## windows overlapped by k-1, each k-mer is counted once
+        for chunk in fasta.iter_chunks(chunk_size + k - 1, chunk_size, partial=True):
+            builder.add(*_unique_counts(kmer_codes(encode_2bit(str(chunk.seq)), k, canonical)))
+    else:
+        tasks = []
+        for record in fasta.load_index():
+            for start in range(0, max(record.length - k + 1, 0), chunk_size):
+                tasks.append((fasta.path, record.name, start,
+                              min(start + chunk_size, record.length), k, canonical))
+        if processes > 1:
+            with Pool(processes) as pool:
+                for table in pool.imap_unordered(_count_kmer_range, tasks):
+                    builder.add(*table)
+        else:
+            for task in tasks:
+                builder.add(*_count_region(fasta, *task[1:]))
+    builder.flush()
+
+    return KmerCounts(k, builder.kmers, builder.counts, canonical)
+
+
+def _test():
+    import doctest
+    doctest.testmod()
+    return
+
+
+if __name__ == "__main__":
+    _test()
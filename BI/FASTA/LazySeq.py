@@ -0,0 +1,219 @@
+import mmap
+
+from typing import Type
+
+from BI.FASTA.Seq import Seq, _COMPLEMENT
+from BI.FASTA.Index import FaiRecord
+
+__all__ = ('LazySeq', 'MappedSeq', 'BytesSeq', 'SeqView')
+
+class LazySeq(Seq):
+    """Base class of Seq whose sequence is not kept as python string.
+    Child class implements __len__() and _fetch(start, end) returning
+    sequence string of region, then slicing, 'data' attribute and
+    every Seq method work by materializing only the requested bases.
+    """
+
+    @property
+    def data(self) -> str:
+        """Materialize whole sequence string"""
+        return self._fetch(0, len(self))
+
+    def _fetch(self, start: int, end: int) -> str:
+        """Return sequence string of 0-based region [start, end)"""
+        raise NotImplementedError
+
+    def __len__(self) -> int:
+        raise NotImplementedError
+
+    def __repr__(self) -> str:
+        if len(self) <= 60:
+            return f"Seq({self.data})"
+        else:
+            start = self._fetch(0, 30)
+            end = self._fetch(len(self) - 30, len(self))
+            return f"Seq({start}...{end})"
+
+
+class MappedSeq(LazySeq):
+    """Seq class whose sequence is a lazy view over memory-mapped fasta file.
+    It only keeps the mapped buffer and line geometry of sequence (FaiRecord),
+    so processes mapping the same fasta share OS page cache instead of
+    holding private copy of sequence. Sequence string is materialized
+    only for the bases requested by slicing or 'data' attribute.
+
+    Example
+    -------
+    >>> import mmap
+    >>> from BI.FASTA.Index import FaiRecord
+    >>> handle = open('./data/small.fa', 'rb')
+    >>> buffer = mmap.mmap(handle.fileno(), 0, access=mmap.ACCESS_READ)
+    >>> seq = MappedSeq(buffer, FaiRecord('chr1', 32, 24, 8, 9))
+    >>> len(seq)
+    32
+    >>> seq[6:12]
+    Seq(GTACGT)
+    >>> seq[-1]
+    'C'
+    """
+
+    def __init__(self,
+        buffer : mmap.mmap,
+        record : FaiRecord,
+        type : str = 'DNA'
+        ) -> None:
+
+        """Initialize MappedSeq class with mapped buffer and FaiRecord.
+
+        Parameters
+        ----------
+        buffer : mmap.mmap
+            Memory-mapped fasta file
+        record : FaiRecord
+            Geometry of sequence in fasta file
+        type : str, optional
+            Type of sequence ('DNA' or 'RNA' or 'Protein'), by default 'DNA'
+        """
+
+        self.type = type
+        self.buffer = buffer
+        self.record = record
+
+        return
+
+    def _fetch(self, start: int, end: int) -> str:
+        """Return sequence string of 0-based region [start, end)"""
+
+        if start >= end:
+            return ''
+        raw = self.buffer[self.record.byte_offset(start):self.record.byte_offset(end)]
+        return raw.replace(b'\n', b'').replace(b'\r', b'').decode()
+
+    def __len__(self) -> int:
+        return self.record.length
+
+
+class BytesSeq(LazySeq):
+    """Seq class keeping raw sequence bytes (without newlines) from block parser.
+    Decoding to python string is deferred until sequence string is requested,
+    and slicing decodes only the requested bases.
+
+    Example
+    -------
+    >>> seq = BytesSeq(b'ACGTACGT')
+    >>> len(seq), seq[2:6]
+    (8, Seq(GTAC))
+    """
+
+    def __init__(self,
+        raw : bytes,
+        type : str = 'DNA'
+        ) -> None:
+
+        """Initialize BytesSeq class
+
+        Parameters
+        ----------
+        raw : bytes
+            Sequence bytes without newlines
+        type : str, optional
+            Type of sequence ('DNA' or 'RNA' or 'Protein'), by default 'DNA'
+        """
+
+        self.type = type
+        self.raw = raw
+
+        return
+
+    def _fetch(self, start: int, end: int) -> str:
+        """Decode sequence string of 0-based region [start, end)"""
+        return self.raw[start:end].decode()
+
+    def __len__(self) -> int:
+        return len(self.raw)
+
+
+class SeqView(LazySeq):
+    """Seq class which is a view of region of other Seq (Seq.__getitem__).
+    It keeps base object, offset, length and strand only, and bases are
+    copied from base when sequence string is requested. '-' strand view is
+    reverse complement of region, so reverse_complement() of view is
+    another view without copy. View of view points to base directly.
+
+    Example
+    -------
+    >>> seq = Seq('ACGTACGGGC')
+    >>> view = seq[2:8]
+    >>> view, view.start, view.length, view.strand
+    (Seq(GTACGG), 2, 6, '+')
+    >>> rev_com = view.reverse_complement()
+    >>> rev_com, rev_com[1:3], rev_com[1:3].base is seq
+    (Seq(CCGTAC), Seq(CG), True)
+    """
+
+    def __init__(self,
+        base : Seq,
+        start : int,
+        length : int,
+        strand : str = '+'
+        ) -> None:
+
+        """Initialize SeqView class
+
+        Parameters
+        ----------
+        base : Seq
+            Seq object containing region
+        start : int
+            0-based start position of region in base
+        length : int
+            Length of region
+        strand : str, optional
+            '+' or '-' (reverse complement of region), by default '+'
+        """
+
+        if isinstance(base, SeqView):
+            if base.strand == '-':
+                start = base.length - start - length
+                strand = '+' if strand == '-' else '-'
+            start += base.start
+            base = base.base
+
+        self.type = base.type
+        self.base = base
+        self.start = start
+        self.length = length
+        self.strand = strand
+
+        return
+
+    def _fetch(self, start: int, end: int) -> str:
+        """Return sequence string of 0-based region [start, end) of view"""
+
+        if start >= end:
+            return ''
+        if self.strand == '+':
+            return self.base._fetch(self.start + start, self.start + end)
+
+        first = self.start + self.length - end
+        data = self.base._fetch(first, first + end - start)
+        if self.type in _COMPLEMENT:
+            return _COMPLEMENT[self.type].apply(data, reverse=True)
+        return data[::-1]
+
+    def __len__(self) -> int:
+        return self.length
+
+    def reverse_complement(self) -> Type['SeqView']:
+        """Return reverse complement view of the same region (no copy)"""
+        return SeqView(self, 0, self.length, '-')
+
+
+def _test():
+    import doctest
+    doctest.testmod()
+    return
+
+
+if __name__ == "__main__":
+    _test()
@@ -0,0 +1,273 @@
+import itertools
+
+from collections import deque
+from typing import Generator, Iterable, List, Tuple
+
+from BI.FASTA.Constant import *
+
+__all__ = ('MotifHit', 'MotifSearcher')
+
+## text is scanned as codes, A=0, C=1, G=2, T(U)=3, others=4 (never matched)
+_CODE_TABLE = bytearray([4] * 256)
+for _base, _code in zip(b'ACGTUacgtu', (0, 1, 2, 3, 3, 0, 1, 2, 3, 3)):
+    _CODE_TABLE[_base] = _code
+_CODE_TABLE = bytes(_CODE_TABLE)
+_BASE_CODE = {'A': 0, 'C': 1, 'G': 2, 'T': 3}
+_COMPLEMENT = {'A': 'T', 'C': 'G', 'G': 'C', 'T': 'A'}
+
+## IUPAC_TABLE is written with 'U', DNA patterns are expanded with 'T'
+_EXPANSION = {code: [base.replace('U', 'T') for base in bases]
+              for code, bases in IUPAC_TABLE.items()}
+_EXPANSION.update({base: [base] for base in 'ACGT'})
+_EXPANSION['U'] = ['T']
+
+class MotifHit:
+    """Class for recording one motif hit (MotifSearcher)
+
+    Parameters
+    ----------
+    contig : str
+        Name of sequence
+    start : int
+        0-based start position of hit (forward strand coordinate)
+    end : int
+        0-based exclusive end position of hit
+    strand : str
+        '+' (pattern) or '-' (reverse complement of pattern)
+    pattern : str
+        Pattern as given (could contain IUPAC codes)
+    """
+
+    __slots__ = ('contig', 'start', 'end', 'strand', 'pattern')
+
+    def __init__(self,
+        contig : str,
+        start : int,
+        end : int,
+        strand : str,
+        pattern : str
+        ) -> None:
+
+        self.contig = contig
+        self.start = start
+        self.end = end
+        self.strand = strand
+        self.pattern = pattern
+
+        return
+
+    def __repr__(self) -> str:
+        return f'MotifHit({self.contig}, {self.start}, {self.end}, {self.strand}, {self.pattern})'
+
+
+class MotifSearcher:
+    """Class for searching many DNA patterns at once with Aho-Corasick automaton.
+    Degenerate IUPAC codes of patterns are expanded (IUPAC_TABLE), and reverse
+    complement of every expansion is added to the same automaton, so both
+    strands are scanned in one pass over the sequence.
+
+    Example
+    -------
+    >>> searcher = MotifSearcher(['ACGT', 'AAAR', 'CCCG'])
+    >>> for hit in searcher.search('chr1', 'TTACGTAAAGCGGG'):
+    ...     print(hit)
+    MotifHit(chr1, 2, 6, +, ACGT)
+    MotifHit(chr1, 2, 6, -, ACGT)
+    MotifHit(chr1, 6, 10, +, AAAR)
+    MotifHit(chr1, 10, 14, -, CCCG)
+    """
+
+    def __init__(self,
+        patterns : Iterable[str],
+        both_strands : bool = True,
+        max_expansion : int = 4096
+        ) -> None:
+
+        """Initialize MotifSearcher class and build automaton
+
+        Parameters
+        ----------
+        patterns : Iterable[str]
+            DNA patterns (could contain IUPAC codes)
+        both_strands : bool, optional
+            Search reverse complement of patterns too, by default True
+        max_expansion : int, optional
+            Maximum number of expanded sequences per pattern, by default 4096
+
+        Raises
+        ------
+        ValueError
+            Error occurs when pattern has unknown character or too many expansions
+        """
+
+        self.patterns: List[str] = []
+        self.both_strands = both_strands
+
+        ## trie, goto[state] = {code: next state}, outputs[state] = [(length, pattern idx, strand)]
+        self._goto = [{}]
+        self._outputs = [[]]
+        for pattern in patterns:
+            idx = len(self.patterns)
+            self.patterns.append(pattern)
+            for seq in self._expand(pattern, max_expansion):
+                self._add(seq, (len(seq), idx, '+'))
+                if both_strands:
+                    rev_com = ''.join(_COMPLEMENT[base] for base in reversed(seq))
+                    self._add(rev_com, (len(seq), idx, '-'))
+        self._build()
+
+        return
+
+    def _expand(self, pattern: str, max_expansion: int) -> List[str]:
+        """Expand IUPAC codes of pattern to ACGT sequences"""
+
+        pattern = pattern.upper()
+        try:
+            choices = [_EXPANSION[base] for base in pattern]
+        except KeyError as error:
+            raise ValueError(f'Unknown character {error} in pattern {pattern}')
+        count = 1
+        for bases in choices:
+            count *= len(bases)
+        if count > max_expansion:
+            raise ValueError(f'Pattern {pattern} expands to {count} sequences (> {max_expansion})')
+        if not pattern:
+            raise ValueError('Empty pattern')
+
+        return [''.join(bases) for bases in itertools.product(*choices)]
+
+    def _add(self, seq: str, output: Tuple[int, int, str]) -> None:
+        state = 0
+        for base in seq:
+            code = _BASE_CODE[base]
+            if code not in self._goto[state]:
+                self._goto.append({})
+                self._outputs.append([])
+                self._goto[state][code] = len(self._goto) - 1
+            state = self._goto[state][code]
+        if output not in self._outputs[state]:
+            self._outputs[state].append(output)
+        return
+
+    def _build(self) -> None:
+        """Build failure links and full transition table (DFA),
+        self._delta[state][code] (code 4 always goes to root)"""
+
+        n_states = len(self._goto)
+        fail = [0] * n_states
+        self._delta = [[0] * 5 for _ in range(n_states)]
+
+        queue = deque()
+        for code in range(4):
+            child = self._goto[0].get(code)
+            if child is not None:
+                self._delta[0][code] = child
+                queue.append(child)
+
+        while queue:
+            state = queue.popleft()
+            ## outputs of failure state are also outputs of state
+            self._outputs[state] = self._outputs[state] + [
+                output for output in self._outputs[fail[state]] if output not in self._outputs[state]]
+            for code in range(4):
+                child = self._goto[state].get(code)
+                if child is not None:
+                    fail[child] = self._delta[fail[state]][code]
+                    self._delta[state][code] = child
+                    queue.append(child)
+                else:
+                    self._delta[state][code] = self._delta[fail[state]][code]
+
+        self._outputs = [tuple(outputs) for outputs in self._outputs]
+        return
+
+    def _scan(self,
+        codes : bytes,
+        offset : int,
+        state : int
+        ) -> Generator[Tuple[int, int, str, int], None, int]:
+
+        """Scan code bytes from automaton state.
+        Yield (start, end, strand, pattern idx) and return last state."""
+
+        delta = self._delta
+        outputs = self._outputs
+        for i, code in enumerate(codes):
+            state = delta[state][code]
+            if outputs[state]:
+                end = offset + i + 1
+                for length, idx, strand in outputs[state]:
+                    yield end - length, end, strand, idx
+        return state
+
+    def search(self,
+        contig : str,
+        seq : str or bytes
+        ) -> Generator[MotifHit, None, None]:
+
+        """Search patterns in one sequence
+
+        Parameters
+        ----------
+        contig : str
+            Name of sequence
+        seq : str or bytes
+            Sequence
+
+        Yields
+        ------
+        MotifHit
+            Hit of pattern
+        """
+
+        if isinstance(seq, str):
+            seq = seq.encode()
+        scanner = self._scan(seq.translate(_CODE_TABLE), 0, 0)
+        for start, end, strand, idx in scanner:
+            yield MotifHit(contig, start, end, strand, self.patterns[idx])
+
+    def scan_handle(self, handle) -> Generator[MotifHit, None, None]:
+        """Search patterns in every record of fasta by one streaming pass.
+        Automaton state is carried across lines, whole record is never loaded.
+
+        Parameters
+        ----------
+        handle : BinaryIO
+            Fasta file opened by binary mode
+
+        Yields
+        ------
+        MotifHit
+            Hit of pattern
+        """
+
+        contig = None
+        for line in handle:
+            if line.startswith(b'>'):
+                contig = line[1:].split(None, 1)[0].decode() if line[1:].strip() else ''
+                position = state = 0
+                continue
+            if contig is None:
+                continue
+            codes = line.rstrip(b'\r\n').translate(_CODE_TABLE)
+            scanner = self._scan(codes, position, state)
+            while True:
+                try:
+                    start, end, strand, idx = next(scanner)
+                except StopIteration as stop:
+                    state = stop.value
+                    break
+                yield MotifHit(contig, start, end, strand, self.patterns[idx])
+            position += len(codes)
+
+        return
+
+
+def _test():
+    import doctest
+    doctest.testmod()
+    return
+
+
+if __name__ == "__main__":
+    _test()
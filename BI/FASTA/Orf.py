@@ -0,0 +1,408 @@
+from multiprocessing import Pool
+from typing import Dict, Generator, List, Tuple, Type
+
+import numpy as np
+
+__all__ = ('GeneticCode', 'GENETIC_CODES', 'get_genetic_code', 'OrfRecord',
+           'codon_indices', 'translate_frames', 'find_orfs', 'scan_orfs')
+
+## base codes of codon index in NCBI order (T=0, C=1, A=2, G=3), others=4
+_BASE_CODE = np.full(256, 4, dtype=np.uint8)
+for _bases, _code in ((b'TtUu', 0), (b'Cc', 1), (b'Aa', 2), (b'Gg', 3)):
+    _BASE_CODE[list(_bases)] = _code
+_COMPLEMENT_CODE = np.array([2, 3, 0, 1, 4], dtype=np.uint8)
+## index of codon containing non-ACGT(U) base
+INVALID_CODON = 64
+
+class GeneticCode:
+    """Class for recording one NCBI genetic code (translation table).
+    Amino acids and start codons are written in NCBI codon order
+    (TTT, TTC, TTA, TTG, TCT, ... GGG), and lookup arrays of 65 items
+    (64 codons + invalid codon, translated to 'X') are made for numpy.
+
+    Example
+    -------
+    >>> code = GENETIC_CODES[11]
+    >>> code.translate_codon('TTG'), code.is_start[codon_indices(b'TTG')].tolist()
+    ('L', [True])
+
+    Parameters
+    ----------
+    id : int
+        NCBI translation table id
+    name : str
+        Name of genetic code
+    amino_acids : str
+        64 amino acids ('*' is stop)
+    starts : str
+        64 characters, 'M' marks start codon
+    """
+
+    def __init__(self,
+        id : int,
+        name : str,
+        amino_acids : str,
+        starts : str
+        ) -> None:
+
+        if len(amino_acids) != 64 or len(starts) != 64:
+            raise ValueError(f'Genetic code {id} should have 64 codons')
+
+        self.id = id
+        self.name = name
+        self.amino_acids = amino_acids
+        self.starts = starts
+
+        self.aa = np.frombuffer(f'{amino_acids}X'.encode(), dtype=np.uint8)
+        self.is_stop = self.aa == ord('*')
+        self.is_start = np.frombuffer(f'{starts}-'.encode(), dtype=np.uint8) == ord('M')
+
+        return
+
+    def translate_codon(self, codon: str) -> str:
+        """Translate one codon ('X' if it has non-ACGT(U) base)"""
+
+        return chr(self.aa[codon_indices(codon.encode())][0]) if len(codon) == 3 else 'X'
+
+    def __repr__(self) -> str:
+        return f'GeneticCode({self.id}, {self.name})'
+
+## NCBI translation tables (https://www.ncbi.nlm.nih.gov/Taxonomy/Utils/wprintgc.cgi)
+GENETIC_CODES: Dict[int, GeneticCode] = {code.id: code for code in (
+    GeneticCode(1, 'Standard',
+                'FFLLSSSSYY**CC*WLLLLPPPPHHQQRRRRIIIMTTTTNNKKSSRRVVVVAAAADDEEGGGG',
+                '---M---------------M---------------M----------------------------'),
+    GeneticCode(2, 'Vertebrate Mitochondrial',
+                'FFLLSSSSYY**CCWWLLLLPPPPHHQQRRRRIIMMTTTTNNKKSS**VVVVAAAADDEEGGGG',
+                '--------------------------------MMMM---------------M------------'),
+    GeneticCode(3, 'Yeast Mitochondrial',
+                'FFLLSSSSYY**CCWWTTTTPPPPHHQQRRRRIIMMTTTTNNKKSSRRVVVVAAAADDEEGGGG',
+                '----------------------------------MM----------------------------'),
+    GeneticCode(4, 'Mold, Protozoan, and Coelenterate Mitochondrial and Mycoplasma/Spiroplasma',
+                'FFLLSSSSYY**CCWWLLLLPPPPHHQQRRRRIIIMTTTTNNKKSSRRVVVVAAAADDEEGGGG',
+                '--MM---------------M------------MMMM---------------M------------'),
+    GeneticCode(5, 'Invertebrate Mitochondrial',
+                'FFLLSSSSYY**CCWWLLLLPPPPHHQQRRRRIIMMTTTTNNKKSSSSVVVVAAAADDEEGGGG',
+                '---M----------------------------MMMM---------------M------------'),
+    GeneticCode(6, 'Ciliate, Dasycladacean and Hexamita Nuclear',
+                'FFLLSSSSYYQQCC*WLLLLPPPPHHQQRRRRIIIMTTTTNNKKSSRRVVVVAAAADDEEGGGG',
+                '-----------------------------------M----------------------------'),
+    GeneticCode(11, 'Bacterial, Archaeal and Plant Plastid',
+                'FFLLSSSSYY**CC*WLLLLPPPPHHQQRRRRIIIMTTTTNNKKSSRRVVVVAAAADDEEGGGG',
+                '---M---------------M------------MMMM---------------M------------'),
+)}
+
+def get_genetic_code(table: int or GeneticCode) -> GeneticCode:
+    """Return GeneticCode of NCBI table id (GeneticCode is returned as it is)
+
+    Raises
+    ------
+    KeyError
+        Error occurs when table id is not supported
+    """
+
+    if isinstance(table, GeneticCode):
+        return table
+    if table not in GENETIC_CODES:
+        raise KeyError(f'Genetic code {table} is not supported ({", ".join(map(str, GENETIC_CODES))})')
+    return GENETIC_CODES[table]
+
+def codon_indices(seq: bytes or np.ndarray) -> np.ndarray:
+    """Return codon index (0 ~ 63, INVALID_CODON) of codon starting at every
+    position of sequence (length - 2 codons). Frame f is result[f::3].
+
+    Example
+    -------
+    >>> codon_indices(b'TTTGGGN').tolist()
+    [0, 3, 15, 63, 64]
+    """
+
+    codes = _BASE_CODE[np.frombuffer(seq, dtype=np.uint8)] if isinstance(seq, bytes) else seq
+    if len(codes) < 3:
+        return np.zeros(0, dtype=np.int16)
+    return _codon_indices(codes)
+
+def _codon_indices(codes: np.ndarray) -> np.ndarray:
+    indices = codes[:-2].astype(np.int16) * 16 + codes[1:-1] * 4 + codes[2:]
+    invalid = (codes[:-2] > 3) | (codes[1:-1] > 3) | (codes[2:] > 3)
+    indices[invalid] = INVALID_CODON
+    return indices
+
+def _encode(seq: str or bytes) -> np.ndarray:
+    if isinstance(seq, str):
+        seq = seq.encode()
+    return _BASE_CODE[np.frombuffer(seq, dtype=np.uint8)]
+
+def _strand_indices(seq: str or bytes) -> Tuple[np.ndarray, np.ndarray]:
+    """Codon indices of every position of forward and reverse complement strand"""
+
+    codes = _encode(seq)
+    if len(codes) < 3:
+        empty = np.zeros(0, dtype=np.int16)
+        return empty, empty
+    return _codon_indices(codes), _codon_indices(_COMPLEMENT_CODE[codes[::-1]])
+
+def translate_frames(seq: str or bytes, table: int or GeneticCode = 1) -> List[str]:
+    """Translate six frames (+1, +2, +3, -1, -2, -3) of DNA/RNA sequence by
+    one vectorized codon lookup per strand. Codon with non-ACGT(U) base is 'X'.
+
+    Example
+    -------
+    >>> translate_frames('ATGGCCTAAT')
+    ['MA*', 'WPN', 'GL', 'IRP', 'LGH', '*A']
+
+    Parameters
+    ----------
+    seq : str or bytes
+        DNA or RNA sequence
+    table : int or GeneticCode, optional
+        NCBI genetic code id, by default 1 (Standard)
+
+    Returns
+    -------
+    List[str]
+        Proteins of six frames
+    """
+
+    code = get_genetic_code(table)
+    forward, reverse = _strand_indices(seq)
+    return [code.aa[indices[frame::3]].tobytes().decode()
+            for indices in (forward, reverse) for frame in range(3)]
+
+class OrfRecord:
+    """Class for recording one open reading frame
+
+    Parameters
+    ----------
+    contig : str
+        Name of sequence
+    start : int
+        0-based start position on forward strand
+    end : int
+        0-based exclusive end position on forward strand (stop codon included)
+    strand : str
+        '+' or '-'
+    frame : int
+        Frame of ORF (1, 2, 3 or -1, -2, -3)
+    protein : str
+        Translated protein (stop codon excluded)
+    partial : bool, optional
+        ORF reaches the end of sequence without stop codon, by default False
+    """
+
+    __slots__ = ('contig', 'start', 'end', 'strand', 'frame', 'protein', 'partial')
+
+    def __init__(self,
+        contig : str,
+        start : int,
+        end : int,
+        strand : str,
+        frame : int,
+        protein : str,
+        partial : bool = False
+        ) -> None:
+
+        self.contig = contig
+        self.start = start
+        self.end = end
+        self.strand = strand
+        self.frame = frame
+        self.protein = protein
+        self.partial = partial
+
+        return
+
+    @property
+    def title(self) -> str:
+        """samtools-style region string with strand ('contig:start-end(strand)', 1-based)"""
+        return f'{self.contig}:{self.start+1}-{self.end}({self.strand})'
+
+    def __len__(self) -> int:
+        return self.end - self.start
+
+    def __repr__(self) -> str:
+        return f'OrfRecord({self.title}, frame={self.frame}, {len(self.protein)} aa)'
+
+def _frame_orfs(
+    indices : np.ndarray,
+    code : GeneticCode,
+    min_codons : int,
+    require_start : bool,
+    partial : bool
+    ) -> List[Tuple[int, int, bool]]:
+
+    """Find ORFs of one frame as (first codon, end codon, has stop).
+    Codons are split into segments by stop codons, ORF of segment begins
+    at the first start codon (or the first codon) of segment."""
+
+    n = len(indices)
+    stops = np.flatnonzero(code.is_stop[indices])
+    ## segment k is (stops[k-1], stops[k]), the last one reaches the end
+    seg_begins = np.concatenate(([0], stops + 1))
+    seg_ends = np.concatenate((stops, [n]))
+    has_stop = np.arange(len(seg_ends)) < len(stops)
+
+    if require_start:
+        starts = np.flatnonzero(code.is_start[indices])
+        segments, first = np.unique(np.searchsorted(stops, starts), return_index=True)
+        begins, ends, has_stop = starts[first], seg_ends[segments], has_stop[segments]
+    else:
+        begins, ends = seg_begins, seg_ends
+
+    keep = ends - begins >= max(min_codons, 1)
+    if not partial:
+        keep &= has_stop
+    return list(zip(begins[keep].tolist(), ends[keep].tolist(), has_stop[keep].tolist()))
+
+def find_orfs(
+    seq : str or bytes,
+    contig : str = '',
+    min_len : int = 75,
+    table : int or GeneticCode = 1,
+    require_start : bool = True,
+    partial : bool = False
+    ) -> List[OrfRecord]:
+
+    """Find every ORF of six frames of DNA/RNA sequence. Codon indices of
+    each strand are made at once (numpy), stop and start codons are found by
+    lookup arrays of genetic code, so python code runs per ORF, not per codon.
+    ORF begins at the first start codon after stop codon (translated as 'M'),
+    or right after stop codon if not 'require_start'.
+
+    Example
+    -------
+    >>> for orf in find_orfs('CCATGAAATTTTAGCCTCATTTAGACAT', 'seq1', min_len=6):
+    ...     print(orf.title, orf.frame, orf.protein)
+    seq1:3-14(+) 3 MKF
+    seq1:17-28(-) -1 MSK
+
+    Parameters
+    ----------
+    seq : str or bytes
+        DNA or RNA sequence
+    contig : str, optional
+        Name of sequence, by default ''
+    min_len : int, optional
+        Minimum length of ORF (nucleotides, stop codon excluded), by default 75
+    table : int or GeneticCode, optional
+        NCBI genetic code id, by default 1 (Standard)
+    require_start : bool, optional
+        ORF should begin with start codon of genetic code, by default True
+    partial : bool, optional
+        Report ORF reaching the end of sequence without stop codon, by default False
+
+    Returns
+    -------
+    List[OrfRecord]
+        ORFs sorted by position
+    """
+
+    code = get_genetic_code(table)
+    length = len(seq)
+    min_codons = -(-min_len // 3)
+
+    orfs = []
+    for strand, indices in zip('+-', _strand_indices(seq)):
+        for frame in range(3):
+            frame_indices = indices[frame::3]
+            for begin, end, has_stop in _frame_orfs(frame_indices, code, min_codons,
+                                                    require_start, partial):
+                protein = code.aa[frame_indices[begin:end]].tobytes().decode()
+                if require_start:
+                    protein = f'M{protein[1:]}'
+                first = frame + begin * 3
+                last = frame + (end + has_stop) * 3
+                if strand == '+':
+                    orfs.append(OrfRecord(contig, first, last, '+', frame + 1, protein, not has_stop))
+                else:
+                    orfs.append(OrfRecord(contig, length - last, length - first, '-',
+                                          -(frame + 1), protein, not has_stop))
+
+    orfs.sort(key=lambda orf: (orf.start, orf.end, orf.strand))
+    return orfs
+
+def _find_batch(task: Tuple[List[Tuple[str, bytes]], int, int or GeneticCode, bool, bool]) -> List[OrfRecord]:
+    """Pool worker finding ORFs of batch of records"""
+
+    records, min_len, table, require_start, partial = task
+    return [orf for title, seq in records
+            for orf in find_orfs(seq, title, min_len, table, require_start, partial)]
+
+def _batches(
+    fasta : Type['FASTA'],
+    batch_size : int,
+    *args
+    ) -> Generator[tuple, None, None]:
+
+    """Group records streamed by block parser to tasks of about 'batch_size' bases"""
+
+    from BI.FASTA.Parser import parse_blocks
+
+    batch, size = [], 0
+    with fasta._open_binary() as handle:
+        for title, _, seq in parse_blocks(handle):
+            batch.append((title.decode(), seq))
+            size += len(seq)
+            if size >= batch_size:
+                yield (batch, *args)
+                batch, size = [], 0
+    if batch:
+        yield (batch, *args)
+
+def scan_orfs(
+    fasta : Type['FASTA'],
+    min_len : int = 75,
+    table : int or GeneticCode = 1,
+    require_start : bool = True,
+    partial : bool = False,
+    processes : int = 1,
+    batch_size : int = 1 << 24
+    ) -> Generator[OrfRecord, None, None]:
+
+    """Generator function yielding ORFs of every record of fasta in file order.
+    Records are streamed by block parser (plain, gzip, BGZF) and grouped into
+    batches of about 'batch_size' bases, batches are searched in process pool.
+
+    Parameters
+    ----------
+    fasta : FASTA
+        FASTA instance
+    min_len : int, optional
+        Minimum length of ORF (nucleotides, stop codon excluded), by default 75
+    table : int or GeneticCode, optional
+        NCBI genetic code id, by default 1 (Standard)
+    require_start : bool, optional
+        ORF should begin with start codon of genetic code, by default True
+    partial : bool, optional
+        Report ORF reaching the end of sequence without stop codon, by default False
+    processes : int, optional
+        The number of processes, by default 1
+    batch_size : int, optional
+        The number of bases per task, by default 16 M
+
+    Yields
+    ------
+    OrfRecord
+        ORF with coordinates of its record
+    """
+
+    get_genetic_code(table)
+    tasks = _batches(fasta, batch_size, min_len, table, require_start, partial)
+
+    if processes > 1:
+        with Pool(processes) as pool:
+            for orfs in pool.imap(_find_batch, tasks):
+                yield from orfs
+    else:
+        for task in tasks:
+            yield from _find_batch(task)
+
+
+def _test():
+    import doctest
+    doctest.testmod()
+    return
+
+
+if __name__ == "__main__":
+    _test()
@@ -0,0 +1,118 @@
+from typing import BinaryIO, Generator, Tuple
+
+__all__ = ('parse_blocks',)
+
+def _strip_newlines(chunk: bytes) -> bytes:
+    """Remove newlines of chunk (bytes.replace is memchr-based,
+    faster than bytes.translate with deletion)"""
+
+    chunk = chunk.replace(b'\n', b'')
+    if b'\r' in chunk:
+        chunk = chunk.replace(b'\r', b'')
+    return chunk
+
+def _split_header(header: bytes) -> Tuple[bytes, bytes]:
+    """Split header line (without '>') to (title, description)"""
+
+    cols = header.rstrip(b'\r').split(None, 1)
+    if not cols:
+        return b'', b''
+    return cols[0], cols[1] if len(cols) > 1 else b''
+
+def parse_blocks(handle : BinaryIO,
+    block_size : int = 1 << 20
+    ) -> Generator[Tuple[bytes, bytes, bytes], None, None]:
+
+    """Generator function parsing fasta by large binary blocks.
+    Record boundaries are found by bytes.find(b'\\n>'), newlines of
+    sequence are removed by bytes.replace() per block, and nothing
+    is decoded, so python code runs per block and per record, not per line.
+
+    Example
+    -------
+    >>> import io
+    >>> handle = io.BytesIO(b'>seq1 first seq\\nACGT\\nAC\\n>seq2\\nGG\\n')
+    >>> for title, desc, seq in parse_blocks(handle, block_size=4):
+    ...     print(title, desc, seq)
+    b'seq1' b'first seq' b'ACGTAC'
+    b'seq2' b'' b'GG'
+
+    Parameters
+    ----------
+    handle : BinaryIO
+        Fasta file opened by binary mode
+    block_size : int, optional
+        Bytes read at once, by default 1 MB
+
+    Yields
+    ------
+    Tuple[bytes, bytes, bytes]
+        (title, description, sequence without newlines)
+    """
+
+    header = None
+    header_parts = []
+    in_header = False
+    parts = []
+    line_start = True
+
+    while True:
+        block = handle.read(block_size)
+        if not block:
+            break
+
+        pos = 0
+        if in_header:
+            newline = block.find(b'\n')
+            if newline == -1:
+                header_parts.append(block)
+                continue
+            header_parts.append(block[:newline])
+            header = b''.join(header_parts)
+            in_header = False
+            pos = newline + 1
+
+        while True:
+            ## next record starts with '>' at the beginning of line
+            if pos < len(block) and block[pos] == 62 and (pos > 0 or line_start):
+                start = pos
+            else:
+                start = block.find(b'\n>', pos)
+                if start != -1:
+                    start += 1
+            if start == -1:
+                if header is not None:
+                    parts.append(_strip_newlines(block[pos:]))
+                break
+
+            if header is not None:
+                parts.append(_strip_newlines(block[pos:start]))
+                yield (*_split_header(header), b''.join(parts))
+            parts = []
+
+            newline = block.find(b'\n', start)
+            if newline == -1:
+                header_parts = [block[start+1:]]
+                in_header = True
+                break
+            header = block[start+1:newline]
+            pos = newline + 1
+
+        line_start = block.endswith(b'\n')
+
+    if in_header:
+        header = b''.join(header_parts)
+    if header is not None:
+        yield (*_split_header(header), b''.join(parts))
+
+    return
+
+
+def _test():
+    import doctest
+    doctest.testmod()
+    return
+
+
+if __name__ == "__main__":
+    _test()
@@ -0,0 +1,230 @@
+import io
+import os
+import sqlite3
+
+from collections import OrderedDict
+from collections.abc import Mapping
+from typing import BinaryIO, Generator, Iterator, Tuple, Type
+
+from BI.FASTA.Seq import Seq
+from BI.FASTA.Parser import parse_blocks
+
+__all__ = ('scan_records', 'RecordIndex')
+
+def scan_records(handle : BinaryIO,
+    block_size : int = 1 << 20
+    ) -> Generator[Tuple[str, int], None, None]:
+
+    """Generator function finding (title, byte offset of '>') of every record.
+    Only header lines are decoded, sequence lines are skipped by bytes.find().
+
+    Example
+    -------
+    >>> handle = io.BytesIO(b'>seq1 desc\\nACGT\\n>seq2\\nGG\\n')
+    >>> list(scan_records(handle, block_size=3))
+    [('seq1', 0), ('seq2', 16)]
+    """
+
+    pending = b''
+    base = 0
+    line_start = True
+
+    while True:
+        block = handle.read(block_size)
+        if not block:
+            break
+
+        data = pending + block
+        data_base = base - len(pending)
+        if pending or (line_start and data[:1] == b'>'):
+            pos = 0
+        else:
+            pos = data.find(b'\n>')
+            pos = pos + 1 if pos != -1 else -1
+        pending = b''
+
+        while pos != -1:
+            newline = data.find(b'\n', pos)
+            if newline == -1:
+                pending = data[pos:]
+                break
+            cols = data[pos+1:newline].split(None, 1)
+            yield cols[0].decode() if cols else '', data_base + pos
+            pos = data.find(b'\n>', newline)
+            pos = pos + 1 if pos != -1 else -1
+
+        line_start = block.endswith(b'\n')
+        base += len(block)
+
+    if pending:
+        cols = pending[1:].split(None, 1)
+        yield cols[0].decode() if cols else '', base - len(pending)
+
+    return
+
+class RecordIndex(Mapping):
+    """Read-only dictionary {title: SeqRecord} of fasta (like Bio.SeqIO.index).
+    Only title -> (byte offset, byte length) is indexed, in memory or in SQLite
+    sidecar file, and record is parsed when it is accessed. Recently accessed
+    records are kept in bounded LRU cache.
+
+    Example
+    -------
+    >>> from BI.FASTA.FASTA import FASTA
+    >>> records = RecordIndex(FASTA('./data/small.fa'))
+    >>> len(records), 'chr1' in records
+    (1, True)
+    >>> records['chr1'].seq
+    Seq(ACGTACGTACGTAAAAAAAAAAAACCCCCCCC)
+    """
+
+    def __init__(self,
+        fasta : Type['FASTA'],
+        db : str = None,
+        cache_size : int = 1024,
+        block_size : int = 1 << 20
+        ) -> None:
+
+        """Initialize RecordIndex class and build (or load) index
+
+        Parameters
+        ----------
+        fasta : FASTA
+            FASTA object (plain or BGZF compressed)
+        db : str, optional
+            Path of SQLite sidecar, by default None (index in memory).
+            Existing sidecar newer than fasta is reused.
+        cache_size : int, optional
+            Maximum number of parsed records in cache, by default 1024
+        block_size : int, optional
+            Bytes read at once while building index, by default 1 MB
+
+        Raises
+        ------
+        ValueError
+            Error occurs when fasta is gzip compressed or has duplicate title
+        """
+
+        if fasta._compressed == 'gzip':
+            raise ValueError(f'{fasta.path} is gzip compressed, random access needs BGZF (bgzip)')
+
+        self.fasta = fasta
+        self.db = db
+        self.cache_size = cache_size
+        self._cache = OrderedDict()
+        self._offsets = None
+        self._con = None
+
+        if db is None:
+            self._offsets = {}
+            for title, offset, length in self._scan(block_size):
+                if title in self._offsets:
+                    raise ValueError(f"Duplicate key '{title}'")
+                self._offsets[title] = (offset, length)
+        elif fasta._is_fresh(db):
+            self._con = sqlite3.connect(db)
+        else:
+            self._build_db(db, block_size)
+
+        return
+
+    def _scan(self, block_size: int) -> Generator[Tuple[str, int, int], None, None]:
+        """Yield (title, byte offset, byte length) of every record"""
+
+        prev = None
+        with self.fasta._open_binary() as handle:
+            for title, offset in scan_records(handle, block_size):
+                if prev is not None:
+                    yield prev[0], prev[1], offset - prev[1]
+                prev = (title, offset)
+            if prev is not None:
+                ## handle is at the end of (uncompressed) file
+                yield prev[0], prev[1], handle.tell() - prev[1]
+
+        return
+
+    def _build_db(self, db: str, block_size: int) -> None:
+        """Write index to SQLite sidecar (duplicate title violates primary key)"""
+
+        if os.path.isfile(db):
+            os.remove(db)
+        self._con = sqlite3.connect(db)
+        self._con.execute('CREATE TABLE offsets (title TEXT PRIMARY KEY, offset INTEGER, length INTEGER)')
+
+        rows = self._scan(block_size)
+        try:
+            with self._con:
+                self._con.executemany('INSERT INTO offsets VALUES (?, ?, ?)', rows)
+        except sqlite3.IntegrityError:
+            self.close()
+            os.remove(db)
+            raise ValueError(f'Duplicate key in {self.fasta.path}')
+
+        return
+
+    def _lookup(self, title: str) -> Tuple[int, int] or None:
+        if self._offsets is not None:
+            return self._offsets.get(title)
+        return self._con.execute(
+            'SELECT offset, length FROM offsets WHERE title = ?', (title,)).fetchone()
+
+    def __getitem__(self, title: str) -> Type['SeqRecord']:
+        from BI.FASTA.FASTA import SeqRecord
+
+        if title in self._cache:
+            self._cache.move_to_end(title)
+            return self._cache[title]
+
+        found = self._lookup(title)
+        if found is None:
+            raise KeyError(title)
+        offset, length = found
+
+        raw = self.fasta._read_range(offset, offset + length)
+        _, desc, seq = next(parse_blocks(io.BytesIO(raw), max(length, 1)))
+        record = SeqRecord(Seq(seq.decode()), title, desc.decode())
+
+        self._cache[title] = record
+        if len(self._cache) > self.cache_size:
+            self._cache.popitem(last=False)
+
+        return record
+
+    def __contains__(self, title: str) -> bool:
+        return self._lookup(title) is not None
+
+    def __iter__(self) -> Iterator[str]:
+        if self._offsets is not None:
+            return iter(self._offsets)
+        return (row[0] for row in self._con.execute('SELECT title FROM offsets ORDER BY offset'))
+
+    def __len__(self) -> int:
+        if self._offsets is not None:
+            return len(self._offsets)
+        return self._con.execute('SELECT COUNT(*) FROM offsets').fetchone()[0]
+
+    def close(self) -> None:
+        """Close SQLite connection and clear cache"""
+
+        if self._con is not None:
+            self._con.close()
+            self._con = None
+        self._cache.clear()
+        return
+
+    def __enter__(self) -> Type['RecordIndex']:
+        return self
+
+    def __exit__(self, *args) -> None:
+        self.close()
+        return
+
+
+def _test():
+    import doctest
+    doctest.testmod()
+    return
+
+
+if __name__ == "__main__":
+    _test()
@@ -0,0 +1,247 @@
+import os
+import threading
+
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from typing import Generator, Iterable, List, Tuple, Type
+
+from BI.FASTA.Seq import Seq
+from BI.utils._bgzf import BgzfReader
+
+__all__ = ('Region', 'read_bed', 'extract_regions')
+
+## regions are not coalesced into reads longer than this
+_MAX_READ = 1 << 24
+
+class Region:
+    """Class for recording one region to extract (FASTA.extract_regions)
+
+    Parameters
+    ----------
+    contig : str
+        Name of sequence
+    start : int
+        0-based start position (BED)
+    end : int
+        0-based exclusive end position (BED)
+    name : str, optional
+        Name of region, by default None
+    strand : str, optional
+        '+' or '-' (reverse complement), by default '+'
+    """
+
+    __slots__ = ('contig', 'start', 'end', 'name', 'strand')
+
+    def __init__(self,
+        contig : str,
+        start : int,
+        end : int,
+        name : str = None,
+        strand : str = '+'
+        ) -> None:
+
+        self.contig = contig
+        self.start = int(start)
+        self.end = int(end)
+        self.name = name
+        self.strand = strand
+
+        return
+
+    @property
+    def title(self) -> str:
+        """samtools-style region string ('contig:start-end', 1-based)"""
+        return f'{self.contig}:{self.start+1}-{self.end}'
+
+    def __repr__(self) -> str:
+        return f'Region({self.contig}, {self.start}, {self.end}, {self.name}, {self.strand})'
+
+def read_bed(path: str) -> Generator[Region, None, None]:
+    """Generator function yielding Region of every line of BED file
+    (columns after strand are ignored, header lines are skipped)
+
+    Parameters
+    ----------
+    path : str
+        Path of BED file
+
+    Yields
+    ------
+    Region
+        Region of BED line
+    """
+
+    with open(path) as handle:
+        for line in handle:
+            if not line.strip() or line.startswith(('#', 'track', 'browser')):
+                continue
+            cols = line.rstrip('\r\n').split('\t')
+            name = cols[3] if len(cols) > 3 and cols[3] not in ('', '.') else None
+            strand = cols[5] if len(cols) > 5 and cols[5] == '-' else '+'
+            yield Region(cols[0], cols[1], cols[2], name, strand)
+
+def _coalesce(
+    fasta : Type['FASTA'],
+    regions : Iterable[Region or Tuple],
+    max_gap : int
+    ) -> List[Tuple[int, int, list]]:
+
+    """Sort regions by byte offset in fasta and merge nearby regions
+    into groups read at once, [(begin, end, [(byte start, byte end, Region)])]"""
+
+    fai = fasta.load_index()
+    located = []
+    for region in regions:
+        if not isinstance(region, Region):
+            region = Region(*region)
+        record = fai[region.contig]
+        end = min(region.end, record.length)
+        if region.start < 0 or region.start > end:
+            raise ValueError(f'Invalid region {region.title}')
+        located.append((record.byte_offset(region.start), record.byte_offset(end), region))
+    located.sort(key=lambda item: (item[0], item[1]))
+
+    groups = []
+    for begin, end, region in located:
+        if groups and begin - groups[-1][1] <= max_gap and end - groups[-1][0] <= _MAX_READ:
+            group = groups[-1]
+            group[1] = max(group[1], end)
+            group[2].append((begin, end, region))
+        else:
+            groups.append([begin, end, [(begin, end, region)]])
+
+    return groups
+
+class _RangeReader:
+    """Thread-safe raw range reader of fasta, os.pread() on shared
+    file descriptor for plain file and BgzfReader per thread for BGZF"""
+
+    def __init__(self, fasta: Type['FASTA']) -> None:
+        self.fasta = fasta
+        self._local = threading.local()
+        self._fd = None
+        if fasta._compressed == 'bgzf':
+            fasta.load_index()
+            self._gzi = fasta.gzi
+        elif fasta._compressed == 'gzip':
+            raise ValueError(f'{fasta.path} is gzip compressed, random access needs BGZF (bgzip)')
+        else:
+            self._fd = os.open(fasta.path, os.O_RDONLY)
+        self._readers = []
+        return
+
+    def read(self, begin: int, end: int) -> bytes:
+        if self._fd is not None:
+            return os.pread(self._fd, end - begin, begin)
+        reader = getattr(self._local, 'reader', None)
+        if reader is None:
+            reader = self._local.reader = BgzfReader(self.fasta.path, self._gzi)
+            self._readers.append(reader)
+        return reader.read_range(begin, end)
+
+    def close(self) -> None:
+        if self._fd is not None:
+            os.close(self._fd)
+        for reader in self._readers:
+            reader.close()
+        return
+
+def _extract_group(
+    reader : _RangeReader,
+    group : Tuple[int, int, list]
+    ) -> List[Type['SeqRecord']]:
+
+    """Read one coalesced group and cut SeqRecord of every region"""
+
+    from BI.FASTA.FASTA import SeqRecord
+
+    begin, end, members = group
+    raw = reader.read(begin, end)
+    records = []
+    for start, stop, region in members:
+        seq = raw[start-begin:stop-begin].replace(b'\n', b'').replace(b'\r', b'')
+        seq = Seq(seq.decode())
+        if region.strand == '-':
+            seq = seq.reverse_complement()
+        if region.name:
+            records.append(SeqRecord(seq, region.name, f'{region.title}({region.strand})'))
+        else:
+            records.append(SeqRecord(seq, region.title, f'({region.strand})'))
+
+    return records
+
+def extract_regions(
+    fasta : Type['FASTA'],
+    regions : Iterable[Region or Tuple],
+    max_gap : int = 4096,
+    threads : int = 1
+    ) -> Generator[Type['SeqRecord'], None, None]:
+
+    """Extract many regions with sorted reads. Regions are sorted by byte offset
+    of fasta, regions closer than 'max_gap' bytes are read at once, and groups
+    could be read on thread pool (os.pread and zlib release GIL).
+    Records are yielded in file order (sorted by contig offset and start).
+
+    Example
+    -------
+    >>> from BI.FASTA.FASTA import FASTA
+    >>> fasta = FASTA('./data/small.fa')
+    >>> regions = [('chr1', 24, 28, 'r2', '-'), Region('chr1', 0, 4, 'r1')]
+    >>> for record in extract_regions(fasta, regions):
+    ...     print(record.title, record.description, record.seq)
+    r1 chr1:1-4(+) ACGT
+    r2 chr1:25-28(-) GGGG
+
+    Parameters
+    ----------
+    fasta : FASTA
+        FASTA object (plain or BGZF compressed)
+    regions : Iterable[Region or Tuple]
+        Regions or tuples (contig, start, end[, name[, strand]]), 0-based half-open
+    max_gap : int, optional
+        Maximum bytes between regions read at once, by default 4096
+    threads : int, optional
+        The number of reading threads, by default 1
+
+    Yields
+    ------
+    SeqRecord
+        Sequence of region (reverse complement for '-' strand)
+
+    Raises
+    ------
+    KeyError
+        Error occurs when contig is not in index
+    ValueError
+        Error occurs when region is invalid or fasta is gzip compressed
+    """
+
+    groups = _coalesce(fasta, regions, max_gap)
+    reader = _RangeReader(fasta)
+    try:
+        if threads <= 1:
+            for group in groups:
+                yield from _extract_group(reader, group)
+            return
+
+        ## bounded number of groups in flight
+        with ThreadPoolExecutor(threads) as executor:
+            futures = deque()
+            for group in groups:
+                futures.append(executor.submit(_extract_group, reader, group))
+                if len(futures) >= threads * 4:
+                    yield from futures.popleft().result()
+            while futures:
+                yield from futures.popleft().result()
+    finally:
+        reader.close()
+
+
+def _test():
+    import doctest
+    doctest.testmod()
+    return
+
+
+if __name__ == "__main__":
+    _test()
@@ -0,0 +1,155 @@
+from typing import BinaryIO, Dict, Iterable
+
+__all__ = ('TitleMapping', 'rename_headers')
+
+class TitleMapping:
+    """Lookup of old title -> new title streaming tab-separated mapping file.
+    Lines are read only until requested title is found, and titles read ahead
+    are stashed in dict until they are requested. If mapping file is in the
+    same order as fasta, stash stays (almost) empty for millions of renames.
+
+    Example
+    -------
+    >>> import io
+    >>> mapping = TitleMapping(io.BytesIO(b'b\\tseq2\\na\\tseq1\\n'))
+    >>> mapping[b'a'], mapping[b'b']
+    (b'seq1', b'seq2')
+    """
+
+    def __init__(self, handle: BinaryIO or Iterable[bytes]) -> None:
+        """Initialize TitleMapping class
+
+        Parameters
+        ----------
+        handle : BinaryIO or Iterable[bytes]
+            Mapping file (old_title\\tnew_title\\n) opened by binary mode
+        """
+
+        self._lines = iter(handle)
+        self._stash: Dict[bytes, bytes] = {}
+
+        return
+
+    def __getitem__(self, title: bytes) -> bytes:
+        new_title = self._stash.pop(title, None)
+        if new_title is not None:
+            return new_title
+
+        for line in self._lines:
+            cols = line.rstrip(b'\r\n').split(b'\t')
+            if len(cols) < 2:
+                continue
+            if cols[0] == title:
+                return cols[1]
+            self._stash[cols[0]] = cols[1]
+
+        raise KeyError(title.decode())
+
+def _rename_header(header: bytes, mapping: TitleMapping or Dict[bytes, bytes]) -> bytes:
+    """Return header line (without '>') whose title is replaced,
+    description and line ending are kept as they are"""
+
+    stripped = header.lstrip()
+    cols = stripped.split(None, 1)
+    title = cols[0] if cols else b''
+    return b'>' + mapping[title] + stripped[len(title):]
+
+def rename_headers(handle : BinaryIO,
+    output : BinaryIO,
+    mapping : TitleMapping or Dict[bytes, bytes],
+    block_size : int = 1 << 22
+    ) -> int:
+
+    """Copy fasta from 'handle' to 'output' replacing titles of header lines.
+    Only header lines are parsed, sequence bytes between headers are copied
+    untouched by block (memoryview slices, no per-line python work).
+
+    Example
+    -------
+    >>> import io
+    >>> output = io.BytesIO()
+    >>> handle = io.BytesIO(b'>a first\\nACGT\\nAC\\n>b\\nGG\\n')
+    >>> rename_headers(handle, output, {b'a': b'seq1', b'b': b'seq2'}, block_size=5)
+    2
+    >>> print(output.getvalue().decode(), end='')
+    >seq1 first
+    ACGT
+    AC
+    >seq2
+    GG
+
+    Parameters
+    ----------
+    handle : BinaryIO
+        Fasta file opened by binary mode
+    output : BinaryIO
+        Output opened by binary mode
+    mapping : TitleMapping or Dict[bytes, bytes]
+        Mapping of old title to new title
+    block_size : int, optional
+        Bytes read at once, by default 4 MB
+
+    Returns
+    -------
+    int
+        The number of renamed headers
+
+    Raises
+    ------
+    KeyError
+        Error occurs when title is not in mapping
+    """
+
+    renamed = 0
+    pending = b''
+    line_start = True
+
+    while True:
+        block = handle.read(block_size)
+        if not block:
+            break
+
+        ## pending is unfinished header line of previous block
+        if pending or (line_start and block[:1] == b'>'):
+            data = pending + block
+            pos = 0
+        else:
+            data = block
+            pos = block.find(b'\n>')
+            pos = pos + 1 if pos != -1 else -1
+        pending = b''
+
+        view = memoryview(data)
+        copied = 0
+        while pos != -1:
+            output.write(view[copied:pos])
+            newline = data.find(b'\n', pos)
+            if newline == -1:
+                pending = data[pos:]
+                copied = len(data)
+                break
+            output.write(_rename_header(data[pos+1:newline], mapping))
+            renamed += 1
+            copied = newline
+            pos = data.find(b'\n>', newline)
+            pos = pos + 1 if pos != -1 else -1
+        output.write(view[copied:])
+        view.release()
+
+        line_start = block.endswith(b'\n')
+
+    if pending:
+        output.write(_rename_header(pending[1:], mapping))
+        renamed += 1
+
+    return renamed
+
+
+def _test():
+    import doctest
+    doctest.testmod()
+    return
+
+
+if __name__ == "__main__":
+    _test()
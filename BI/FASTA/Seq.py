@@ -1,16 +1,44 @@
-from typing import Dict, Type
+from typing import Generator, Iterable, List, Type
+
+import numpy as np
 
 from BI.FASTA.Constant import *
+from BI.FASTA.Kmer import KmerCounts, count_kmers
+from BI.FASTA.Transform import DNA_COMPLEMENT, RNA_COMPLEMENT, DNA_TO_RNA, RNA_TO_DNA
+from BI.FASTA.Orf import OrfRecord, translate_frames, find_orfs
+from BI.FASTA.Iupac import translate_degenerate
+from BI.FASTA.Stats import composition
+from BI.utils._bunch import Bunch
 
 __all__ = ('Seq',)
 
+## precompiled translation table of complement by Seq type
+_COMPLEMENT = {'DNA': DNA_COMPLEMENT, 'RNA': RNA_COMPLEMENT}
+
+def _delete_table(chars: Iterable[str]) -> dict:
+    """str.translate() table deleting chars (both cases)"""
+    chars = ''.join(chars)
+    return str.maketrans('', '', chars.upper() + chars.lower())
+
+## valid characters of Seq.check() and 'ACGT(U)' of Seq._has_iupac() by Seq type
+_VALID_CHARS = {'DNA': _delete_table(BASE_IUPAC - {'U'}),
+                'RNA': _delete_table(BASE_IUPAC - {'T'}),
+                'Protein': _delete_table(AMINO_ACID_IUPAC)}
+_DECIDED = {'DNA': 'ACGT', 'RNA': 'ACGU'}
+_DECIDED_BASES = {type: _delete_table(bases) for type, bases in _DECIDED.items()}
+
 class Seq:
+    ## composition profile is made once when it is first needed
+    _profile = None
+    
     def __init__(self,
         data : str,
         type : str = 'DNA'
         ) -> None:
         
         """Initialize Seq class with type, sequence.
+        Sequence is immutable ('data' is read-only), so composition
+        profile cached on the instance is always valid.
         
         Parameters
         ----------
@@ -21,10 +49,37 @@ class Seq:
         """
 
         self.type = type
-        self.data = data
+        self._data = data
         
         return
     
+    @property
+    def data(self) -> str:
+        """Sequence string (read-only)"""
+        return self._data
+    
+    @property
+    def composition(self) -> Bunch:
+        
+        """Composition profile of sequence made by one histogram pass
+        and cached (see Stats.composition()).
+        
+        Example
+        -------
+        >>> profile = Seq('ACGTacgNNR').composition
+        >>> profile.counts['C'], profile.gc, profile.lower, profile.cpg
+        (2, 4, 3, 2)
+        
+        Returns
+        -------
+        Bunch
+            length, counts, gc, lower, n_count, ambiguity, cpg
+        """
+        
+        if self._profile is None:
+            self._profile = composition(self.data)
+        return self._profile
+    
     def check(self) -> bool:
         
         """Check whether initialization is normal.
@@ -35,35 +90,16 @@ class Seq:
             Is it normal content
         """
         
-        if self.type == 'DNA':
-            DNA_IUPAC = BASE_IUPAC - {'U'}
-            bases = list(set(self.data.upper()))
-            for base in bases:
-                if base not in DNA_IUPAC:
-                    print('[WARNING] Sequence has weird character.')
-                    print('[WARNING] Please check whether it is DNA sequence.')
-                    print('[WARNING] It could raise errors at methods.')
-                    return False
-        elif self.type == 'RNA':
-            RNA_IUPAC = BASE_IUPAC - {'T'}
-            bases = list(set(self.data.upper()))
-            for base in bases:
-                if base not in RNA_IUPAC:
-                    print('[WARNING] Sequence has weird character.')
-                    print('[WARNING] Please check whether it is RNA sequence.')
-                    print('[WARNING] It could raise errors at methods.')
-                    return False
-        elif self.type == 'Protein':
-            amino_acids = list(set(self.data.upper()))
-            for amino in amino_acids:
-                if amino not in AMINO_ACID_IUPAC:
-                    print('[WARNING] Sequence has weird character.')
-                    print('[WARNING] Please check whether it is Protein sequence.')
-                    print('[WARNING] It could raise errors at methods.')
-                    return False
-        else:
+        if self.type not in _VALID_CHARS:
             print('[WARNING] It only supports DNA/RNA/Protein sequences.')
             return False
+        
+        ## characters left after deleting valid ones are weird
+        if self.data.translate(_VALID_CHARS[self.type]):
+            print('[WARNING] Sequence has weird character.')
+            print(f'[WARNING] Please check whether it is {self.type} sequence.')
+            print('[WARNING] It could raise errors at methods.')
+            return False
         return True
         
     def __repr__(self) -> str:
@@ -108,6 +144,129 @@ class Seq:
         
         return str(self.data)
 
+    def _fetch(self, start: int, end: int) -> str:
+        """Return sequence string of 0-based region [start, end)"""
+        return self.data[start:end]
+
+    def __getitem__(self, key: int or slice) -> str or Type['Seq']:
+        
+        """Return base (int key) or view of region (slice key, SeqView).
+        View keeps this object and coordinates only, so slicing does not copy
+        bases until sequence string of view is requested. Slice with step
+        makes new Seq.
+        
+        Example
+        -------
+        >>> s = Seq('ACGTACGT')
+        >>> s[2:6], s[-1], s[::-1]
+        (Seq(GTAC), 'T', Seq(TGCATGCA))
+        
+        Parameters
+        ----------
+        key : int or slice
+            Index or slice of sequence
+            
+        Returns
+        -------
+        str or Seq
+            Base or SeqView (Seq for slice with step)
+        """
+        
+        from BI.FASTA.LazySeq import SeqView
+        
+        length = len(self)
+        if isinstance(key, slice):
+            start, end, step = key.indices(length)
+            if step == 1:
+                return SeqView(self, start, max(end - start, 0))
+            if step > 0:
+                return Seq(self._fetch(start, end)[::step], self.type)
+            return Seq(self._fetch(end + 1, start + 1)[::step], self.type)
+
+        if key < 0:
+            key += length
+        if not 0 <= key < length:
+            raise IndexError(f'{self.__class__.__name__} index out of range')
+        return self._fetch(key, key + 1)
+
+    def view(self,
+        start : int = 0,
+        end : int = None,
+        strand : str = '+'
+        ) -> Type['Seq']:
+        
+        """Return view of region [start, end) without copying bases.
+        '-' strand view is reverse complement of region (made when requested).
+        
+        Parameters
+        ----------
+        start : int, optional
+            0-based start position, by default 0
+        end : int, optional
+            0-based exclusive end position, by default None (end of sequence)
+        strand : str, optional
+            '+' or '-', by default '+'
+            
+        Returns
+        -------
+        SeqView
+            View of region
+            
+        Raises
+        ------
+        ValueError
+            Error occurs when region or strand is invalid
+        """
+        
+        from BI.FASTA.LazySeq import SeqView
+        
+        end = len(self) if end is None else end
+        if not 0 <= start <= end <= len(self):
+            raise ValueError(f'Invalid region {start}-{end}')
+        if strand not in ('+', '-'):
+            raise ValueError("Strand should be '+' or '-'")
+        return SeqView(self, start, end - start, strand)
+
+    def windows(self,
+        window : int,
+        step : int = None,
+        partial : bool = False
+        ) -> Generator[Type['Seq'], None, None]:
+        
+        """Generator function yielding views of fixed-size windows
+        (no bases are copied until each window is used as string).
+        
+        Example
+        -------
+        >>> list(Seq('ACGTACGTAC').windows(4, 3))
+        [Seq(ACGT), Seq(TACG), Seq(GTAC)]
+        
+        Parameters
+        ----------
+        window : int
+            Length of window
+        step : int, optional
+            Distance between starts of windows, by default None (= window)
+        partial : bool, optional
+            Yield last window shorter than 'window', by default False
+            
+        Yields
+        ------
+        SeqView
+            View of window
+        """
+        
+        from BI.FASTA.LazySeq import SeqView
+        
+        step = window if step is None else step
+        if window <= 0 or step <= 0:
+            raise ValueError('window and step must be positive')
+        
+        length = len(self)
+        last = length if partial else length - window + 1
+        for start in range(0, max(last, 0), step):
+            yield SeqView(self, start, min(window, length - start))
+
     def complement(self) -> Type['Seq']:
         
         """Make complementary sequence of self.data.
@@ -119,16 +278,8 @@ class Seq:
             Seq object which contains complementary sequence
         """
         
-        if self.type == 'DNA':
-            # watson_crick = {"A": "T", "T": "A", "G": "C", "C": "G", "N": "N"}
-            DNA_PAIR = {**{"A": "T", "T": "A", "G": "C", "C": "G", "N": "N"}, **IUPAC_PAIR}
-            self._add_lower_case(DNA_PAIR)
-            return Seq("".join([DNA_PAIR[base] for base in self.data]), self.type)
-        elif self.type == 'RNA':
-            # watson_crick = {"A": "U", "U": "A", "G": "C", "C": "G", "N": "N"}
-            RNA_PAIR = {**{"A": "U", "U": "A", "G": "C", "C": "G", "N": "N"}, **IUPAC_PAIR}
-            self._add_lower_case(RNA_PAIR)
-            return Seq("".join([RNA_PAIR[base] for base in self.data]), self.type)
+        if self.type in _COMPLEMENT:
+            return Seq(_COMPLEMENT[self.type].apply(self.data), self.type)
         else:
             print('[WARNING] Only DNA or RNA sequence can get complement seq.')
             ## return replicate Seq object
@@ -168,12 +319,61 @@ class Seq:
             Seq object which contains reverse complement sequence
         """
         
-        if self.type in ('DNA', 'RNA'):
-            rev_com = self.complement().get_data()[::-1]
+        if self.type in _COMPLEMENT:
+            rev_com = _COMPLEMENT[self.type].apply(self.data, reverse=True)
         else:
             rev_com = self.data[::-1]
         return Seq(rev_com, self.type)
 
+    @staticmethod
+    def complement_many(
+        seqs : Iterable[Type['Seq'] or str],
+        type : str = 'DNA',
+        reverse : bool = False
+        ) -> List[Type['Seq']]:
+
+        """Make (reverse) complement of many sequences by one translate()
+        call over joined sequences (PairTable.apply_many).
+
+        Example
+        -------
+        >>> Seq.complement_many([Seq('AACG'), 'TTa'], reverse=True)
+        [Seq(CGTT), Seq(tAA)]
+
+        Parameters
+        ----------
+        seqs : Iterable[Seq or str]
+            Seq objects or sequence strings of the same type
+        type : str, optional
+            Type of sequences ('DNA' or 'RNA'), by default 'DNA'
+        reverse : bool, optional
+            Make reverse complement, by default False
+
+        Returns
+        -------
+        List[Seq]
+            Seq objects in input order
+
+        Raises
+        ------
+        ValueError
+            Error occurs when type is not DNA or RNA
+        """
+
+        if type not in _COMPLEMENT:
+            raise ValueError('Only DNA or RNA sequence can get complement seq.')
+        return [Seq(data, type) for data in _COMPLEMENT[type].apply_many(seqs, reverse)]
+
+    @staticmethod
+    def reverse_complement_many(
+        seqs : Iterable[Type['Seq'] or str],
+        type : str = 'DNA'
+        ) -> List[Type['Seq']]:
+
+        """Make reverse complement of many sequences at once (see complement_many())"""
+
+        return Seq.complement_many(seqs, type, reverse=True)
+
     def _has_iupac(self, seq : str) -> bool:
         
         """Does sequence have IUPAC character not 'ACGT(U)' base.
@@ -189,12 +389,8 @@ class Seq:
             True if self.data has more than 'ACGT'
         """
         
-        if self.type == 'DNA':
-            if len(set(seq.upper()) - {'A', 'C', 'G', 'T'}) != 0:
-                return True
-        elif self.type == 'RNA':
-            if len(set(seq.upper()) - {'A', 'C', 'G', 'U'}) != 0:
-                return True
+        if self.type in _DECIDED_BASES:
+            return len(seq.translate(_DECIDED_BASES[self.type])) != 0
         return False
     
     def _warn_iupac(self, seq : str = '') -> None:
@@ -210,9 +406,13 @@ class Seq:
         """
         
         if seq == '':
-            seq = self.data
+            ## read from composition profile instead of scanning self.data
+            undecided = self.type in _DECIDED and \
+                any(char not in _DECIDED[self.type] for char in self.composition.counts)
+        else:
+            undecided = self._has_iupac(seq)
 
-        if self._has_iupac(seq):
+        if undecided:
             print('[WARNING] Sequence has undecided IUPAC codes.')
 
         return
@@ -238,8 +438,33 @@ class Seq:
         
         if verbose:
             self._warn_iupac()
+        if len(char) == 1 and char.isascii():
+            return self.composition.counts.get(char.upper(), 0)
         return self.data.upper().count(char.upper())
         
+    def count_kmers(self,
+        k : int,
+        canonical : bool = True
+        ) -> KmerCounts:
+        
+        """Count k-mers of self.data (only for DNA/RNA).
+        K-mers containing IUPAC ambiguity code are skipped.
+        
+        Parameters
+        ----------
+        k : int
+            Length of k-mer (1 ~ 31)
+        canonical : bool, optional
+            Count canonical k-mers (k-mer and reverse complement together), by default True
+            
+        Returns
+        -------
+        KmerCounts
+            Sorted k-mer count table
+        """
+        
+        return count_kmers(self.data, k, canonical)
+        
     def cal_gc_ratio(self, verbose=True) -> float or None:
         
         """Calculate GC ratio of self.data (only for DNA/RNA).
@@ -260,36 +485,71 @@ class Seq:
         if self.type == 'Protein':
             return None
         
-        gc_count = self.count('G', verbose=False) + self.count('C', verbose=False)
+        gc_count = self.composition.gc
         if verbose:
             self._warn_iupac()
-        return gc_count / len(self.data)
+        return gc_count / len(self)
 
-    def _add_lower_case(self,
-        dict : Dict[str, str]
-        ) -> None:
+    def gc_skew(self) -> float or None:
+        
+        """Calculate GC skew of self.data (only for DNA/RNA).
+        
+        GC skew = ( count of G - count of C ) / ( count of G + count of C )
+        
+        Returns
+        -------
+        float or None
+            GC skew (0.0 without G and C) or None for protein
+        """
+        
+        if self.type == 'Protein':
+            return None
         
-        """Add lower case of keys at input dictionary.
+        counts = self.composition.counts
+        g, c = counts.get('G', 0), counts.get('C', 0)
+        return (g - c) / (g + c) if g + c else 0.0
+
+    def entropy(self) -> float:
+        
+        """Calculate Shannon entropy (bits) of base or residue
+        composition of self.data (case-insensitive).
         
         Example
         -------
-        >>> dict
-        {'A': 'T'}
-        >>> self._add_lower_case(dict)
-        >>> dict
-        {'A': 'T', 'a': 't'}
+        >>> Seq('ACGTacgt').entropy(), Seq('AAAA').entropy()
+        (2.0, 0.0)
         
-        Parameters
-        ----------
-        dict : Dict[str, str]
-            input dict like DNA_PAIR, RNA_PAIR, DNA_RNA_PAIR, etc.
+        Returns
+        -------
+        float
+            Entropy (0.0 for empty sequence)
         """
         
-        for key in list(dict.keys()):
-            dict[key.lower()] = dict[key].lower()
+        counts = np.fromiter(self.composition.counts.values(), dtype=np.float64)
+        if counts.sum() == 0:
+            return 0.0
+        freqs = counts / counts.sum()
+        return float(-(freqs * np.log2(freqs)).sum()) + 0.0
 
-        return
+    def cpg_oe(self) -> float or None:
+        
+        """Calculate CpG observed/expected ratio of self.data (only for DNA).
+        
+        CpG o/e = count of CG * length of seq / ( count of C * count of G )
+        
+        Returns
+        -------
+        float or None
+            CpG o/e (0.0 without C or G) or None for RNA/protein
+        """
+        
+        if self.type != 'DNA':
+            return None
         
+        profile = self.composition
+        c, g = profile.counts.get('C', 0), profile.counts.get('G', 0)
+        return profile.cpg * profile.length / (c * g) if c and g else 0.0
+
     def transcribe(self,
         start_idx : int = 0,
         verbose : bool = True
@@ -301,10 +561,9 @@ class Seq:
         -------
         >>> s = Seq('ACGTACGTACGT')
         >>> s.transcribe()
-        ACGUACGUACGU
-        >>>     
+        Seq(ACGUACGUACGU)
         >>> s = Seq('ACGUACGUACGU', 'RNA')
-        >>> s.transcribe()
+        >>> print(s.transcribe())
         [WARNING] Transcription is only for DNA
         None
         
@@ -330,10 +589,7 @@ class Seq:
         if verbose:
             self._warn_iupac(template_dna)
 
-        DNA_RNA_PAIR = {**{'A': 'U', 'C': 'G', 'G': 'C', 'T': 'A'}, **IUPAC_PAIR}
-        self._add_lower_case(DNA_RNA_PAIR)
-        
-        return Seq(''.join([DNA_RNA_PAIR[base] for base in template_dna])[::-1], 'RNA')
+        return Seq(DNA_TO_RNA.apply(template_dna, reverse=True), 'RNA')
 
     def reverse_transcribe(self,
         start_idx : int = 0,
@@ -364,19 +620,19 @@ class Seq:
         if verbose:
             self._warn_iupac(template_rna)
 
-        RNA_DNA_PAIR = {**{'A': 'T', 'C': 'G', 'G': 'C', 'U': 'A'}, **IUPAC_PAIR}
-        self._add_lower_case(RNA_DNA_PAIR)
-        
-        return Seq(''.join([RNA_DNA_PAIR[base] for base in template_rna])[::-1], 'DNA')
+        return Seq(RNA_TO_DNA.apply(template_rna, reverse=True), 'DNA')
     
     def translate(self,
         start_idx : None or int = None,
-        verbose : bool = True
+        verbose : bool = True,
+        table : int = 1
         ) -> Type['Seq'] or None:
         
         """Translate RNA sequence to protein sequence with start index.
         If start index is None, then find ORF and translate with ORF.
         If start index is None and no ORF, return None.
+        Codons with IUPAC codes are resolved when every expansion codes
+        the same amino acid (GCN -> A), otherwise translated to 'X'.
 
         start_idx  (direction) ->->
         0123 ->->      None(16)          -5  -1
@@ -388,13 +644,15 @@ class Seq:
         -------
         >>> s = Seq('AAUGAUGAUGAUGUGAAAAAA', 'RNA')
         >>> s.translate()
-        MMMM
+        Seq(MMMM)
         >>> s.translate(0)
-        NDDDVKK
+        Seq(NDDDVKK)
         >>> s.translate(-3)
-        K
+        Seq(K)
         >>> s.translate(-6)
-        KK
+        Seq(KK)
+        >>> Seq('AUGGCNAAYCAR', 'RNA').translate(verbose=False)
+        Seq(MANQ)
         
         Parameters
         ----------
@@ -402,6 +660,8 @@ class Seq:
             Start index for translation, by default None
         verbose : bool, optional
             Print warning message, by default True
+        table : int, optional
+            NCBI genetic code id, by default 1 (Standard)
             
         Returns
         -------
@@ -417,25 +677,17 @@ class Seq:
         ## find first 'AUG' sequence (ORF)
         if start_idx == None:
             start_idx = self.data.upper().find('AUG')
-        template_rna = self.data[start_idx:].upper()
-        if self._has_iupac(template_rna):
-            if verbose:
-                self._warn_iupac(template_rna)
-            return None
+        template_rna = self.data[start_idx:]
+        if verbose and template_rna:
+            self._warn_iupac(template_rna)
 
-        step = 3        
-        protein = ""
-        for i in range(0, len(template_rna), step):
-            codon = template_rna[i:i+3]
-            try:
-                amino_acid = CODON_TABLE[codon]
-                protein += amino_acid
-                if amino_acid == "":
-                    break
-            except KeyError:
-                break
+        ## translation stops at stop codon or codon with non-IUPAC character
+        amino_acids = translate_degenerate(template_rna, table, 'RNA')
+        stops = np.flatnonzero((amino_acids == ord('*')) | (amino_acids == 0))
+        if len(stops):
+            amino_acids = amino_acids[:stops[0]]
 
-        return Seq(protein, 'Protein')
+        return Seq(amino_acids.tobytes().decode(), 'Protein')
 
     def find_orf(self) -> int or None:
         
@@ -461,31 +713,70 @@ class Seq:
                 return -1*(start_idx % 3 + 1)
             except ValueError:
                 return None
+
+    def translate_frames(self, table: int = 1) -> List[Type['Seq']] or None:
         
-    
+        """Translate six frames (+1, +2, +3, -1, -2, -3) of self.data
+        by vectorized codon lookup (only for DNA/RNA, see translate_frames()).
+        
+        Parameters
+        ----------
+        table : int, optional
+            NCBI genetic code id, by default 1 (Standard)
+            
+        Returns
+        -------
+        List[Seq] or None
+            Protein Seq objects of six frames ('*' is stop, 'X' is unknown codon)
+        """
+        
+        if self.type == 'Protein':
+            print('[WARNING] Translation is only for DNA or RNA')
+            return None
+        return [Seq(protein, 'Protein') for protein in translate_frames(self.data, table)]
+
+    def find_orfs(self,
+        min_len : int = 75,
+        table : int = 1,
+        require_start : bool = True,
+        partial : bool = False
+        ) -> List[OrfRecord]:
+        
+        """Find every ORF of six frames of self.data (only for DNA/RNA, see find_orfs()).
+        
+        Example
+        -------
+        >>> Seq('CCATGAAATTTTAGCC').find_orfs(min_len=6)
+        [OrfRecord(:3-14(+), frame=3, 3 aa)]
+        
+        Parameters
+        ----------
+        min_len : int, optional
+            Minimum length of ORF (nucleotides, stop codon excluded), by default 75
+        table : int, optional
+            NCBI genetic code id, by default 1 (Standard)
+        require_start : bool, optional
+            ORF should begin with start codon, by default True
+        partial : bool, optional
+            Report ORF without stop codon at the end of sequence, by default False
+            
+        Returns
+        -------
+        List[OrfRecord]
+            ORFs sorted by position
+        """
+        
+        if self.type == 'Protein':
+            print('[WARNING] ORF is only for DNA or RNA')
+            return []
+        return find_orfs(self.data, '', min_len, table, require_start, partial)
+
+
+def _test():
+    import doctest
+    doctest.testmod()
+    return
+
+
 if __name__ == "__main__":
-    
-    # test_seq = 'ATGCTAGTCAGTCGTAGCTATTTGTACGTATCGATCTACTAGC'
-    # print(test_seq)
-    
-    # temp = Seq(test_seq, 'DNA')
-    # print(temp.check())
-    # print(temp.complement())
-    # print(temp.reverse())
-    # print(temp.reverse_complement())
-    # print(temp.count('a'))
-    # print(temp.cal_gc_ratio())
-    # print(temp.transcribe(-1))
-    # print(temp._has_iupac())
-    
-    test_seq = 'AAUGAUGAUGAUGUGAAAAAA'
-    # # test_seq = 'AUGAAAAAAAAAAUAA'
-    # # test_seq = 'AAAAAAAAGUAAA'
-    # # test_seq = 'AAAAAAAAAAAAC'
-    temp = Seq(test_seq, 'RNA')
-    # print(temp.translate())
-    # print(temp.translate(1))
-    # print(temp.translate(3))
-    # print(temp.translate(-3))
-    # print(temp.find_orf())
-    print(temp.reverse_transcribe().get_data())
\ No newline at end of file
+    _test()
@@ -0,0 +1,345 @@
+import mmap
+import struct
+
+from collections.abc import Mapping
+from typing import Generator, Iterable, Iterator, List, Tuple, Type
+
+import numpy as np
+
+from BI.FASTA.Seq import Seq
+from BI.FASTA.Index import FaiRecord
+from BI.FASTA.LazySeq import MappedSeq
+from BI.FASTA.TwoBit import PackedSeq
+
+__all__ = ('SeqPackWriter', 'SeqPack')
+
+## header : magic, version, flags, the number of records, offset of table
+SEQPACK_MAGIC = b'BISP'
+SEQPACK_VERSION = 1
+_HEADER = struct.Struct('<4sIIQQ')
+_FLAG_PACKED = 1
+
+class SeqPackWriter:
+    """Class for writing sequences to compact binary container (SeqPack).
+    Sequences are streamed to one contiguous blob right after header, and
+    record table (offsets, lengths, titles, descriptions and N/mask blocks of
+    2-bit packed sequences) is written as column arrays at the end of file,
+    so millions of records are reopened by mmap without parsing text.
+
+    Layout
+    ------
+    HEADER : magic 'BISP', version, flags, the number of records, table offset
+    BLOB   : sequences (ASCII without newlines, or 2-bit packed)
+    TABLE  : offsets (u64), lengths (u64), title lengths (u32),
+             description lengths (u32), titles, descriptions,
+             [packed only] N block counts (u32), mask block counts (u32),
+             N blocks (u32 start, size), mask blocks (u32 start, size)
+
+    Example
+    -------
+    >>> import os, tempfile
+    >>> path = os.path.join(tempfile.mkdtemp(), 'seqs.bisp')
+    >>> with SeqPackWriter(path, packed=True) as writer:
+    ...     writer.write('seq1', 'ACGTNNacgt', 'first')
+    ...     writer.write('seq2', 'GGCC')
+    >>> with SeqPack(path) as pack:
+    ...     print(pack.names, pack['seq1'].seq, pack.fetch('seq2', 1, 3))
+    ['seq1', 'seq2'] ACGTNNacgt GC
+    """
+
+    def __init__(self,
+        path : str,
+        packed : bool = False
+        ) -> None:
+
+        """Initialize SeqPackWriter class and open output file
+
+        Parameters
+        ----------
+        path : str
+            Path of output file
+        packed : bool, optional
+            Pack sequences by 2 bits per base, by default False.
+            Like .2bit, non-ACGT IUPAC codes are stored as 'N'.
+        """
+
+        self.path = path
+        self.packed = packed
+        self._handle = open(path, 'wb')
+        self._handle.write(_HEADER.pack(SEQPACK_MAGIC, SEQPACK_VERSION, 0, 0, 0))
+        self._offset = _HEADER.size
+
+        self._offsets: List[int] = []
+        self._lengths: List[int] = []
+        self._titles: List[bytes] = []
+        self._descs: List[bytes] = []
+        self._n_blocks: List[List[Tuple[int, int]]] = []
+        self._mask_blocks: List[List[Tuple[int, int]]] = []
+
+        return
+
+    def write(self,
+        title : str,
+        sequence : str,
+        desc : str = None
+        ) -> None:
+
+        """Write one record
+
+        Parameters
+        ----------
+        title : str
+            Title of sequence
+        sequence : str
+            Sequence string (or Seq, PackedSeq is written without repacking)
+        desc : str, optional
+            Description of sequence, by default None
+        """
+
+        if self.packed:
+            if not isinstance(sequence, PackedSeq):
+                sequence = PackedSeq.from_string(str(sequence))
+            data = sequence.packed
+            length = sequence.length
+            self._n_blocks.append(sequence.n_blocks)
+            self._mask_blocks.append(sequence.mask_blocks)
+        else:
+            data = str(sequence).encode()
+            if b'\n' in data:
+                data = data.replace(b'\n', b'').replace(b'\r', b'')
+            length = len(data)
+
+        self._handle.write(data)
+        self._offsets.append(self._offset)
+        self._lengths.append(length)
+        self._titles.append(title.encode())
+        self._descs.append((desc or '').encode())
+        self._offset += len(data)
+
+        return
+
+    def write_records(self, records: Iterable[Type['SeqRecord']]) -> None:
+        """Write every record of iterable (SeqRecord)"""
+
+        for record in records:
+            self.write(record.title, record.seq, record.description)
+        return
+
+    def close(self) -> None:
+        """Write record table and header, and close file"""
+
+        if self._handle is None:
+            return
+
+        columns = [np.array(self._offsets, dtype='<u8'),
+                   np.array(self._lengths, dtype='<u8'),
+                   np.array([len(title) for title in self._titles], dtype='<u4'),
+                   np.array([len(desc) for desc in self._descs], dtype='<u4')]
+        blobs = [b''.join(self._titles), b''.join(self._descs)]
+        if self.packed:
+            blobs += [np.array([len(blocks) for blocks in self._n_blocks], dtype='<u4').tobytes(),
+                      np.array([len(blocks) for blocks in self._mask_blocks], dtype='<u4').tobytes()]
+            for blocks_list in (self._n_blocks, self._mask_blocks):
+                flat = [value for blocks in blocks_list for block in blocks for value in block]
+                blobs.append(np.array(flat, dtype='<u4').tobytes())
+
+        for data in [column.tobytes() for column in columns] + blobs:
+            self._handle.write(data)
+
+        flags = _FLAG_PACKED if self.packed else 0
+        self._handle.seek(0)
+        self._handle.write(_HEADER.pack(SEQPACK_MAGIC, SEQPACK_VERSION, flags,
+                                        len(self._offsets), self._offset))
+        self._handle.close()
+        self._handle = None
+
+        return
+
+    def __enter__(self) -> Type['SeqPackWriter']:
+        return self
+
+    def __exit__(self, *args) -> None:
+        self.close()
+        return
+
+
+class SeqPack(Mapping):
+    """Read-only dictionary {title: SeqRecord} of SeqPack container file.
+    File is memory-mapped and record table is read as numpy arrays, so
+    reopening takes milliseconds. Titles and descriptions stay as bytes of
+    mapped file (decoded on access), and {title: index} lookup is built
+    at the first access by name. Sequences are lazy views (MappedSeq or
+    PackedSeq) over the mapped file, nothing is decoded before slicing.
+    """
+
+    def __init__(self, path: str) -> None:
+        """Initialize SeqPack class and map file
+
+        Parameters
+        ----------
+        path : str
+            Path of SeqPack file
+
+        Raises
+        ------
+        ValueError
+            Error occurs when file is not SeqPack or version is not supported
+        """
+
+        self.path = path
+        self._handle = open(path, 'rb')
+        self._mmap = mmap.mmap(self._handle.fileno(), 0, access=mmap.ACCESS_READ)
+
+        magic, version, flags, count, table = _HEADER.unpack_from(self._mmap, 0)
+        if magic != SEQPACK_MAGIC:
+            raise ValueError(f'{path} is not SeqPack file')
+        if version != SEQPACK_VERSION:
+            raise ValueError(f'Version {version} of SeqPack is not supported')
+        self.packed = bool(flags & _FLAG_PACKED)
+
+        def column(dtype: str, size: int) -> np.ndarray:
+            nonlocal table
+            array = np.frombuffer(self._mmap, dtype=dtype, count=size, offset=table)
+            table += array.nbytes
+            return array
+
+        def strings(lengths: np.ndarray) -> np.ndarray:
+            ## absolute [start, end) offsets of every string in mapped file
+            nonlocal table
+            bounds = np.concatenate(([table], table + np.cumsum(lengths, dtype=np.int64)))
+            table = int(bounds[-1])
+            return bounds
+
+        self._count = count
+        self._offsets = column('<u8', count)
+        self._lengths = column('<u8', count)
+        title_lengths = column('<u4', count)
+        desc_lengths = column('<u4', count)
+        self._title_bounds = strings(title_lengths)
+        self._desc_bounds = strings(desc_lengths)
+        self._names = None
+        self._index = None
+
+        if self.packed:
+            n_counts = column('<u4', count)
+            mask_counts = column('<u4', count)
+            n_blocks = column('<u4', int(n_counts.sum()) * 2).reshape(-1, 2)
+            mask_blocks = column('<u4', int(mask_counts.sum()) * 2).reshape(-1, 2)
+            self._n_starts = np.concatenate(([0], np.cumsum(n_counts, dtype=np.int64)))
+            self._mask_starts = np.concatenate(([0], np.cumsum(mask_counts, dtype=np.int64)))
+            self._n_blocks = n_blocks
+            self._mask_blocks = mask_blocks
+
+        return
+
+    def _string(self, bounds: np.ndarray, idx: int) -> str:
+        return self._mmap[int(bounds[idx]):int(bounds[idx+1])].decode()
+
+    @property
+    def names(self) -> List[str]:
+        """Titles of records in file order (decoded at the first access)"""
+
+        if self._names is None:
+            start, end = int(self._title_bounds[0]), int(self._title_bounds[-1])
+            blob = self._mmap[start:end]
+            if blob.isascii():
+                ## one decode, byte offsets are character offsets
+                text = blob.decode()
+                bounds = (self._title_bounds - start).tolist()
+                self._names = [text[i:j] for i, j in zip(bounds[:-1], bounds[1:])]
+            else:
+                self._names = [self._string(self._title_bounds, idx) for idx in range(self._count)]
+        return self._names
+
+    def _lookup(self, name: str) -> int:
+        """Return index of record 'name' (the last one if duplicated),
+        {title: index} lookup is built at the first call"""
+
+        if self._index is None:
+            self._index = {title: idx for idx, title in enumerate(self.names)}
+        return self._index[name]
+
+    def get_seq(self, name: str) -> Seq:
+        """Return lazy sequence (MappedSeq or PackedSeq) of record 'name'"""
+
+        return self._get_seq(self._lookup(name), name)
+
+    def _get_seq(self, idx: int, name: str) -> Seq:
+        offset, length = int(self._offsets[idx]), int(self._lengths[idx])
+
+        if not self.packed:
+            ## sequence is one line without newline (line longer than sequence)
+            return MappedSeq(self._mmap, FaiRecord(name, length, offset, length + 1, length + 2))
+
+        view = memoryview(self._mmap)[offset:offset + (length + 3) // 4]
+        n_blocks = self._n_blocks[self._n_starts[idx]:self._n_starts[idx+1]]
+        mask_blocks = self._mask_blocks[self._mask_starts[idx]:self._mask_starts[idx+1]]
+        return PackedSeq(view, length,
+                         [tuple(block) for block in n_blocks.tolist()],
+                         [tuple(block) for block in mask_blocks.tolist()])
+
+    def fetch(self,
+        name : str,
+        start : int = None,
+        end : int = None
+        ) -> Seq:
+
+        """Return sequence of 0-based region [start, end) of record 'name'"""
+
+        return self.get_seq(name)[start:end]
+
+    def __getitem__(self, name: str) -> Type['SeqRecord']:
+        from BI.FASTA.FASTA import SeqRecord
+
+        idx = self._lookup(name)
+        return SeqRecord(self._get_seq(idx, name), name, self._string(self._desc_bounds, idx))
+
+    def __contains__(self, name: str) -> bool:
+        try:
+            self._lookup(name)
+        except KeyError:
+            return False
+        return True
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self.names)
+
+    def __len__(self) -> int:
+        return self._count
+
+    def reader(self) -> Generator[Type['SeqRecord'], None, None]:
+        """Generator function yielding SeqRecord of every record in file order"""
+
+        from BI.FASTA.FASTA import SeqRecord
+
+        ## file order, so records are taken by index without name lookup
+        for idx, name in enumerate(self.names):
+            seq = self._get_seq(idx, name)
+            yield SeqRecord(seq, name, self._string(self._desc_bounds, idx))
+
+    def close(self) -> None:
+        """Close file. Mapping is released when the last lazy sequence is released."""
+
+        self._mmap = None
+        self._offsets = self._lengths = None
+        if self.packed:
+            self._n_blocks = self._mask_blocks = None
+        self._handle.close()
+        return
+
+    def __enter__(self) -> Type['SeqPack']:
+        return self
+
+    def __exit__(self, *args) -> None:
+        self.close()
+        return
+
+
+def _test():
+    import doctest
+    doctest.testmod()
+    return
+
+
+if __name__ == "__main__":
+    _test()
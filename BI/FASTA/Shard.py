@@ -0,0 +1,249 @@
+import heapq
+import json
+
+from typing import Generator, List, Tuple, Type
+
+from BI.FASTA.Index import FaiRecord
+from BI.FASTA.Parser import parse_blocks
+from BI.utils._bgzf import BgzfWriter
+
+__all__ = ('Shard', 'record_end', 'plan_shards', 'write_shards', 'load_shards', 'read_shard')
+
+class Shard:
+    """Class for recording one shard of fasta (FASTA.shard).
+    Shard is a set of whole records, described by byte ranges [begin, end)
+    of uncompressed fasta, so it can be sent to other node as small descriptor.
+
+    Parameters
+    ----------
+    index : int
+        0-based number of shard
+    names : List[str]
+        Names of records in file order
+    ranges : List[Tuple[int, int]]
+        Byte ranges (header and sequence lines) of records, adjacent ranges are merged
+    length : int
+        Total sequence length (bases) of records
+    """
+
+    __slots__ = ('index', 'names', 'ranges', 'length')
+
+    def __init__(self,
+        index : int,
+        names : List[str],
+        ranges : List[Tuple[int, int]],
+        length : int
+        ) -> None:
+
+        self.index = int(index)
+        self.names = list(names)
+        self.ranges = [(int(begin), int(end)) for begin, end in ranges]
+        self.length = int(length)
+
+        return
+
+    def to_dict(self) -> dict:
+        return {'index': self.index, 'names': self.names,
+                'ranges': self.ranges, 'length': self.length}
+
+    @classmethod
+    def from_dict(cls, data: dict) -> Type['Shard']:
+        return cls(data['index'], data['names'], data['ranges'], data['length'])
+
+    def __len__(self) -> int:
+        return len(self.names)
+
+    def __repr__(self) -> str:
+        return f'Shard({self.index}, {len(self.names)} records, {self.length} bases, {self.ranges})'
+
+def record_end(record: FaiRecord) -> int:
+    """Return byte offset just after the last sequence line (newline included)
+    of .fai record, same geometry as FaiRecord.byte_offset()
+
+    Example
+    -------
+    >>> record_end(FaiRecord('chr1', 32, 24, 8, 9)), record_end(FaiRecord('chr2', 10, 70, 8, 9))
+    (60, 82)
+    """
+
+    if record.linebases == 0:
+        return record.offset
+    lines, rest = divmod(record.length, record.linebases)
+    end = record.offset + lines * record.linewidth
+    if rest:
+        end += rest + record.linewidth - record.linebases
+    return end
+
+def plan_shards(records: List[FaiRecord], n: int) -> List[Shard]:
+    """Partition records into 'n' shards of balanced total sequence length by
+    longest processing time rule: records are assigned from the longest to
+    the lightest shard (heapq), so the largest shard is at most 4/3 of optimum.
+    Byte range of record starts at the end of previous record, so header
+    (and blank lines before it) belongs to the record.
+
+    Example
+    -------
+    >>> records = [FaiRecord('a', 100, 3, 100, 101), FaiRecord('b', 60, 108, 60, 61),
+    ...            FaiRecord('c', 50, 173, 50, 51), FaiRecord('d', 30, 228, 30, 31)]
+    >>> for shard in plan_shards(records, 2):
+    ...     print(shard)
+    Shard(0, 2 records, 130 bases, [(0, 104), (224, 259)])
+    Shard(1, 2 records, 110 bases, [(104, 224)])
+
+    Parameters
+    ----------
+    records : List[FaiRecord]
+        Records of .fai index in file order
+    n : int
+        The number of shards
+
+    Returns
+    -------
+    List[Shard]
+        Shards (records in file order), shards could be empty if n > len(records)
+
+    Raises
+    ------
+    ValueError
+        Error occurs when n is not positive
+    """
+
+    if n <= 0:
+        raise ValueError('The number of shards should be positive')
+
+    spans, begin = [], 0
+    for record in records:
+        end = record_end(record)
+        spans.append((begin, end))
+        begin = end
+
+    loads = [(0, i) for i in range(n)]
+    members = [[] for _ in range(n)]
+    for i in sorted(range(len(records)), key=lambda i: -records[i].length):
+        load, shard = heapq.heappop(loads)
+        members[shard].append(i)
+        heapq.heappush(loads, (load + records[i].length, shard))
+
+    shards = []
+    for shard, items in enumerate(members):
+        items.sort()
+        ranges = []
+        for i in items:
+            begin, end = spans[i]
+            if ranges and ranges[-1][1] == begin:
+                ranges[-1] = (ranges[-1][0], end)
+            else:
+                ranges.append((begin, end))
+        shards.append(Shard(shard, [records[i].name for i in items], ranges,
+                            sum(records[i].length for i in items)))
+
+    return shards
+
+def write_shards(fasta : Type['FASTA'],
+    shards : List[Shard],
+    output : str,
+    block_size : int = 1 << 22
+    ) -> List[str]:
+
+    """Write every shard to fasta file by one sequential pass over fasta.
+    Byte ranges are copied untouched (no parsing), so gzip (not BGZF) fasta
+    is also supported. Output is BGZF compressed if its name ends with '.gz' or '.bgz'.
+
+    Parameters
+    ----------
+    fasta : FASTA
+        FASTA instance
+    shards : List[Shard]
+        Shards of fasta (plan_shards())
+    output : str
+        Path of shard files with '{}' replaced by shard index (e.g. 'part{}.fa')
+    block_size : int, optional
+        Bytes copied at once, by default 4 MB
+
+    Returns
+    -------
+    List[str]
+        Paths of written shard files
+    """
+
+    paths = [output.format(shard.index) for shard in shards]
+    if len(set(paths)) != len(paths):
+        raise ValueError(f"Output '{output}' should contain '{{}}' for shard index")
+
+    pieces = sorted((begin, end, i) for i, shard in enumerate(shards)
+                    for begin, end in shard.ranges)
+    outputs = []
+    try:
+        for path in paths:
+            outputs.append(BgzfWriter(path) if path.endswith(('.gz', '.bgz')) else open(path, 'wb'))
+
+        with fasta._open_binary() as handle:
+            for begin, end, i in pieces:
+                block = b''
+                ## pieces are sorted, so gzip stream is only seeked forward
+                handle.seek(begin)
+                remain = end - begin
+                while remain > 0:
+                    block = handle.read(min(block_size, remain))
+                    if not block:
+                        break
+                    outputs[i].write(block)
+                    remain -= len(block)
+                if block and not block.endswith(b'\n'):
+                    outputs[i].write(b'\n')
+    finally:
+        for handle in outputs:
+            handle.close()
+
+    return paths
+
+def load_shards(path: str) -> Tuple[str, List[Shard]]:
+    """Load (fasta path, shards) from json descriptor written by FASTA.shard()"""
+
+    with open(path) as handle:
+        data = json.load(handle)
+    return data['path'], [Shard.from_dict(shard) for shard in data['shards']]
+
+class _RangeStream:
+    """Read-only file-like object concatenating byte ranges of fasta"""
+
+    def __init__(self, fasta: Type['FASTA'], ranges: List[Tuple[int, int]]) -> None:
+        self.fasta = fasta
+        self.ranges = list(ranges)
+        self.pos = self.ranges[0][0] if self.ranges else 0
+        return
+
+    def read(self, size: int) -> bytes:
+        while self.ranges:
+            begin, end = self.ranges[0]
+            if self.pos < end:
+                stop = min(self.pos + size, end)
+                data = self.fasta._read_range(self.pos, stop)
+                if data:
+                    self.pos = stop
+                    return data
+            ## end of range (or end of file)
+            self.ranges.pop(0)
+            if self.ranges:
+                self.pos = self.ranges[0][0]
+        return b''
+
+def read_shard(fasta : Type['FASTA'],
+    shard : Shard,
+    block_size : int = 1 << 20
+    ) -> Generator[Tuple[bytes, bytes, bytes], None, None]:
+
+    """Generator function parsing records of shard (parse_blocks()) by
+    reading its byte ranges only (plain or BGZF fasta)"""
+
+    yield from parse_blocks(_RangeStream(fasta, shard.ranges), block_size)
+
+
+def _test():
+    import doctest
+    doctest.testmod()
+    return
+
+
+if __name__ == "__main__":
+    _test()
@@ -0,0 +1,285 @@
+from multiprocessing import Pool
+from typing import Dict, List, Tuple
+
+import numpy as np
+
+from BI.FASTA.Constant import *
+from BI.utils._bunch import Bunch
+
+__all__ = ('byte_histogram', 'count_bases', 'composition', 'record_stats',
+           'assembly_stats', 'fasta_stats')
+
+## IUPAC ambiguity codes (N is counted separately)
+AMBIGUITY_CODES = tuple(sorted(BASE_IUPAC - {'A', 'C', 'G', 'T', 'U', 'N'}))
+SYMBOLS = tuple(code.encode() for code in ('A', 'C', 'G', 'T', 'U', 'N') + AMBIGUITY_CODES)
+
+_NEWLINES = b'\r\n'
+## byte ranges of upper and lower case letters
+_UPPER = slice(ord('A'), ord('Z') + 1)
+_LOWER = slice(ord('a'), ord('z') + 1)
+
+def byte_histogram(seq: bytes or np.ndarray) -> np.ndarray:
+    """Count every byte value (256) of sequence (or np.uint8 array)
+    by one np.bincount() pass"""
+
+    if not isinstance(seq, np.ndarray):
+        seq = np.frombuffer(seq, dtype=np.uint8)
+    return np.bincount(seq, minlength=256)
+
+def count_bases(seq: bytes) -> Dict[str, int]:
+    """Count bases of raw sequence bytes (newlines are ignored).
+    Every count is read from one byte histogram (byte_histogram()),
+    sequence is not iterated by python loop.
+
+    Example
+    -------
+    >>> counts = count_bases(b'ACGTacgtNNRY\\n')
+    >>> counts['G'], counts['N'], counts['R'], counts['lower'], counts['length']
+    (2, 2, 1, 4, 12)
+
+    Parameters
+    ----------
+    seq : bytes
+        Raw sequence bytes (could contain newlines)
+
+    Returns
+    -------
+    Dict[str, int]
+        Count of each IUPAC code (upper case), 'lower' (soft-masked)
+        and 'length'
+    """
+
+    hist = byte_histogram(seq)
+    hist[list(_NEWLINES)] = 0
+    counts = {symbol.decode(): int(hist[symbol[0]] + hist[symbol[0] | 32]) for symbol in SYMBOLS}
+    counts['lower'] = int(hist[_LOWER].sum())
+    counts['length'] = int(hist.sum())
+
+    return counts
+
+def composition(seq: str or bytes) -> Bunch:
+    """Make composition profile of sequence (without newlines) from one
+    byte histogram (byte_histogram()), plus CpG dinucleotide count
+    compared on the same byte array (no upper case copy).
+    Counts are case-insensitive (keyed by upper case), soft-masked
+    (lower case) letters are also counted separately.
+
+    Example
+    -------
+    >>> profile = composition('ACGTacgNNR')
+    >>> profile.counts
+    {'A': 2, 'C': 2, 'G': 2, 'N': 2, 'R': 1, 'T': 1}
+    >>> profile.length, profile.gc, profile.lower, profile.n_count, profile.ambiguity, profile.cpg
+    (10, 4, 3, 2, {'R': 1}, 2)
+    >>> profile = composition('ACGÉ')
+    >>> profile.length, sum(profile.counts.values())
+    (5, 5)
+
+    Parameters
+    ----------
+    seq : str or bytes
+        Sequence (DNA, RNA or protein), str is counted by its UTF-8 bytes,
+        so non-ASCII character counts as its bytes in counts and length
+
+    Returns
+    -------
+    Bunch
+        length, counts (every character), gc (G + C), lower (soft-masked),
+        n_count, ambiguity (counts of ambiguity codes except N), cpg ('CG' count)
+    """
+
+    if isinstance(seq, str):
+        seq = seq.encode()
+
+    codes = np.frombuffer(seq, dtype=np.uint8)
+    hist = byte_histogram(codes)
+    folded = hist.copy()
+    folded[_UPPER] += hist[_LOWER]
+    folded[_LOWER] = 0
+    counts = {chr(code): int(folded[code]) for code in np.flatnonzero(folded).tolist()}
+
+    ## clearing bit 5 folds 'c' and 'g' to 'C' (67) and 'G' (71)
+    folded_codes = codes & 0xDF
+    cpg = int(np.count_nonzero((folded_codes[:-1] == 67) & (folded_codes[1:] == 71)))
+
+    return Bunch(length=len(seq),
+                 counts=counts,
+                 gc=counts.get('G', 0) + counts.get('C', 0),
+                 lower=int(hist[_LOWER].sum()),
+                 n_count=counts.get('N', 0),
+                 ambiguity={code: counts[code] for code in AMBIGUITY_CODES if code in counts},
+                 cpg=cpg)
+
+def _merge_counts(total: Dict[str, int], counts: Dict[str, int]) -> None:
+    for key, value in counts.items():
+        total[key] = total.get(key, 0) + value
+    return
+
+def record_stats(title: str, counts: Dict[str, int]) -> Bunch:
+    """Make statistics of one record from count_bases() result
+
+    Parameters
+    ----------
+    title : str
+        Title of record
+    counts : Dict[str, int]
+        Result of count_bases()
+
+    Returns
+    -------
+    Bunch
+        title, length, gc_ratio, n_count, masked_ratio, iupac
+        (counts of ambiguity codes except N) and base counts (A, C, G, T, U)
+    """
+
+    length = counts['length']
+    gc = counts['G'] + counts['C']
+
+    return Bunch(title=title,
+                 length=length,
+                 A=counts['A'], C=counts['C'], G=counts['G'], T=counts['T'], U=counts['U'],
+                 gc_ratio=gc / length if length else 0.0,
+                 n_count=counts['N'],
+                 masked_ratio=counts['lower'] / length if length else 0.0,
+                 iupac={code: counts[code] for code in AMBIGUITY_CODES if counts[code]})
+
+def assembly_stats(records: List[Bunch]) -> Bunch:
+    """Summarize record statistics like seqkit stats (N50, L50, ...)
+
+    Example
+    -------
+    >>> records = [Bunch(length=l, gc_ratio=0.5, n_count=0) for l in (10, 20, 30, 40)]
+    >>> summary = assembly_stats(records)
+    >>> summary.N50, summary.L50, summary.sum_len
+    (30, 2, 100)
+
+    Parameters
+    ----------
+    records : List[Bunch]
+        Results of record_stats()
+
+    Returns
+    -------
+    Bunch
+        records, num_seqs, sum_len, min_len, avg_len, max_len,
+        N50, L50, gc_ratio, n_count
+    """
+
+    lengths = sorted((record.length for record in records), reverse=True)
+    sum_len = sum(lengths)
+
+    n50 = l50 = 0
+    cumulative = 0
+    for i, length in enumerate(lengths):
+        cumulative += length
+        if cumulative * 2 >= sum_len:
+            n50, l50 = length, i + 1
+            break
+
+    gc = sum(record.gc_ratio * record.length for record in records)
+
+    return Bunch(records=records,
+                 num_seqs=len(lengths),
+                 sum_len=sum_len,
+                 min_len=lengths[-1] if lengths else 0,
+                 avg_len=sum_len / len(lengths) if lengths else 0.0,
+                 max_len=lengths[0] if lengths else 0,
+                 N50=n50,
+                 L50=l50,
+                 gc_ratio=gc / sum_len if sum_len else 0.0,
+                 n_count=sum(record.n_count for record in records))
+
+def _count_region(fasta, name: str, start: int, end: int) -> Dict[str, int]:
+    """Count bases of region [start, end) by .fai index"""
+
+    record = fasta.load_index()[name]
+    raw = fasta._read_range(record.byte_offset(start), record.byte_offset(end))
+    return count_bases(raw)
+
+def _count_range(task: Tuple[str, str, int, int]) -> Tuple[str, Dict[str, int]]:
+    """Pool worker of _count_region()"""
+
+    from BI.FASTA.FASTA import _worker_fasta
+
+    path, name, start, end = task
+    return name, _count_region(_worker_fasta(path), name, start, end)
+
+def _stream_counts(handle, block_size: int) -> Tuple[str, Dict[str, int]]:
+    """Generator yielding (title, counts) by one streaming pass over handle,
+    sequence lines are counted by blocks of 'block_size' bytes."""
+
+    title = None
+    for line in handle:
+        if line.startswith(b'>'):
+            if title is not None:
+                _merge_counts(counts, count_bases(b''.join(block)))
+                yield title, counts
+            title = line[1:].split(None, 1)[0].decode() if line[1:].strip() else ''
+            counts, block, size = {}, [], 0
+        elif title is not None:
+            block.append(line)
+            size += len(line)
+            if size >= block_size:
+                _merge_counts(counts, count_bases(b''.join(block)))
+                block, size = [], 0
+    if title is not None:
+        _merge_counts(counts, count_bases(b''.join(block)))
+        yield title, counts
+
+def fasta_stats(fasta,
+    processes : int = 1,
+    chunk_size : int = 10_000_000
+    ) -> Bunch:
+
+    """Calculate statistics of every record of fasta and summary.
+    Contigs are split into ranges of 'chunk_size' bases by .fai index
+    and counted in process pool, so a few huge contigs are also balanced.
+    gzip (not BGZF) fasta is streamed in single process.
+
+    Parameters
+    ----------
+    fasta : FASTA
+        FASTA instance
+    processes : int, optional
+        The number of processes, by default 1
+    chunk_size : int, optional
+        The number of bases per task, by default 10,000,000
+
+    Returns
+    -------
+    Bunch
+        Result of assembly_stats()
+    """
+
+    if fasta._compressed == 'gzip':
+        with fasta._open_binary() as handle:
+            records = [record_stats(title, counts)
+                       for title, counts in _stream_counts(handle, chunk_size)]
+        return assembly_stats(records)
+
+    fai = fasta.load_index()
+    tasks = []
+    for record in fai:
+        for start in range(0, max(record.length, 1), chunk_size):
+            tasks.append((fasta.path, record.name, start, min(start + chunk_size, record.length)))
+
+    totals = {name: {} for name in fai.keys()}
+    if processes > 1:
+        with Pool(processes) as pool:
+            for name, counts in pool.imap_unordered(_count_range, tasks):
+                _merge_counts(totals[name], counts)
+    else:
+        for _, name, start, end in tasks:
+            _merge_counts(totals[name], _count_region(fasta, name, start, end))
+
+    return assembly_stats([record_stats(name, counts) for name, counts in totals.items()])
+
+
+def _test():
+    import doctest
+    doctest.testmod()
+    return
+
+
+if __name__ == "__main__":
+    _test()
@@ -0,0 +1,235 @@
+from multiprocessing import Pool
+from typing import Generator, List, TextIO, Tuple, Type
+
+import numpy as np
+
+from BI.FASTA.TwoBit import _runs
+from BI.utils._bunch import Bunch
+
+__all__ = ('track_chunk', 'iter_tracks', 'write_tracks')
+
+_IS_GC = np.zeros(256, dtype=bool)
+_IS_GC[list(b'GCgc')] = True
+_IS_ACGT = np.zeros(256, dtype=bool)
+_IS_ACGT[list(b'ACGTacgt')] = True
+_IS_N = np.zeros(256, dtype=bool)
+_IS_N[list(b'Nn')] = True
+_IS_LOWER = np.zeros(256, dtype=bool)
+_IS_LOWER[ord('a'):ord('z')+1] = True
+
+def track_chunk(
+    seq : bytes,
+    start : int,
+    end : int,
+    window : int,
+    step : int
+    ) -> Bunch:
+
+    """Calculate window GC and N/soft-mask runs of one chunk of contig.
+    GC and ACGT counts of every window are differences of cumulative sums,
+    so each window costs O(1) regardless of window size.
+
+    Example
+    -------
+    >>> chunk = track_chunk(b'ACGTNNGGccaa', 0, 12, 4, 4)
+    >>> chunk.starts.tolist(), chunk.ends.tolist(), chunk.gc.tolist()
+    ([0, 4, 8], [4, 8, 12], [0.5, 1.0, 0.5])
+    >>> chunk.n_runs, chunk.mask_runs
+    ([(4, 6)], [(8, 12)])
+
+    Parameters
+    ----------
+    seq : bytes
+        Sequence of contig from 'start' (without newlines), it should cover
+        the last window starting before 'end' (or reach the end of contig)
+    start : int
+        0-based position of the first base of seq (multiple of step)
+    end : int
+        Windows starting before 'end' are calculated, runs are found in [start, end)
+    window : int
+        Window size
+    step : int
+        Distance between window starts
+
+    Returns
+    -------
+    Bunch
+        starts, ends, gc (GC / ACGT bases of window, NaN without ACGT base),
+        n_runs, mask_runs ([(start, end)])
+    """
+
+    codes = np.frombuffer(seq, dtype=np.uint8)
+    gc_cum = np.concatenate(([0], np.cumsum(_IS_GC[codes], dtype=np.int64)))
+    acgt_cum = np.concatenate(([0], np.cumsum(_IS_ACGT[codes], dtype=np.int64)))
+
+    starts = np.arange(start, end, step, dtype=np.int64)
+    ends = np.minimum(starts + window, start + len(codes))
+    lo, hi = starts - start, ends - start
+    acgt = acgt_cum[hi] - acgt_cum[lo]
+    with np.errstate(invalid='ignore', divide='ignore'):
+        gc = (gc_cum[hi] - gc_cum[lo]) / acgt
+
+    part = codes[:end - start]
+    ## (start, size) runs of chunk to (start, end) of contig
+    n_runs = [(start + run, start + run + size) for run, size in _runs(_IS_N[part])]
+    mask_runs = [(start + run, start + run + size) for run, size in _runs(_IS_LOWER[part])]
+
+    return Bunch(starts=starts, ends=ends, gc=gc, n_runs=n_runs, mask_runs=mask_runs)
+
+def _track_region(fasta, name: str, start: int, end: int, window: int, step: int) -> Bunch:
+    """Calculate track_chunk() of region [start, end) by .fai index"""
+
+    record = fasta.load_index()[name]
+    ## the last window starting before 'end' could reach over 'end'
+    last = min(start + (end - start - 1) // step * step + window, record.length)
+    raw = fasta._read_range(record.byte_offset(start), record.byte_offset(max(last, end)))
+    seq = raw.replace(b'\n', b'').replace(b'\r', b'')
+
+    return track_chunk(seq, start, end, window, step)
+
+def _track_range(task: Tuple[str, str, int, int, int, int]) -> Tuple[str, Bunch]:
+    """Pool worker of _track_region()"""
+
+    from BI.FASTA.FASTA import _worker_fasta
+
+    path, name, start, end, window, step = task
+    return name, _track_region(_worker_fasta(path), name, start, end, window, step)
+
+def iter_tracks(
+    fasta : Type['FASTA'],
+    window : int = 100,
+    step : int = None,
+    processes : int = 1,
+    chunk_size : int = 10_000_000
+    ) -> Generator[Tuple[str, Bunch], None, None]:
+
+    """Generator function yielding (contig, track_chunk() result) of every
+    chunk in fasta order. Contigs are split into chunks of 'chunk_size' bases
+    by .fai index and chunks are calculated in process pool.
+    gzip (not BGZF) fasta is streamed by whole record in single process.
+
+    Parameters
+    ----------
+    fasta : FASTA
+        FASTA instance
+    window : int, optional
+        Window size, by default 100
+    step : int, optional
+        Distance between window starts, by default None (= window)
+    processes : int, optional
+        The number of processes, by default 1
+    chunk_size : int, optional
+        The number of bases per task (rounded to multiple of step), by default 10,000,000
+
+    Yields
+    ------
+    Tuple[str, Bunch]
+        Name of contig and result of chunk
+    """
+
+    step = step or window
+    if window <= 0 or step <= 0:
+        raise ValueError('window and step must be positive')
+
+    if fasta._compressed == 'gzip':
+        for record in fasta.reader(block=True):
+            seq = record.seq.raw
+            yield record.title, track_chunk(seq, 0, len(seq), window, step)
+        return
+
+    chunk_size = max(chunk_size // step, 1) * step
+    tasks = [(fasta.path, record.name, start, min(start + chunk_size, record.length), window, step)
+             for record in fasta.load_index()
+             for start in range(0, record.length, chunk_size)]
+
+    if processes > 1:
+        with Pool(processes) as pool:
+            yield from pool.imap(_track_range, tasks)
+    else:
+        for _, name, start, end, _, _ in tasks:
+            yield name, _track_region(fasta, name, start, end, window, step)
+
+def _write_runs(output: TextIO, name: str, runs: List[Tuple[int, int]], pending: list) -> None:
+    """Write BED lines of runs, run reaching the end of chunk is kept in
+    'pending' ([name, start, end]) to be joined with run of the next chunk"""
+
+    for start, end in runs:
+        if pending and pending[0] == name and pending[2] == start:
+            pending[2] = end
+            continue
+        if pending:
+            output.write(f'{pending[0]}\t{pending[1]}\t{pending[2]}\n')
+        pending[:] = [name, start, end]
+    return
+
+def write_tracks(
+    fasta : Type['FASTA'],
+    window : int = 100,
+    step : int = None,
+    gc_path : str = None,
+    n_path : str = None,
+    mask_path : str = None,
+    processes : int = 1,
+    chunk_size : int = 10_000_000
+    ) -> None:
+
+    """Write window GC fraction (bedGraph), N runs (BED) and soft-masked runs (BED)
+    of every contig by one pass (see iter_tracks()). Windows without ACGT base
+    are not written to bedGraph.
+
+    Parameters
+    ----------
+    fasta : FASTA
+        FASTA instance
+    window : int, optional
+        Window size, by default 100
+    step : int, optional
+        Distance between window starts, by default None (= window)
+    gc_path : str, optional
+        Path of GC bedGraph, by default None (not written)
+    n_path : str, optional
+        Path of N runs BED, by default None (not written)
+    mask_path : str, optional
+        Path of soft-masked runs BED, by default None (not written)
+    processes : int, optional
+        The number of processes, by default 1
+    chunk_size : int, optional
+        The number of bases per task, by default 10,000,000
+    """
+
+    gc_out = open(gc_path, 'w') if gc_path else None
+    n_out = open(n_path, 'w') if n_path else None
+    mask_out = open(mask_path, 'w') if mask_path else None
+    n_pending, mask_pending = [], []
+
+    try:
+        for name, chunk in iter_tracks(fasta, window, step, processes, chunk_size):
+            if gc_out:
+                valid = ~np.isnan(chunk.gc)
+                gc_out.writelines(f'{name}\t{start}\t{end}\t{gc:.4f}\n' for start, end, gc in
+                                  zip(chunk.starts[valid].tolist(), chunk.ends[valid].tolist(),
+                                      chunk.gc[valid].tolist()))
+            if n_out:
+                _write_runs(n_out, name, chunk.n_runs, n_pending)
+            if mask_out:
+                _write_runs(mask_out, name, chunk.mask_runs, mask_pending)
+
+        for output, pending in ((n_out, n_pending), (mask_out, mask_pending)):
+            if output and pending:
+                output.write(f'{pending[0]}\t{pending[1]}\t{pending[2]}\n')
+    finally:
+        for output in (gc_out, n_out, mask_out):
+            if output:
+                output.close()
+
+    return
+
+
+def _test():
+    import doctest
+    doctest.testmod()
+    return
+
+
+if __name__ == "__main__":
+    _test()
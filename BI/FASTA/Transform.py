@@ -0,0 +1,156 @@
+from itertools import accumulate
+from typing import Dict, Iterable, List
+
+import numpy as np
+
+from BI.FASTA.Constant import IUPAC_PAIR
+
+__all__ = ('PairTable', 'DNA_COMPLEMENT', 'RNA_COMPLEMENT', 'DNA_TO_RNA', 'RNA_TO_DNA')
+
+class PairTable:
+    """Precompiled base-to-base translation (complement, transcription).
+    Tables for str.translate(), bytes.translate() and numpy lookup are made
+    once at import time, so transforming sequence is one C-level pass.
+    Character not in pairs raises KeyError (same as dictionary lookup).
+
+    Example
+    -------
+    >>> DNA_COMPLEMENT.apply('ACGTnr')
+    'TGCAny'
+    >>> DNA_COMPLEMENT.apply_many(['AACG', 'TTa'], reverse=True)
+    ['CGTT', 'tAA']
+    >>> DNA_COMPLEMENT.apply_many(['AC\\nGT', 'AA'])
+    Traceback (most recent call last):
+    ...
+    KeyError: '\\n'
+    >>> DNA_COMPLEMENT.apply_buffer(b'AACGTTa', [4, 7], reverse=True)
+    b'CGTTtAA'
+    >>> DNA_TO_RNA.apply('ACGX')
+    Traceback (most recent call last):
+    ...
+    KeyError: 'X'
+
+    Parameters
+    ----------
+    pairs : Dict[str, str]
+        Upper case base and its pair, lower case is added automatically
+    """
+
+    def __init__(self, pairs: Dict[str, str]) -> None:
+        self.pairs = {**pairs, **{key.lower(): value.lower() for key, value in pairs.items()}}
+        keys = ''.join(self.pairs)
+        values = ''.join(self.pairs.values())
+
+        self.table = str.maketrans(keys, values)
+        self.bytes_table = bytes.maketrans(keys.encode(), values.encode())
+        ## 0 marks character without pair
+        self.lookup = np.zeros(256, dtype=np.uint8)
+        self.lookup[list(keys.encode())] = list(values.encode())
+
+        self._delete = str.maketrans('', '', keys)
+        self._delete_bytes = keys.encode()
+
+        return
+
+    def _check(self, rest: str or bytes) -> None:
+        """Raise KeyError of the first character left after deleting known bases"""
+
+        if rest:
+            raise KeyError(rest[:1] if isinstance(rest, str) else rest[:1].decode())
+        return
+
+    def apply(self, data: str, reverse: bool = False) -> str:
+        """Transform sequence string (reversed if 'reverse')"""
+
+        self._check(data.translate(self._delete))
+        data = data.translate(self.table)
+        return data[::-1] if reverse else data
+
+    def apply_bytes(self, data: bytes, reverse: bool = False) -> bytes:
+        """Transform sequence bytes (reversed if 'reverse')"""
+
+        self._check(data.translate(None, self._delete_bytes))
+        data = data.translate(self.bytes_table)
+        return data[::-1] if reverse else data
+
+    def apply_array(self, codes: np.ndarray, reverse: bool = False) -> np.ndarray:
+        """Transform np.uint8 array of ASCII codes (reversed if 'reverse')"""
+
+        result = self.lookup[codes]
+        if not result.all():
+            self._check(bytes(codes[result == 0][:1]))
+        return result[::-1] if reverse else result
+
+    def apply_many(self, seqs: Iterable[str], reverse: bool = False) -> List[str]:
+        """Transform many sequence strings by one translate() call over
+        joined sequences, which are split back by their lengths
+        (each sequence is reversed if 'reverse')"""
+
+        seqs = [str(seq) for seq in seqs]
+        joined = ''.join(seqs)
+        self._check(joined.translate(self._delete))
+        joined = joined.translate(self.table)
+        ## reversed buffer holds reversed sequences in reverse order
+        lengths = [len(seq) for seq in seqs]
+        if reverse:
+            joined, lengths = joined[::-1], lengths[::-1]
+        ends = list(accumulate(lengths))
+        result = [joined[end - length:end] for end, length in zip(ends, lengths)]
+        return result[::-1] if reverse else result
+
+    def apply_buffer(self,
+        buffer : bytes,
+        ends : Iterable[int] = None,
+        reverse : bool = False
+        ) -> bytes:
+
+        """Transform concatenated sequences of buffer by one numpy lookup.
+        Sequences end at 'ends' (exclusive offsets), and with 'reverse' each
+        sequence is reversed in place, so their order in buffer is kept.
+
+        Parameters
+        ----------
+        buffer : bytes
+            Concatenated sequences
+        ends : Iterable[int], optional
+            Exclusive end offset of every sequence (the last one could be
+            omitted), by default None (one sequence)
+        reverse : bool, optional
+            Reverse every sequence, by default False
+
+        Returns
+        -------
+        bytes
+            Transformed buffer
+        """
+
+        codes = np.frombuffer(buffer, dtype=np.uint8)
+        if reverse:
+            ends = [] if ends is None else list(ends)
+            if not ends or ends[-1] < len(codes):
+                ends.append(len(codes))
+            ends = np.asarray(ends, dtype=np.int64)
+            starts = np.concatenate(([0], ends[:-1]))
+            lengths = ends - starts
+            ## position i of sequence [start, end) takes start + end - 1 - i
+            codes = codes[np.repeat(starts + ends - 1, lengths) - np.arange(len(codes))]
+        return self.apply_array(codes).tobytes()
+
+    def __repr__(self) -> str:
+        return f'PairTable({len(self.pairs)} bases)'
+
+DNA_COMPLEMENT = PairTable({'A': 'T', 'T': 'A', 'G': 'C', 'C': 'G', 'N': 'N', **IUPAC_PAIR})
+RNA_COMPLEMENT = PairTable({'A': 'U', 'U': 'A', 'G': 'C', 'C': 'G', 'N': 'N', **IUPAC_PAIR})
+## transcription pairs bases of template strand, 'N' has no pair
+DNA_TO_RNA = PairTable({'A': 'U', 'C': 'G', 'G': 'C', 'T': 'A', **IUPAC_PAIR})
+RNA_TO_DNA = PairTable({'A': 'T', 'C': 'G', 'G': 'C', 'U': 'A', **IUPAC_PAIR})
+
+
+def _test():
+    import doctest
+    doctest.testmod()
+    return
+
+
+if __name__ == "__main__":
+    _test()
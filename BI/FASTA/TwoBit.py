@@ -0,0 +1,364 @@
+import bisect
+import struct
+
+from typing import BinaryIO, Dict, Generator, Iterable, List, Tuple, Type
+
+import numpy as np
+
+from BI.File import File
+from BI.FASTA.Seq import Seq
+from BI.FASTA.LazySeq import LazySeq
+
+__all__ = ('PackedSeq', 'TwoBit')
+
+TWOBIT_SIGNATURE = 0x1A412743
+
+## UCSC .2bit order, T=0, C=1, A=2, G=3
+_PACK_TABLE = np.zeros(256, dtype=np.uint8)
+for _base, _code in zip(b'TCAGtcag', (0, 1, 2, 3, 0, 1, 2, 3)):
+    _PACK_TABLE[_base] = _code
+_IS_BASE = np.zeros(256, dtype=bool)
+_IS_BASE[list(b'ACGTacgt')] = True
+_IS_LOWER = np.zeros(256, dtype=bool)
+_IS_LOWER[ord('a'):ord('z')+1] = True
+_UNPACK = np.frombuffer(b'TCAG', dtype=np.uint8)
+_SHIFTS = np.array([6, 4, 2, 0], dtype=np.uint8)
+
+def _runs(mask: np.ndarray) -> List[Tuple[int, int]]:
+    """Return (start, size) of every run of True in boolean array"""
+
+    edges = np.diff(np.concatenate(([0], mask.view(np.int8), [0])))
+    starts = np.flatnonzero(edges == 1)
+    ends = np.flatnonzero(edges == -1)
+    return list(zip(starts.tolist(), (ends - starts).tolist()))
+
+
+class PackedSeq(LazySeq):
+    """Seq class whose sequence is packed by 2 bits per base (UCSC .2bit layout)
+    with run lists of N (non-ACGT) blocks and soft-masked (lower case) blocks.
+    It takes about a quarter of memory of python string. Region is unpacked
+    only for the requested bases and every Seq method works on it transparently.
+
+    Non-ACGT IUPAC codes are stored as 'N' like .2bit format.
+
+    Example
+    -------
+    >>> seq = PackedSeq.from_string('ACGTNNacgtAC')
+    >>> len(seq), seq.n_blocks, seq.mask_blocks
+    (12, [(4, 2)], [(6, 4)])
+    >>> seq[3:8]
+    Seq(TNNac)
+    >>> seq.reverse_complement()
+    Seq(GTacgtNNACGT)
+    """
+
+    def __init__(self,
+        packed : bytes,
+        length : int,
+        n_blocks : List[Tuple[int, int]] = None,
+        mask_blocks : List[Tuple[int, int]] = None,
+        type : str = 'DNA'
+        ) -> None:
+
+        """Initialize PackedSeq class
+
+        Parameters
+        ----------
+        packed : bytes
+            2-bit packed bases (4 bases per byte, T=0, C=1, A=2, G=3)
+        length : int
+            The number of bases
+        n_blocks : List[Tuple[int, int]], optional
+            (start, size) of N blocks, by default None
+        mask_blocks : List[Tuple[int, int]], optional
+            (start, size) of soft-masked blocks, by default None
+        type : str, optional
+            Type of sequence ('DNA' or 'RNA'), by default 'DNA'
+        """
+
+        self.type = type
+        self.packed = packed
+        self.length = length
+        self.n_blocks = n_blocks or []
+        self.mask_blocks = mask_blocks or []
+        self._n_starts = [start for start, _ in self.n_blocks]
+        self._mask_starts = [start for start, _ in self.mask_blocks]
+
+        return
+
+    @classmethod
+    def from_string(cls, seq: str or bytes, type: str = 'DNA') -> Type['PackedSeq']:
+        """Pack sequence string (newlines are ignored)"""
+
+        if isinstance(seq, str):
+            seq = seq.encode()
+        raw = np.frombuffer(seq.translate(None, b'\r\n'), dtype=np.uint8)
+        length = len(raw)
+
+        codes = np.zeros((length + 3) // 4 * 4, dtype=np.uint8)
+        codes[:length] = _PACK_TABLE[raw]
+        codes = codes.reshape(-1, 4)
+        packed = (codes[:, 0] << 6) | (codes[:, 1] << 4) | (codes[:, 2] << 2) | codes[:, 3]
+
+        return cls(packed.tobytes(), length,
+                   _runs(~_IS_BASE[raw]), _runs(_IS_LOWER[raw]), type)
+
+    def _fetch(self, start: int, end: int) -> str:
+        """Unpack sequence string of 0-based region [start, end)"""
+
+        if start >= end:
+            return ''
+
+        first, last = start // 4, (end + 3) // 4
+        packed = np.frombuffer(self.packed, dtype=np.uint8, count=last-first, offset=first)
+        codes = (packed[:, None] >> _SHIFTS) & 3
+        bases = _UNPACK[codes.ravel()][start-first*4:end-first*4].copy()
+
+        for blocks, starts, apply in ((self.n_blocks, self._n_starts, None),
+                                      (self.mask_blocks, self._mask_starts, 32)):
+            idx = max(bisect.bisect_right(starts, start) - 1, 0)
+            while idx < len(blocks) and blocks[idx][0] < end:
+                block_start, size = blocks[idx]
+                lo, hi = max(block_start, start) - start, min(block_start + size, end) - start
+                if lo < hi:
+                    if apply is None:
+                        bases[lo:hi] = ord('N')
+                    else:
+                        bases[lo:hi] |= apply
+                idx += 1
+
+        return bases.tobytes().decode()
+
+    def __len__(self) -> int:
+        return self.length
+
+
+class TwoBit(File):
+    """Class supports reading and writing UCSC .2bit format file.
+    Sequences are kept packed (PackedSeq), and region is fetched
+    by seeking directly to the packed bytes of region.
+
+    Example
+    -------
+    >>> import os, tempfile
+    >>> from BI.FASTA.FASTA import FASTA
+    >>> path = os.path.join(tempfile.mkdtemp(), 'small.2bit')
+    >>> twobit = TwoBit(path)
+    >>> twobit.write(FASTA('./data/small.fa').reader(mmap=True))
+    >>> twobit.open()
+    >>> twobit.names
+    ['chr1']
+    >>> twobit.fetch('chr1', 6, 12)
+    Seq(GTACGT)
+    >>> for record in twobit.reader():
+    ...     print(record.title, record.seq)
+    chr1 ACGTACGTACGTAAAAAAAAAAAACCCCCCCC
+    >>> twobit.close()
+    """
+
+    def __init__(self, path: str) -> None:
+        """Initialize TwoBit class
+
+        Parameters
+        ----------
+        path : str
+            Path of .2bit file
+        """
+
+        self.path = path
+        self.open_obj = False
+        self.offsets: Dict[str, int] = {}
+        self._headers = {}
+        self._endian = '<'
+
+        return
+
+    @property
+    def names(self) -> List[str]:
+        """Sequence names by the order of .2bit file"""
+        return list(self.offsets.keys())
+
+    def open(self, mode: str = 'r') -> None:
+        """Open .2bit file and load its index (name -> offset)
+
+        Raises
+        ------
+        ValueError
+            Error occurs when file is not .2bit format
+        """
+
+        self.open_obj = open(self.path, 'rb')
+        header = self.open_obj.read(16)
+        for endian in ('<', '>'):
+            signature, version, count, _ = struct.unpack(f'{endian}IIII', header)
+            if signature == TWOBIT_SIGNATURE:
+                break
+        else:
+            raise ValueError(f'{self.path} is not .2bit file')
+        self._endian = endian
+        offset_format = f'{endian}Q' if version == 1 else f'{endian}I'
+
+        self.offsets = {}
+        for _ in range(count):
+            name_size = self.open_obj.read(1)[0]
+            name = self.open_obj.read(name_size).decode()
+            offset_size = struct.calcsize(offset_format)
+            self.offsets[name] = struct.unpack(offset_format, self.open_obj.read(offset_size))[0]
+
+        return
+
+    def close(self) -> None:
+        """Close .2bit file"""
+        self.open_obj.close()
+        self.open_obj = False
+        return
+
+    def sanity_check(self) -> bool:
+        """Check whether file has .2bit signature"""
+
+        with open(self.path, 'rb') as handle:
+            header = handle.read(4)
+        return len(header) == 4 and TWOBIT_SIGNATURE in \
+            (struct.unpack('<I', header)[0], struct.unpack('>I', header)[0])
+
+    def readline(self):
+        ...
+
+    def _read_header(self, name: str) -> Tuple[int, list, list, int]:
+        """Read (length, n_blocks, mask_blocks, packed offset) of sequence"""
+
+        if name in self._headers:
+            return self._headers[name]
+
+        handle = self.open_obj
+        handle.seek(self.offsets[name])
+        length, n_count = struct.unpack(f'{self._endian}II', handle.read(8))
+        n_blocks = self._read_blocks(handle, n_count)
+        mask_count = struct.unpack(f'{self._endian}I', handle.read(4))[0]
+        mask_blocks = self._read_blocks(handle, mask_count)
+        handle.read(4)  ## reserved
+
+        self._headers[name] = (length, n_blocks, mask_blocks, handle.tell())
+        return self._headers[name]
+
+    def _read_blocks(self, handle: BinaryIO, count: int) -> List[Tuple[int, int]]:
+        values = struct.unpack(f'{self._endian}{count*2}I', handle.read(count * 8))
+        return list(zip(values[:count], values[count:]))
+
+    def get_seq(self, name: str) -> PackedSeq:
+        """Return PackedSeq of sequence 'name' (packed bytes are loaded)"""
+
+        length, n_blocks, mask_blocks, offset = self._read_header(name)
+        self.open_obj.seek(offset)
+        packed = self.open_obj.read((length + 3) // 4)
+
+        return PackedSeq(packed, length, n_blocks, mask_blocks)
+
+    def fetch(self,
+        name : str,
+        start : int = None,
+        end : int = None
+        ) -> Seq:
+
+        """Fetch region (0-based half-open) by reading only its packed bytes
+
+        Parameters
+        ----------
+        name : str
+            Name of sequence
+        start : int, optional
+            0-based start position, by default None (start of sequence)
+        end : int, optional
+            0-based exclusive end position, by default None (end of sequence)
+
+        Returns
+        -------
+        Seq
+            Seq object containing sequence of region
+        """
+
+        length, n_blocks, mask_blocks, offset = self._read_header(name)
+        start = 0 if start is None else start
+        end = length if end is None else min(end, length)
+        if start < 0 or start > end:
+            raise ValueError(f'Invalid region {name}:{start}-{end}')
+
+        first = start // 4
+        self.open_obj.seek(offset + first)
+        packed = self.open_obj.read((end + 3) // 4 - first)
+        shift = first * 4
+        region = PackedSeq(packed, end - shift,
+                           [(s - shift, z) for s, z in n_blocks if s + z > start and s < end],
+                           [(s - shift, z) for s, z in mask_blocks if s + z > start and s < end])
+
+        return Seq(region._fetch(start - shift, end - shift))
+
+    def reader(self) -> Generator[Type['SeqRecord'], None, None]:
+        """Generator function yielding SeqRecord with PackedSeq
+
+        Yields
+        ------
+        SeqRecord
+            SeqRecord instance with name, PackedSeq
+        """
+
+        from BI.FASTA.FASTA import SeqRecord
+
+        if not self.open_obj:
+            print(f'[ERROR] {self.path} is not opened.')
+            return
+
+        for name in self.names:
+            yield SeqRecord(self.get_seq(name), name, '')
+
+    def write(self, records: Iterable[Type['SeqRecord']]) -> None:
+        """Write records as .2bit file (version 0, little endian).
+        Sequences are packed before writing, so whole file is kept
+        in memory as 2-bit packed form.
+
+        Parameters
+        ----------
+        records : Iterable[SeqRecord]
+            Records to write (seq could be str or Seq)
+        """
+
+        packed_records = []
+        for record in records:
+            seq = record.seq
+            if not isinstance(seq, PackedSeq):
+                seq = PackedSeq.from_string(str(seq))
+            packed_records.append((record.title, seq))
+
+        offset = 16 + sum(1 + len(name.encode()) + 4 for name, _ in packed_records)
+        with open(self.path, 'wb') as handle:
+            handle.write(struct.pack('<IIII', TWOBIT_SIGNATURE, 0, len(packed_records), 0))
+            for name, seq in packed_records:
+                handle.write(struct.pack('<B', len(name.encode())) + name.encode())
+                handle.write(struct.pack('<I', offset))
+                offset += 16 + 8 * (len(seq.n_blocks) + len(seq.mask_blocks)) + len(seq.packed)
+            for _, seq in packed_records:
+                handle.write(self._pack_header(seq))
+                handle.write(seq.packed)
+
+        return
+
+    def _pack_header(self, seq: PackedSeq) -> bytes:
+        """Pack dnaSize, nBlocks, maskBlocks, reserved of sequence"""
+
+        fields = [seq.length, len(seq.n_blocks)]
+        fields += [start for start, _ in seq.n_blocks] + [size for _, size in seq.n_blocks]
+        fields += [len(seq.mask_blocks)]
+        fields += [start for start, _ in seq.mask_blocks] + [size for _, size in seq.mask_blocks]
+        fields += [0]
+
+        return struct.pack(f'<{len(fields)}I', *fields)
+
+
+def _test():
+    import doctest
+    doctest.testmod()
+    return
+
+
+if __name__ == "__main__":
+    _test()
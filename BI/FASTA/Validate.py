@@ -0,0 +1,139 @@
+from multiprocessing import Pool
+from typing import BinaryIO, List, Tuple
+
+import numpy as np
+
+from BI.FASTA.Constant import *
+from BI.FASTA.Parser import parse_blocks
+
+__all__ = ('SanityReport', 'validate_seq', 'validate_handle')
+
+## IUPAC nucleotide codes of both cases (soft-masked bases are valid)
+_VALID_BASES = ''.join(sorted(BASE_IUPAC)).encode()
+_VALID_BASES += _VALID_BASES.lower()
+_VALID_TABLE = np.zeros(256, dtype=bool)
+_VALID_TABLE[list(_VALID_BASES)] = True
+
+class SanityReport:
+    """Class for recording result of sequence sanity check
+
+    Parameters
+    ----------
+    title : str
+        Title of sequence
+    positions : List[int]
+        1-based positions of invalid characters
+    chars : List[str]
+        Invalid characters at positions
+    """
+
+    __slots__ = ('title', 'positions', 'chars')
+
+    def __init__(self,
+        title : str,
+        positions : List[int] = None,
+        chars : List[str] = None
+        ) -> None:
+
+        self.title = title
+        self.positions = positions or []
+        self.chars = chars or []
+
+        return
+
+    @property
+    def valid(self) -> bool:
+        """Whether sequence has no invalid character"""
+        return not self.positions
+
+    def __repr__(self) -> str:
+        if len(self.positions) > 10:
+            misbases = f'{list(zip(self.chars[:10], self.positions[:10]))}...'
+        else:
+            misbases = f'{list(zip(self.chars, self.positions))}'
+        return f'SanityReport({self.title}, {len(self.positions)} invalid, {misbases})'
+
+def validate_seq(title: str, seq: bytes or str) -> SanityReport:
+    """Check whether sequence has only IUPAC nucleotide codes (newlines are ignored).
+    Valid sequence is confirmed by one bytes.translate() pass, positions of
+    invalid characters are found by numpy table lookup only if needed.
+
+    Example
+    -------
+    >>> validate_seq('seq1', 'ACGTNacgtn').valid
+    True
+    >>> validate_seq('seq2', 'ACGT-AXGT')
+    SanityReport(seq2, 2 invalid, [('-', 5), ('X', 7)])
+
+    Parameters
+    ----------
+    title : str
+        Title of sequence
+    seq : bytes or str
+        Sequence
+
+    Returns
+    -------
+    SanityReport
+        Report with positions (1-based) and characters of invalid bases
+    """
+
+    if isinstance(seq, str):
+        seq = seq.encode()
+    seq = seq.replace(b'\n', b'').replace(b'\r', b'')
+
+    if not seq.translate(None, _VALID_BASES):
+        return SanityReport(title)
+
+    codes = np.frombuffer(seq, dtype=np.uint8)
+    invalid = np.flatnonzero(~_VALID_TABLE[codes])
+    chars = codes[invalid].tobytes().decode(errors='replace')
+
+    return SanityReport(title, (invalid + 1).tolist(), list(chars))
+
+def _validate_record(record: Tuple[bytes, bytes, bytes]) -> SanityReport:
+    """Pool worker of validate_seq() for parse_blocks() record"""
+
+    title, _, seq = record
+    return validate_seq(title.decode(), seq)
+
+def validate_handle(handle : BinaryIO,
+    processes : int = 1,
+    block_size : int = 1 << 20
+    ) -> List[SanityReport]:
+
+    """Check every record of fasta by one pass of block parser
+
+    Parameters
+    ----------
+    handle : BinaryIO
+        Fasta file opened by binary mode
+    processes : int, optional
+        The number of processes validating records, by default 1
+    block_size : int, optional
+        Bytes read at once, by default 1 MB
+
+    Returns
+    -------
+    List[SanityReport]
+        Reports of records having invalid characters (empty if all valid)
+    """
+
+    records = parse_blocks(handle, block_size)
+    if processes > 1:
+        with Pool(processes) as pool:
+            reports = list(pool.imap(_validate_record, records, chunksize=64))
+    else:
+        reports = [_validate_record(record) for record in records]
+
+    return [report for report in reports if not report.valid]
+
+
+def _test():
+    import doctest
+    doctest.testmod()
+    return
+
+
+if __name__ == "__main__":
+    _test()
@@ -0,0 +1,214 @@
+import gzip
+import queue
+import threading
+
+from typing import Iterable, List, Type
+
+from BI.FASTA.Index import FaiRecord, FastaIndex
+from BI.utils._bgzf import BgzfWriter, write_gzi
+
+__all__ = ('FastaWriter',)
+
+class FastaWriter:
+    """Class for writing many records as line-wrapped fasta with large buffers.
+    Formatted records are collected in memory and written by 'buffer_size' chunks.
+    Output could be gzip or BGZF compressed, compression runs on background thread
+    (zlib releases GIL) so formatting and compression overlap. .fai index
+    (and .gzi for BGZF) is built while writing.
+
+    Example
+    -------
+    >>> import os, tempfile
+    >>> from BI.FASTA.FASTA import FASTA, SeqRecord
+    >>> path = os.path.join(tempfile.mkdtemp(), 'out.fa.gz')
+    >>> with FastaWriter(path, width=5) as writer:
+    ...     writer.write_records([SeqRecord('ACGTACGTAC', 'seq1', 'first'),
+    ...                           SeqRecord('ACG', 'seq2', '')])
+    >>> fasta = FASTA(path)
+    >>> fasta.open()
+    >>> print(fasta.open_obj.read(), end='')
+    >seq1 first
+    ACGTA
+    CGTAC
+    >seq2
+    ACG
+    >>> fasta.close()
+    >>> fasta.fetch('seq1', 3, 8)
+    Seq(TACGT)
+    """
+
+    def __init__(self,
+        path : str,
+        width : int = 60,
+        compression : str or bool = None,
+        index : bool = True,
+        buffer_size : int = 1 << 22,
+        compresslevel : int = 6
+        ) -> None:
+
+        """Initialize FastaWriter class and open output file
+
+        Parameters
+        ----------
+        path : str
+            Path of output fasta
+        width : int, optional
+            The number of bases per line (0 = no wrapping), by default 60
+        compression : str or bool, optional
+            'bgzf', 'gzip' or False, by default None (.gz/.bgz extension -> 'bgzf')
+        index : bool, optional
+            Write .fai (and .gzi for BGZF) index, by default True.
+            Index is not written for gzip because it could not be randomly accessed.
+        buffer_size : int, optional
+            Bytes of buffer written at once, by default 4 MB
+        compresslevel : int, optional
+            zlib compression level, by default 6
+        """
+
+        if compression is None:
+            compression = 'bgzf' if path.endswith(('.gz', '.bgz')) else False
+        if compression not in ('bgzf', 'gzip', False):
+            raise ValueError(f'Unknown compression {compression}')
+
+        self.path = path
+        self.width = width
+        self.compression = compression
+        self.index = index and compression != 'gzip'
+        self.buffer_size = buffer_size
+
+        if compression == 'bgzf':
+            self._handle = BgzfWriter(path, compresslevel)
+        elif compression == 'gzip':
+            self._handle = gzip.open(path, 'wb', compresslevel)
+        else:
+            self._handle = open(path, 'wb')
+
+        self._fai: List[FaiRecord] = []
+        self._offset = 0
+        self._chunks: List[str] = []
+        self._chunks_size = 0
+
+        ## compressed output is written by background thread
+        self._queue = None
+        self._error = None
+        if compression:
+            self._queue = queue.Queue(maxsize=4)
+            self._thread = threading.Thread(target=self._consume, daemon=True)
+            self._thread.start()
+
+        return
+
+    def _consume(self) -> None:
+        """Background thread writing (compressing) buffers from queue"""
+
+        while True:
+            data = self._queue.get()
+            if data is None:
+                break
+            if self._error is None:
+                try:
+                    self._handle.write(data)
+                except Exception as error:
+                    self._error = error
+        return
+
+    def write(self,
+        title : str,
+        sequence : str,
+        desc : str = None
+        ) -> None:
+
+        """Write one record (newlines of sequence are removed and rewrapped)
+
+        Parameters
+        ----------
+        title : str
+            Title of sequence
+        sequence : str
+            Sequence string (or Seq)
+        desc : str, optional
+            Description of sequence, by default None
+        """
+
+        sequence = str(sequence)
+        if '\n' in sequence:
+            sequence = sequence.replace('\n', '').replace('\r', '')
+        header = f'>{title} {desc}\n' if desc else f'>{title}\n'
+
+        length = len(sequence)
+        width = self.width if self.width > 0 else max(length, 1)
+        if length > width:
+            sequence = '\n'.join([sequence[i:i+width] for i in range(0, length, width)])
+        body = f'{sequence}\n' if length else ''
+
+        if self.index:
+            self._fai.append(FaiRecord(title, length, self._offset + len(header.encode()),
+                                       min(width, length), min(width, length) + 1 if length else 0))
+        self._offset += len(header.encode()) + len(body)
+
+        self._chunks.append(header)
+        self._chunks.append(body)
+        self._chunks_size += len(header) + len(body)
+        if self._chunks_size >= self.buffer_size:
+            self.flush()
+
+        return
+
+    def write_records(self, records: Iterable[Type['SeqRecord']]) -> None:
+        """Write every record of iterable (SeqRecord)"""
+
+        for record in records:
+            self.write(record.title, record.seq, record.description)
+        return
+
+    def flush(self) -> None:
+        """Hand buffered records to output (or compressing thread)"""
+
+        if not self._chunks:
+            return
+        data = ''.join(self._chunks).encode()
+        self._chunks, self._chunks_size = [], 0
+
+        if self._queue is not None:
+            if self._error is not None:
+                raise self._error
+            self._queue.put(data)
+        else:
+            self._handle.write(data)
+
+        return
+
+    def close(self) -> None:
+        """Flush buffers, finish compressing thread, close file and write index"""
+
+        self.flush()
+        if self._queue is not None:
+            self._queue.put(None)
+            self._thread.join()
+        self._handle.close()
+        if self._error is not None:
+            raise self._error
+
+        if self.index:
+            FastaIndex(self._fai).write(f'{self.path}.fai')
+            if self.compression == 'bgzf':
+                write_gzi(f'{self.path}.gzi', self._handle.blocks)
+
+        return
+
+    def __enter__(self) -> Type['FastaWriter']:
+        return self
+
+    def __exit__(self, *args) -> None:
+        self.close()
+        return
+
+
+def _test():
+    import doctest
+    doctest.testmod()
+    return
+
+
+if __name__ == "__main__":
+    _test()
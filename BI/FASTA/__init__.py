@@ -1,3 +1,22 @@
 from BI.FASTA.FASTA import *
 from BI.FASTA.Seq import *
-from BI.FASTA.Constant import *
\ No newline at end of file
+from BI.FASTA.Constant import *
+from BI.FASTA.Index import *
+from BI.FASTA.LazySeq import *
+from BI.FASTA.Stats import *
+from BI.FASTA.Kmer import *
+from BI.FASTA.TwoBit import *
+from BI.FASTA.Motif import *
+from BI.FASTA.Writer import *
+from BI.FASTA.Parser import *
+from BI.FASTA.Validate import *
+from BI.FASTA.RecordIndex import *
+from BI.FASTA.SeqPack import *
+from BI.FASTA.Rename import *
+from BI.FASTA.Regions import *
+from BI.FASTA.Dedup import *
+from BI.FASTA.Track import *
+from BI.FASTA.Shard import *
+from BI.FASTA.Transform import *
+from BI.FASTA.Orf import *
+from BI.FASTA.Iupac import *
\ No newline at end of file
@@ -0,0 +1,319 @@
+import os
+import gzip
+
+from typing import BinaryIO, Generator, List, Tuple, Type
+
+import numpy as np
+
+from BI.File import File
+from BI.FASTA.LazySeq import BytesSeq
+from BI.FASTQ.Summary import fastq_summary
+from BI.utils._bunch import Bunch
+from BI.utils._bgzf import is_gzip
+
+__all__ = ('FastqRecord', 'parse_fastq_blocks', 'FASTQ')
+
+## quality characters are Phred+33 (Sanger, Illumina 1.8+)
+PHRED_OFFSET = 33
+
+class FastqRecord:
+    """Class for recording one read of fastq
+
+    Parameters
+    ----------
+    seq : BytesSeq
+        Sequence of read (decoded lazily)
+    title : str
+        Title of read (without '@')
+    description : str
+        Description of read
+    qual : np.ndarray
+        Phred quality scores (np.uint8, offset removed)
+    """
+
+    __slots__ = ('seq', 'title', 'description', 'qual')
+
+    def __init__(self,
+        seq : BytesSeq,
+        title : str,
+        description : str,
+        qual : np.ndarray
+        ) -> None:
+
+        self.seq = seq
+        self.title = title
+        self.description = description
+        self.qual = qual
+
+        return
+
+    def __len__(self) -> int:
+        return len(self.seq)
+
+    def __str__(self) -> str:
+        header = f'@{self.title} {self.description}' if self.description else f'@{self.title}'
+        qual = (self.qual + PHRED_OFFSET).astype(np.uint8).tobytes().decode()
+        return f'{header}\n{self.seq}\n+\n{qual}'
+
+def _split_header(header: bytes) -> Tuple[bytes, bytes]:
+    cols = header.split(None, 1)
+    if not cols:
+        return b'', b''
+    return cols[0], cols[1] if len(cols) > 1 else b''
+
+def _records(lines: List[bytes]) -> Generator[Tuple[bytes, bytes, bytes, bytes], None, None]:
+    """Yield (title, description, seq, qual) of complete 4-line records"""
+
+    for i in range(0, len(lines) - 3, 4):
+        header, seq, plus, qual = lines[i:i+4]
+        if header.endswith(b'\r'):
+            header, seq, plus, qual = (line.rstrip(b'\r') for line in (header, seq, plus, qual))
+        if header[:1] != b'@' or plus[:1] != b'+':
+            raise ValueError(f'Invalid fastq record {header[:50]}')
+        if len(seq) != len(qual):
+            raise ValueError(f'Length of sequence and quality are different in {header[:50]}')
+        ## quality below PHRED_OFFSET would wrap around by uint8 subtraction
+        if qual and min(qual) < PHRED_OFFSET:
+            raise ValueError(f'Invalid quality character in {header[:50]}')
+        yield (*_split_header(header[1:]), seq, qual)
+
+def parse_fastq_blocks(handle : BinaryIO,
+    block_size : int = 1 << 20
+    ) -> Generator[Tuple[bytes, bytes, bytes, bytes], None, None]:
+
+    """Generator function parsing 4-line fastq by large binary blocks.
+    Block is split to lines by one bytes.split() call, incomplete record
+    at the end of block is carried to the next block.
+
+    Example
+    -------
+    >>> import io
+    >>> handle = io.BytesIO(b'@r1 lane1\\nACGT\\n+\\nIIII\\n@r2\\nGG\\n+\\n#I\\n')
+    >>> for title, desc, seq, qual in parse_fastq_blocks(handle, block_size=5):
+    ...     print(title, desc, seq, qual)
+    b'r1' b'lane1' b'ACGT' b'IIII'
+    b'r2' b'' b'GG' b'#I'
+    >>> list(parse_fastq_blocks(io.BytesIO(b'@r1\\nACGT\\n+\\nII I\\n')))
+    Traceback (most recent call last):
+    ...
+    ValueError: Invalid quality character in b'@r1'
+
+    Parameters
+    ----------
+    handle : BinaryIO
+        Fastq file opened by binary mode
+    block_size : int, optional
+        Bytes read at once, by default 1 MB
+
+    Yields
+    ------
+    Tuple[bytes, bytes, bytes, bytes]
+        (title, description, sequence, quality characters)
+
+    Raises
+    ------
+    ValueError
+        Error occurs when record is not 4-line fastq, truncated or
+        has quality character below '!' (PHRED_OFFSET)
+    """
+
+    pending = b''
+    while True:
+        block = handle.read(block_size)
+        if not block:
+            break
+        lines = (pending + block).split(b'\n')
+        complete = len(lines) - 1
+        complete -= complete % 4
+        yield from _records(lines[:complete])
+        pending = b'\n'.join(lines[complete:])
+
+    lines = pending.split(b'\n')
+    while lines and not lines[-1].strip():
+        lines.pop()
+    if len(lines) % 4:
+        raise ValueError('Truncated fastq record at the end of file')
+    yield from _records(lines)
+
+    return
+
+class FASTQ(File):
+    """Class supports functions that process FASTQ format file
+    (plain or gzip compressed, 4-line records, Phred+33 qualities)
+
+    Example
+    -------
+    >>> from BI import FASTQ
+    >>> fastq = FASTQ.FASTQ('./data/small.fq')
+    >>> for record in fastq.reader():
+    ...     print(record.title, record.seq, record.qual[:4])
+    read1 ACGTACGTAC [40 40 40 40]
+    read2 NCGTAAGG [ 2 40 40 40]
+    read3 GGCCGGCCAT [40 40 40 40]
+    >>> summary = fastq.summary()
+    >>> summary.num_reads, summary.num_bases, summary.max_len
+    (3, 28, 10)
+    >>> summary.position_quality[:3]
+    array([27.33333333, 40.        , 40.        ])
+    """
+
+    def __init__(self, path: str) -> None:
+        """Initialize FASTQ class
+
+        Parameters
+        ----------
+        path : str
+            Path of .fastq (.fq, .fq.gz) file
+        """
+
+        self.path = os.path.abspath(path)
+        self._compressed = self._chk_compressed()
+        self.open_obj = False
+
+        return
+
+    def _chk_compressed(self) -> bool:
+        """Check whether self.path is gzip compressed (magic number or extension)"""
+
+        if os.path.isfile(self.path):
+            return is_gzip(self.path)
+        return self.path.endswith('.gz')
+
+    def sanity_check(self) -> bool:
+        """Check whether every record of self.path is valid 4-line fastq"""
+
+        try:
+            for _ in self.reader():
+                pass
+        except ValueError as error:
+            print(f'[WARNING] {error}')
+            return False
+        return True
+
+    def open(self, mode: str = 'r') -> None:
+        """Open fastq file (self.path) to self.open_obj.
+        gzip compressed fastq is opened transparently.
+
+        Parameters
+        ----------
+        mode : str
+            Open mode (r, w, ...)
+        """
+
+        if self.open_obj:
+            print('Current open_obj is already opened.')
+        else:
+            self.open_mode = mode
+            if self._compressed:
+                self.open_obj = gzip.open(self.path, mode if 'b' in mode else f'{mode}t')
+            else:
+                self.open_obj = open(self.path, mode)
+
+        return
+
+    def _open_binary(self) -> BinaryIO:
+        """Open self.path by binary read mode, decompressing if compressed"""
+
+        if self._compressed:
+            return gzip.open(self.path, 'rb')
+        return open(self.path, 'rb')
+
+    def close(self) -> None:
+        """Close self.open_obj attribute"""
+
+        self.open_obj.close()
+        self.open_obj = False
+        return
+
+    def readline(self) -> str:
+        """Read one line of self.open_obj"""
+
+        return self.open_obj.readline()
+
+    def reader(self, block_size: int = 1 << 20) -> Generator[FastqRecord, None, None]:
+        """Generator function parsing self.path by large binary blocks.
+        It does not need self.open_obj.
+
+        Parameters
+        ----------
+        block_size : int, optional
+            Bytes read at once, by default 1 MB
+
+        Yields
+        ------
+        FastqRecord
+            Read with lazy sequence and quality array (np.uint8)
+        """
+
+        with self._open_binary() as handle:
+            for title, desc, seq, qual in parse_fastq_blocks(handle, block_size):
+                qual = np.frombuffer(qual, dtype=np.uint8) - PHRED_OFFSET
+                yield FastqRecord(BytesSeq(seq), title.decode(), desc.decode(), qual)
+
+    def write(self,
+        title : str,
+        sequence : str,
+        qual : np.ndarray or str,
+        desc : str = None
+        ) -> None:
+
+        """Write one record to self.open_obj (opened by 'w' mode)
+
+        Parameters
+        ----------
+        title : str
+            Title of read
+        sequence : str
+            Sequence string
+        qual : np.ndarray or str
+            Phred quality scores (array) or quality characters (str)
+        desc : str, optional
+            Description of read, by default None
+        """
+
+        if 'r' in self.open_mode:
+            print('Current open_obj is "read" mode')
+            return
+
+        if not isinstance(qual, str):
+            qual = (np.asarray(qual, dtype=np.uint8) + PHRED_OFFSET).astype(np.uint8).tobytes().decode()
+        header = f'@{title} {desc}' if desc else f'@{title}'
+        self.open_obj.write(f'{header}\n{sequence}\n+\n{qual}\n')
+
+        return
+
+    def summary(self,
+        processes : int = 1,
+        chunk_size : int = 1 << 24
+        ) -> Bunch:
+
+        """Calculate FastQC-style core metrics (length distribution, per-position
+        quality and base composition, per-read mean quality, GC ratio).
+        File is cut into chunks of whole records and chunks are counted
+        by vectorized numpy kernels over process pool.
+
+        Parameters
+        ----------
+        processes : int, optional
+            The number of processes, by default 1
+        chunk_size : int, optional
+            Bytes of fastq per task, by default 16 MB
+
+        Returns
+        -------
+        Bunch
+            Result of fastq_summary()
+        """
+
+        with self._open_binary() as handle:
+            return fastq_summary(handle, processes, chunk_size)
+
+
+def _test():
+    import doctest
+    doctest.testmod()
+    return
+
+
+if __name__ == "__main__":
+    _test()
@@ -0,0 +1,212 @@
+import io
+
+from multiprocessing import Pool
+from typing import BinaryIO, Dict, Generator
+
+import numpy as np
+
+from BI.utils._bunch import Bunch
+
+__all__ = ('count_chunk', 'fastq_summary')
+
+## Phred+33, scores are clipped to 0-93
+PHRED_OFFSET = 33
+MAX_QUAL = 94
+## base codes of composition, A=0, C=1, G=2, T=3, others=4
+BASES = 'ACGTN'
+_BASE_CODE = np.full(256, 4, dtype=np.int64)
+for _base, _code in zip(b'ACGTacgt', (0, 1, 2, 3, 0, 1, 2, 3)):
+    _BASE_CODE[_base] = _code
+
+def _cut_records(handle : BinaryIO,
+    chunk_size : int
+    ) -> Generator[bytes, None, None]:
+
+    """Generator function cutting 4-line fastq into chunks of whole records.
+    Cut point is found by counting newlines (bytes.count, bytes.rfind),
+    records are not parsed."""
+
+    pending = b''
+    while True:
+        block = handle.read(chunk_size)
+        if not block:
+            break
+        data = pending + block
+        lines = data.count(b'\n')
+        pos = len(data)
+        for _ in range(lines % 4 + 1):
+            pos = data.rfind(b'\n', 0, pos)
+            if pos == -1:
+                break
+        cut = pos + 1
+        if cut > 0:
+            yield data[:cut]
+        pending = data[cut:]
+
+    if pending.strip():
+        yield pending
+
+    return
+
+def _pad_add(total: np.ndarray, part: np.ndarray) -> np.ndarray:
+    """Add arrays whose first dimension could be different"""
+
+    if len(part) > len(total):
+        total, part = part, total
+    total = total.copy()
+    total[:len(part)] += part
+    return total
+
+def count_chunk(data: bytes) -> Dict[str, np.ndarray]:
+    """Count metrics of chunk of whole fastq records by vectorized kernels.
+    Sequences and qualities of chunk are concatenated, and position of every
+    base in its read is made by arange - repeat(read starts), then
+    per-position histograms are one np.bincount() call each.
+
+    Example
+    -------
+    >>> counts = count_chunk(b'@r1\\nACGT\\n+\\nII#I\\n@r2\\nGN\\n+\\n5I\\n')
+    >>> counts['lengths'].tolist()
+    [4, 2]
+    >>> counts['position_bases'].tolist()
+    [[1, 0, 1, 0, 0], [0, 1, 0, 0, 1], [0, 0, 1, 0, 0], [0, 0, 0, 1, 0]]
+
+    Parameters
+    ----------
+    data : bytes
+        Whole 4-line fastq records
+
+    Returns
+    -------
+    Dict[str, np.ndarray]
+        lengths, position_qual_hist (position x 94), position_bases
+        (position x ACGTN), read_qual_hist (94)
+
+    Raises
+    ------
+    ValueError
+        Error occurs when record is invalid
+    """
+
+    from BI.FASTQ.FASTQ import parse_fastq_blocks
+
+    seqs, quals = [], []
+    for _, _, seq, qual in parse_fastq_blocks(io.BytesIO(data), max(len(data), 1)):
+        seqs.append(seq)
+        quals.append(qual)
+
+    lengths = np.fromiter((len(seq) for seq in seqs), dtype=np.int64, count=len(seqs))
+    max_len = int(lengths.max()) if len(lengths) else 0
+    bases = np.frombuffer(b''.join(seqs), dtype=np.uint8)
+    qual = np.frombuffer(b''.join(quals), dtype=np.uint8).astype(np.int64) - PHRED_OFFSET
+    if len(qual) and qual.min() < 0:
+        raise ValueError('Quality character lower than Phred+33 offset')
+    qual = np.minimum(qual, MAX_QUAL - 1)
+
+    starts = np.concatenate(([0], np.cumsum(lengths)[:-1])) if len(lengths) else lengths
+    positions = np.arange(len(bases)) - np.repeat(starts, lengths)
+
+    position_qual_hist = np.bincount(positions * MAX_QUAL + qual,
+                                     minlength=max_len * MAX_QUAL).reshape(max_len, MAX_QUAL)
+    position_bases = np.bincount(positions * 5 + _BASE_CODE[bases],
+                                 minlength=max_len * 5).reshape(max_len, 5)
+
+    ## mean quality of each read (empty reads are skipped)
+    nonempty = lengths > 0
+    sums = np.add.reduceat(qual, starts[nonempty]) if nonempty.any() else np.zeros(0, dtype=np.int64)
+    means = np.round(sums / lengths[nonempty]).astype(np.int64)
+    read_qual_hist = np.bincount(means, minlength=MAX_QUAL)
+
+    return {'lengths': lengths,
+            'position_qual_hist': position_qual_hist,
+            'position_bases': position_bases,
+            'read_qual_hist': read_qual_hist}
+
+def _quantile(hist: np.ndarray, q: float) -> np.ndarray:
+    """Quantile of every row of histogram (position x quality)"""
+
+    cumsum = np.cumsum(hist, axis=1)
+    target = cumsum[:, -1:] * q
+    return np.argmax(cumsum >= np.maximum(target, 1), axis=1)
+
+def fastq_summary(handle : BinaryIO,
+    processes : int = 1,
+    chunk_size : int = 1 << 24
+    ) -> Bunch:
+
+    """Calculate FastQC-style core metrics of fastq.
+    Handle is cut into chunks of whole records (_cut_records) and
+    chunks are counted (count_chunk) in process pool, partial
+    counts are merged by adding arrays.
+
+    Example
+    -------
+    >>> import io
+    >>> handle = io.BytesIO(b'@r1\\nACGT\\n+\\nII#I\\n@r2\\nGC\\n+\\n5I\\n')
+    >>> summary = fastq_summary(handle, chunk_size=8)
+    >>> summary.num_reads, summary.gc_ratio, summary.length_hist.tolist()
+    (2, 0.6667, [0, 0, 1, 0, 1])
+    >>> summary.position_median.tolist()
+    [20, 40, 2, 40]
+
+    Parameters
+    ----------
+    handle : BinaryIO
+        Fastq file opened by binary mode
+    processes : int, optional
+        The number of processes, by default 1
+    chunk_size : int, optional
+        Bytes of fastq per task, by default 16 MB
+
+    Returns
+    -------
+    Bunch
+        num_reads, num_bases, min_len, max_len, avg_len, gc_ratio, n_ratio,
+        length_hist, position_quality (mean), position_q1, position_median,
+        position_q3, position_bases (position x ACGTN ratio), read_qual_hist
+    """
+
+    chunks = _cut_records(handle, chunk_size)
+    if processes > 1:
+        with Pool(processes) as pool:
+            parts = list(pool.imap(count_chunk, chunks))
+    else:
+        parts = [count_chunk(chunk) for chunk in chunks]
+
+    lengths = np.concatenate([part['lengths'] for part in parts]) if parts else np.zeros(0, dtype=np.int64)
+    qual_hist = np.zeros((0, MAX_QUAL), dtype=np.int64)
+    bases = np.zeros((0, 5), dtype=np.int64)
+    read_qual_hist = np.zeros(MAX_QUAL, dtype=np.int64)
+    for part in parts:
+        qual_hist = _pad_add(qual_hist, part['position_qual_hist'])
+        bases = _pad_add(bases, part['position_bases'])
+        read_qual_hist += part['read_qual_hist']
+
+    depth = np.maximum(qual_hist.sum(axis=1), 1)
+    totals = bases.sum(axis=0)
+    num_bases = int(totals.sum())
+
+    return Bunch(num_reads=len(lengths),
+                 num_bases=num_bases,
+                 min_len=int(lengths.min()) if len(lengths) else 0,
+                 max_len=int(lengths.max()) if len(lengths) else 0,
+                 avg_len=round(num_bases / len(lengths), 2) if len(lengths) else 0,
+                 gc_ratio=round(int(totals[1] + totals[2]) / max(num_bases, 1), 4),
+                 n_ratio=round(int(totals[4]) / max(num_bases, 1), 4),
+                 length_hist=np.bincount(lengths),
+                 position_quality=qual_hist @ np.arange(MAX_QUAL) / depth,
+                 position_q1=_quantile(qual_hist, 0.25),
+                 position_median=_quantile(qual_hist, 0.5),
+                 position_q3=_quantile(qual_hist, 0.75),
+                 position_bases=bases / depth[:, None],
+                 read_qual_hist=read_qual_hist)
+
+
+def _test():
+    import doctest
+    doctest.testmod()
+    return
+
+
+if __name__ == "__main__":
+    _test()
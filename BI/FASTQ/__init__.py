@@ -0,0 +1,2 @@
+from BI.FASTQ.FASTQ import *
+from BI.FASTQ.Summary import *
\ No newline at end of file
@@ -10,6 +10,10 @@ class File(ABC):
     -----------
     FASTAProcessor
         Implemented (last at 2022/03/13)
+    TwoBit
+        Implemented (UCSC .2bit)
+    FASTQ
+        Implemented (4-line fastq, gzip)
     *BAMProcessor
         On going
     *VCFProcessor
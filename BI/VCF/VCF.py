@@ -8,6 +8,7 @@ import gzip
 import pandas as pd
 
 from BI.utils._bunch import Bunch
+from BI.utils._prefetch import PrefetchReader
 
 __all__ = ('metaFILTER', 'metaFORMAT', 'metaINFO', 'VCF')
 
@@ -229,6 +230,7 @@ class VCF(File):
         self._compressed = self._chk_compressed(self.vcf)
         self.f_obj = False
         self.mode = False
+        self.prefetch_stats = None
 
         return
 
@@ -441,8 +443,25 @@ class VCF(File):
         
         return meta_info
     
-    def reader(self) -> Generator[varRecord, None, None]:
+    def reader(self,
+        prefetch : bool = False,
+        queue_depth : int = 4,
+        block_size : int = 1 << 20
+        ) -> Generator[varRecord, None, None]:
+        
         """Generator function read vcf file line by line.
+        With 'prefetch', blocks of self.f_obj are read (and decompressed) ahead
+        by background thread (PrefetchReader) while lines are parsed, and its
+        counters are saved to self.prefetch_stats.
+        
+        Parameters
+        ----------
+        prefetch : bool, optional
+            Read blocks by background thread, by default False
+        queue_depth : int, optional
+            Maximum number of prefetched blocks, by default 4
+        block_size : int, optional
+            Bytes read at once by background thread, by default 1 MB
         
         Yields
         ------
@@ -454,14 +473,25 @@ class VCF(File):
             print(f'[ERROR] {self.vcf} is not opened.')
             return
         
-        line = self.readline()
-        while line != '':
-            cols = line.strip().split('\t')
-            if len(cols) < 9:
-                yield varRecord(*cols[:8])
-            else:
-                yield varRecord(*cols[:8], cols[8], cols[9:], self.header[9:])
+        ## readline() reads prefetched blocks while self.f_obj is swapped
+        if prefetch:
+            f_obj = self.f_obj
+            self.f_obj = PrefetchReader(f_obj, block_size, queue_depth)
+        
+        try:
             line = self.readline()
+            while line != '':
+                cols = line.strip().split('\t')
+                if len(cols) < 9:
+                    yield varRecord(*cols[:8])
+                else:
+                    yield varRecord(*cols[:8], cols[8], cols[9:], self.header[9:])
+                line = self.readline()
+        finally:
+            if prefetch:
+                self.f_obj.close()
+                self.prefetch_stats = self.f_obj.stats
+                self.f_obj = f_obj
 
         return
 
@@ -1 +1,3 @@
-from BI.utils._bunch import *
\ No newline at end of file
+from BI.utils._bunch import *
+from BI.utils._bgzf import *
+from BI.utils._prefetch import *
\ No newline at end of file
@@ -0,0 +1,272 @@
+"""
+Functions and classes for reading and writing gzip/BGZF compressed files.
+
+BGZF (Blocked GNU Zip Format, used by bgzip/samtools) is a series of
+gzip members, each member (block) has at most 64 KB of uncompressed data and
+records its compressed size in 'BC' extra subfield. Because every block is
+independently inflatable, a region could be read by inflating only the blocks
+overlapping it. Block positions are saved in .gzi index like htslib,
+
+    uint64  number of entries (N)
+    uint64  compressed offset of block 2,  uncompressed offset of block 2
+    ...     (N pairs, the first block (0, 0) is not written)
+"""
+
+import bisect
+import struct
+import zlib
+
+from typing import List, Tuple
+
+__all__ = ('is_gzip', 'is_bgzf', 'build_gzi', 'load_gzi', 'write_gzi', 'BgzfReader', 'BgzfWriter')
+
+GZIP_MAGIC = b'\x1f\x8b'
+## uncompressed bytes per block (same as htslib)
+BGZF_BLOCK_SIZE = 0xff00
+
+def is_gzip(path: str) -> bool:
+    """Check whether file is gzip compressed (by magic number)"""
+
+    with open(path, 'rb') as handle:
+        return handle.read(2) == GZIP_MAGIC
+
+def _read_block_header(handle) -> int or None:
+    """Read BGZF block header at current position of handle
+    and return total block size (BSIZE + 1), None if it is not BGZF block."""
+
+    header = handle.read(12)
+    if len(header) < 12 or header[:2] != GZIP_MAGIC or not header[3] & 4:
+        return None
+    xlen = struct.unpack('<H', header[10:12])[0]
+    extra = handle.read(xlen)
+
+    ## find 'BC' subfield (SI1=66, SI2=67, SLEN=2, BSIZE)
+    i = 0
+    while i + 4 <= len(extra):
+        slen = struct.unpack('<H', extra[i+2:i+4])[0]
+        if extra[i:i+2] == b'BC' and slen == 2:
+            return struct.unpack('<H', extra[i+4:i+6])[0] + 1
+        i += 4 + slen
+
+    return None
+
+def is_bgzf(path: str) -> bool:
+    """Check whether file is BGZF compressed (gzip with 'BC' extra subfield)"""
+
+    with open(path, 'rb') as handle:
+        return _read_block_header(handle) is not None
+
+def build_gzi(path: str) -> List[Tuple[int, int]]:
+    """Build block index of BGZF file. Only block headers and
+    ISIZE trailers are read, no block is inflated.
+
+    Parameters
+    ----------
+    path : str
+        Path of BGZF file
+
+    Returns
+    -------
+    List[Tuple[int, int]]
+        (compressed offset, uncompressed offset) of every block,
+        including the first block (0, 0)
+
+    Raises
+    ------
+    ValueError
+        Error occurs when file is not BGZF
+    """
+
+    blocks = []
+    coffset = uoffset = 0
+    with open(path, 'rb') as handle:
+        while True:
+            handle.seek(coffset)
+            block_size = _read_block_header(handle)
+            if block_size is None:
+                if handle.read(1) == b'' and coffset != 0:
+                    break
+                raise ValueError(f'{path} is not BGZF compressed file')
+            handle.seek(coffset + block_size - 4)
+            isize = struct.unpack('<I', handle.read(4))[0]
+            blocks.append((coffset, uoffset))
+            coffset += block_size
+            uoffset += isize
+
+    return blocks
+
+def load_gzi(path: str) -> List[Tuple[int, int]]:
+    """Load .gzi index file (htslib format) and return block list
+    including the first block (0, 0)"""
+
+    with open(path, 'rb') as handle:
+        count = struct.unpack('<Q', handle.read(8))[0]
+        values = struct.unpack(f'<{count*2}Q', handle.read(count * 16))
+
+    return [(0, 0)] + list(zip(values[::2], values[1::2]))
+
+def write_gzi(path: str, blocks: List[Tuple[int, int]]) -> None:
+    """Write block list as .gzi index file (htslib format)"""
+
+    blocks = [block for block in blocks if block != (0, 0)]
+    with open(path, 'wb') as handle:
+        handle.write(struct.pack('<Q', len(blocks)))
+        handle.write(b''.join(struct.pack('<QQ', *block) for block in blocks))
+
+    return
+
+
+class BgzfReader:
+    """Class for random access of BGZF file by uncompressed offset.
+    It inflates only blocks overlapping requested range with .gzi block list.
+    """
+
+    def __init__(self,
+        path : str,
+        blocks : List[Tuple[int, int]] = None
+        ) -> None:
+
+        """Initialize BgzfReader class
+
+        Parameters
+        ----------
+        path : str
+            Path of BGZF file
+        blocks : List[Tuple[int, int]], optional
+            Block list from build_gzi() or load_gzi(), by default None (build)
+        """
+
+        self.path = path
+        self.blocks = blocks if blocks is not None else build_gzi(path)
+        self._uoffsets = [block[1] for block in self.blocks]
+        self._handle = open(path, 'rb')
+        self._cache_idx = None
+        self._cache_data = b''
+
+        return
+
+    def _inflate_block(self, idx: int) -> bytes:
+        """Return uncompressed data of idx-th block"""
+
+        if idx == self._cache_idx:
+            return self._cache_data
+
+        coffset = self.blocks[idx][0]
+        self._handle.seek(coffset)
+        block_size = _read_block_header(self._handle)
+        header_size = self._handle.tell() - coffset
+        cdata = self._handle.read(block_size - header_size - 8)
+
+        self._cache_idx = idx
+        self._cache_data = zlib.decompress(cdata, -15)
+        return self._cache_data
+
+    def read_range(self, start: int, end: int) -> bytes:
+        """Read uncompressed data of [start, end)
+
+        Parameters
+        ----------
+        start : int
+            Uncompressed start offset
+        end : int
+            Uncompressed exclusive end offset
+
+        Returns
+        -------
+        bytes
+            Uncompressed data
+        """
+
+        if start >= end:
+            return b''
+
+        idx = bisect.bisect_right(self._uoffsets, start) - 1
+        first = self._uoffsets[idx]
+        chunks = []
+        while idx < len(self.blocks) and self._uoffsets[idx] < end:
+            chunks.append(self._inflate_block(idx))
+            idx += 1
+        data = b''.join(chunks)
+
+        return data[start-first:end-first]
+
+    def close(self) -> None:
+        """Close BGZF file"""
+        self._handle.close()
+        return
+
+
+class BgzfWriter:
+    """Class for writing BGZF file (bgzip compatible). Data is split into
+    blocks of at most 65280 bytes, and (compressed offset, uncompressed offset)
+    of every block is recorded for .gzi index.
+    """
+
+    def __init__(self,
+        path : str,
+        compresslevel : int = 6
+        ) -> None:
+
+        """Initialize BgzfWriter class
+
+        Parameters
+        ----------
+        path : str
+            Path of BGZF file
+        compresslevel : int, optional
+            zlib compression level, by default 6
+        """
+
+        self.path = path
+        self.compresslevel = compresslevel
+        self.blocks: List[Tuple[int, int]] = []
+        self._handle = open(path, 'wb')
+        self._buffer = bytearray()
+        self._coffset = 0
+        self._uoffset = 0
+
+        return
+
+    def write(self, data: bytes) -> None:
+        """Write data, full blocks are compressed immediately"""
+
+        self._buffer += data
+        if len(self._buffer) >= BGZF_BLOCK_SIZE:
+            view = memoryview(self._buffer)
+            end = len(self._buffer) // BGZF_BLOCK_SIZE * BGZF_BLOCK_SIZE
+            for start in range(0, end, BGZF_BLOCK_SIZE):
+                self._write_block(view[start:start+BGZF_BLOCK_SIZE])
+            view.release()
+            del self._buffer[:end]
+
+        return
+
+    def tell(self) -> int:
+        """Return uncompressed offset of written data"""
+        return self._uoffset + len(self._buffer)
+
+    def _write_block(self, data: bytes) -> None:
+        compressor = zlib.compressobj(self.compresslevel, zlib.DEFLATED, -15)
+        cdata = compressor.compress(data) + compressor.flush()
+        block_size = 12 + 6 + len(cdata) + 8
+
+        self._handle.write(b'\x1f\x8b\x08\x04\x00\x00\x00\x00\x00\xff'
+                           + struct.pack('<HccHH', 6, b'B', b'C', 2, block_size - 1)
+                           + cdata
+                           + struct.pack('<II', zlib.crc32(data), len(data)))
+        self.blocks.append((self._coffset, self._uoffset))
+        self._coffset += block_size
+        self._uoffset += len(data)
+
+        return
+
+    def close(self) -> None:
+        """Write remaining data and empty EOF block, then close file"""
+
+        if self._buffer:
+            self._write_block(bytes(self._buffer))
+            self._buffer = bytearray()
+        self._write_block(b'')
+        self._handle.close()
+
+        return
@@ -0,0 +1,198 @@
+"""
+Background-thread prefetching reader. It overlaps reading and decompressing
+(zlib releases GIL) with parsing of the main thread.
+"""
+
+import queue
+import threading
+import time
+
+from typing import Iterator
+
+from BI.utils._bunch import Bunch
+
+__all__ = ('PrefetchReader',)
+
+class PrefetchReader:
+    """File-like reader whose blocks are read ahead by background thread.
+    Background thread calls source.read(block_size) and puts blocks to bounded
+    queue (queue_depth), main thread reads them by read(), readline() or
+    iteration. Data type (bytes or str) follows source.
+
+    Example
+    -------
+    >>> import io
+    >>> source = io.BytesIO(b'line1\\nline2\\nline3\\n')
+    >>> with PrefetchReader(source, block_size=4) as reader:
+    ...     print(reader.readline(), reader.read(3), list(reader))
+    b'line1\\n' b'lin' [b'e2\\n', b'line3\\n']
+    >>> sorted(reader.stats)
+    ['blocks', 'bytes', 'read_time', 'wait_time']
+    """
+
+    def __init__(self,
+        source,
+        block_size : int = 1 << 20,
+        queue_depth : int = 4
+        ) -> None:
+
+        """Initialize PrefetchReader class and start background thread
+
+        Parameters
+        ----------
+        source : BinaryIO or TextIO
+            Opened file (or any object having read(size))
+        block_size : int, optional
+            Size of block read at once, by default 1 MB
+        queue_depth : int, optional
+            Maximum number of blocks waiting in queue, by default 4
+        """
+
+        self.source = source
+        self.block_size = block_size
+        self._queue = queue.Queue(maxsize=queue_depth)
+        self._stop = threading.Event()
+        self._error = None
+
+        ## current block and position in it, pieces of data spanning
+        ## blocks are collected and joined once (no rescanning)
+        self._buffer = source.read(0)
+        self._empty = self._buffer
+        self._pos = 0
+        self._newline = b'\n' if isinstance(self._buffer, bytes) else '\n'
+        self._eof = False
+
+        self.stats = Bunch(blocks=0, bytes=0, read_time=0.0, wait_time=0.0)
+
+        self._thread = threading.Thread(target=self._produce, daemon=True)
+        self._thread.start()
+
+        return
+
+    def _produce(self) -> None:
+        """Background thread reading blocks of source to queue"""
+
+        try:
+            while not self._stop.is_set():
+                start = time.perf_counter()
+                block = self.source.read(self.block_size)
+                self.stats.read_time += time.perf_counter() - start
+                self._put(block)
+                if not block:
+                    return
+        except Exception as error:
+            self._error = error
+            self._put(None)
+        return
+
+    def _put(self, block) -> None:
+        while not self._stop.is_set():
+            try:
+                self._queue.put(block, timeout=0.1)
+                return
+            except queue.Full:
+                continue
+        return
+
+    def _next_block(self) -> bool:
+        """Replace buffer by next block from queue (rest of buffer must be
+        consumed before), return False at the end of source"""
+
+        if self._eof:
+            return False
+
+        start = time.perf_counter()
+        block = self._queue.get()
+        self.stats.wait_time += time.perf_counter() - start
+
+        if block is None:
+            self._eof = True
+            raise self._error
+        if not block:
+            self._eof = True
+            return False
+
+        self.stats.blocks += 1
+        self.stats.bytes += len(block)
+        self._buffer = block
+        self._pos = 0
+        return True
+
+    def _take(self, end: int):
+        """Return buffer[pos:end] and move position to 'end'"""
+
+        data = self._buffer[self._pos:end]
+        self._pos = end
+        return data
+
+    def _join(self, pieces: list):
+        return pieces[0] if len(pieces) == 1 else self._empty.join(pieces)
+
+    def read(self, size: int = -1):
+        """Read at most 'size' (all if negative) bytes or characters"""
+
+        if size is None or size < 0:
+            pieces = [self._take(len(self._buffer))]
+            while self._next_block():
+                pieces.append(self._take(len(self._buffer)))
+            return self._join(pieces)
+
+        pieces = []
+        while True:
+            end = min(self._pos + size, len(self._buffer))
+            size -= end - self._pos
+            pieces.append(self._take(end))
+            if size == 0 or not self._next_block():
+                return self._join(pieces)
+
+    def readline(self):
+        """Read one line (including newline)"""
+
+        pieces = []
+        while True:
+            ## only new data is searched for newline
+            end = self._buffer.find(self._newline, self._pos)
+            if end != -1:
+                pieces.append(self._take(end + 1))
+                return self._join(pieces)
+            pieces.append(self._take(len(self._buffer)))
+            if not self._next_block():
+                return self._join(pieces)
+
+    def __iter__(self) -> Iterator:
+        return self
+
+    def __next__(self):
+        line = self.readline()
+        if not line:
+            raise StopIteration
+        return line
+
+    def close(self) -> None:
+        """Stop background thread (source is not closed)"""
+
+        self._stop.set()
+        while self._thread.is_alive():
+            try:
+                self._queue.get(timeout=0.1)
+            except queue.Empty:
+                pass
+        self._thread.join()
+        return
+
+    def __enter__(self) -> 'PrefetchReader':
+        return self
+
+    def __exit__(self, *args) -> None:
+        self.close()
+        return
+
+
+def _test():
+    import doctest
+    doctest.testmod()
+    return
+
+
+if __name__ == "__main__":
+    _test()
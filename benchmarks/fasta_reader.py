@@ -0,0 +1,62 @@
+"""Benchmark of FASTA.reader() parsing throughput (MB/s).
+
+It writes a random fasta to a temporary directory and compares
+the line-based reader (default) with the block parser (block=True).
+
+    python benchmarks/fasta_reader.py --size 200 --records 1000
+"""
+
+import argparse
+import os
+import random
+import tempfile
+import time
+
+from BI.FASTA.FASTA import FASTA
+
+def make_fasta(path: str, size_mb: int, records: int, width: int = 60) -> None:
+    """Write random fasta of about size_mb MB with 'records' records"""
+
+    random.seed(0)
+    unit = ''.join(random.choice('ACGT') for _ in range(1 << 16))
+    length = size_mb * (1 << 20) // records
+    with open(path, 'w') as handle:
+        for i in range(records):
+            seq = (unit * (length // len(unit) + 1))[:length]
+            handle.write(f'>seq{i} random sequence {i}\n')
+            handle.write(''.join(seq[j:j+width] + '\n' for j in range(0, length, width)))
+    return
+
+def run(label: str, fasta: FASTA, **kwargs) -> None:
+    """Consume reader() and print throughput"""
+
+    size = os.path.getsize(fasta.path) / (1 << 20)
+    fasta.open()
+    start = time.perf_counter()
+    bases = 0
+    for record in fasta.reader(**kwargs):
+        bases += len(record.seq)
+    elapsed = time.perf_counter() - start
+    fasta.close()
+    print(f'{label:<12} {elapsed:8.3f} s  {size / elapsed:8.1f} MB/s  ({bases} bytes of sequence)')
+    return
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.split('\n')[0])
+    parser.add_argument('--size', type=int, default=100, help='size of fasta (MB)')
+    parser.add_argument('--records', type=int, default=1000, help='the number of records')
+    parser.add_argument('--block-size', type=int, default=1 << 20, help='block size of block parser')
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, 'bench.fa')
+        make_fasta(path, args.size, args.records)
+        fasta = FASTA(path)
+        run('line', fasta)
+        run('block', fasta, block=True, block_size=args.block_size)
+
+    return
+
+
+if __name__ == '__main__':
+    main()